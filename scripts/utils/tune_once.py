@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
+import asyncio
 import json
+import logging
+import logging.handlers
 import os
 import re
 import shutil
@@ -9,17 +12,39 @@ from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
 # --- Config from env (LM Studio on Windows, exported in WSL) ---
 BASE = os.getenv("OPENAI_API_BASE", "").rstrip("/")
 KEY = os.getenv("OPENAI_API_KEY", "")
 MODEL = os.getenv("AGENT_MODEL", "meta-llama-3.1-8b-instruct")
 
+# Shared keep-alive session so every loop iteration reuses the LLM connection
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 
 STRATEGY_PATH = Path("strategies/SimpleAlwaysBuySell.py")
 CONFIG = "user_data/config.json"
 TIMEFRAME = "1h"
 TIMERANGE = os.getenv("AGENT_TIMERANGE", "20240101-")  # start-to-now
+# Freqtrade backtest cache mode (day/week/month/none). --cache does not cache
+# candle data: it reuses an earlier backtest *result* whose strategy and config
+# hash the same, so a sweep whose parameters do not change that hash gets stale
+# results. Defaults to none; only opt in when each run really is a repeat.
+BACKTEST_CACHE = os.getenv("AGENT_CACHE", "none")
+
+# Bounded sink for unparseable backtest output; only the tail holds the summary table
+DEBUG_OUTPUT_PATH = "backtest_debug_output.txt"
+DEBUG_TAIL_CHARS = 4096
+_dbg = logging.getLogger("tune_debug")
+_dbg.propagate = False
+_dbg.addHandler(
+    logging.handlers.RotatingFileHandler(
+        DEBUG_OUTPUT_PATH, maxBytes=1 << 20, backupCount=3, encoding="utf-8", delay=True
+    )
+)
 
 
 # Auto-detect freqtrade executable in venv
@@ -44,11 +69,11 @@ def call_llm(spec: str) -> str:
         "top_p": 0.95,
         "max_tokens": 256,
     }
-    headers = {"Content-Type": "application/json"}
+    headers: Dict[str, str] = {}
     # Only add Authorization header if KEY is set (for remote APIs)
     if KEY:
         headers["Authorization"] = f"Bearer {KEY}"
-    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
+    r = _SESSION.post(url, headers=headers, json=payload, timeout=(5, 60))
     r.raise_for_status()
     j = r.json()
     return j["choices"][0]["message"]["content"]
@@ -167,18 +192,156 @@ def backtest_once() -> int:
         "--timerange",
         TIMERANGE,
         "--cache",
-        "none",
+        BACKTEST_CACHE,
     ]
     print("[BT]", " ".join(cmd), flush=True)
     return subprocess.call(cmd)
 
 
+def download_data(timeframes: list[str], timerange: str) -> int:
+    """Download OHLCV data for all timeframes once, covering the full loop timerange."""
+    if not FREQTRADE_PATH:
+        print("[LOG] download_data: freqtrade executable not found, skipping.")
+        return 1
+    cmd = [
+        FREQTRADE_PATH,
+        "download-data",
+        "-c",
+        CONFIG,
+        "--timeframes",
+        *timeframes,
+        "--timerange",
+        timerange,
+    ]
+    print("[DL]", " ".join(cmd), flush=True)
+    return subprocess.call(cmd)
+
+
+def _build_spec(last_profit: Optional[float]) -> str:
+    """Build the LLM prompt asking for ROI/stoploss, with optional profit feedback."""
+    if last_profit is not None:
+        feedback = f"Last backtest profit: {last_profit:.2f}%. Try to improve it."
+    else:
+        feedback = ""
+    return (
+        "Return ONLY a single JSON object with either:\n"
+        '{ "minimal_roi": {"0": 0.01, "60": 0.0}, "stoploss": -0.1 }\n'
+        "or\n"
+        '{ "minimal_roi_0": 0.012, "stoploss": -0.11 }\n'
+        "No markdown, no code fences, no commentary.\n"
+        f"{feedback}"
+    )
+
+
+async def _backtest_async(timeframe: str, timerange: str) -> Tuple[str, str]:
+    """Run one freqtrade backtest without blocking the event loop; return (stdout, stderr)."""
+    proc = await asyncio.create_subprocess_exec(
+        str(FREQTRADE_PATH),
+        "backtesting",
+        "-c",
+        CONFIG,
+        "--strategy",
+        "SimpleAlwaysBuySell",
+        "--strategy-path",
+        "strategies",
+        "--timeframe",
+        timeframe,
+        "--timerange",
+        timerange,
+        "--cache",
+        BACKTEST_CACHE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate()
+    return out.decode("utf-8", errors="replace"), err.decode("utf-8", errors="replace")
+
+
+def _report_backtest(stdout: str, stderr: str, label: str) -> float:
+    """Log a finished backtest and return its parsed profit."""
+    logging.info(f"Backtest output for {label}:\nSTDOUT:\n{stdout}")
+    logging.info(f"STDERR:\n{stderr}")
+    if not stdout.strip() and stderr.strip():
+        logging.warning(
+            f"[WARN] No stdout from Freqtrade, but stderr present:\n{stderr}"
+        )
+    elif not stdout.strip():
+        logging.warning("[WARN] No output from Freqtrade backtest.")
+    return parse_backtest_profit(stdout)
+
+
+async def _learning_loop(
+    timeframes: list[str],
+    timeranges: list[str],
+    pipeline: bool = False,
+) -> Tuple[float, Optional[Tuple[Dict[str, float], float, str, str]]]:
+    """
+    Tune loop: each iteration's LLM prompt reports the previous backtest's profit.
+    With ``pipeline`` the LLM call for iteration N+1 instead runs while the
+    backtest for iteration N is still in flight, so its feedback lags by one
+    iteration. The strategy file is only patched after the previous backtest
+    has finished either way.
+    Returns the best profit and the params that produced it.
+    """
+    best_profit: float = float("-inf")
+    best_params: Optional[Tuple[Dict[str, float], float, str, str]] = None
+    last_profit: Optional[float] = None
+    # (backtest task, params, log label) of the iteration still running
+    pending: Optional[
+        Tuple["asyncio.Task[Tuple[str, str]]", Tuple[Dict[str, float], float, str, str], str]
+    ] = None
+
+    async def finish_pending() -> None:
+        nonlocal pending, last_profit, best_profit, best_params
+        if pending is None:
+            return
+        task, params, label = pending
+        pending = None
+        try:
+            stdout, stderr = await task
+            profit = _report_backtest(stdout, stderr, label)
+            logging.info(f"{label} profit: {profit}")
+            if profit > best_profit:
+                best_profit = profit
+                best_params = params
+            last_profit = profit
+        except Exception as e:
+            logging.error(f"Exception in backtest for {label}: {e}")
+
+    for tf in timeframes:
+        logging.info(f"=== Timeframe: {tf} ===")
+        for i, timerange in enumerate(timeranges):
+            label = f"iteration {i+1} (timeframe {tf})"
+            logging.info(f"[LOOP] Iteration {i+1}/{len(timeranges)} for {tf}")
+            logging.info(f"Using timerange: {timerange}")
+            if not pipeline:
+                await finish_pending()
+            llm_task = asyncio.create_task(
+                asyncio.to_thread(call_llm, _build_spec(last_profit))
+            )
+            await finish_pending()
+            try:
+                raw = await llm_task
+                obj = _scan_json_objects(raw) or {}
+                roi, sl = normalize_params(obj)
+                logging.info(f"[LLM] Parsed: ROI={roi} stoploss={sl}")
+                patch_strategy(STRATEGY_PATH, roi, sl)
+                pending = (
+                    asyncio.create_task(_backtest_async(tf, timerange)),
+                    (roi, sl, tf, timerange),
+                    label,
+                )
+            except Exception as e:
+                logging.error(f"Exception in {label}: {e}")
+    await finish_pending()
+    return best_profit, best_params
+
+
 def main() -> int:
     """
     Main learning loop. Customizable via LOOP_CONFIG at the top of the file or via environment variables.
     Easily set timeframes, timeranges, and number of iterations without code changes.
     """
-    import logging
     from datetime import datetime, timedelta
     from typing import Any, Dict, Optional, Tuple
 
@@ -188,6 +351,8 @@ def main() -> int:
         "num_iter": int(os.getenv("AGENT_NUM_ITER", "3")),
         "base_start": os.getenv("AGENT_BASE_START", "2024-01-01"),
         "days_per_iter": int(os.getenv("AGENT_DAYS_PER_ITER", "30")),
+        # Opt-in: overlap each LLM call with the previous backtest (feedback lags one iteration)
+        "pipeline": os.getenv("AGENT_PIPELINE", "0") == "1",
     }
 
     # Verify timeframes are valid for Freqtrade
@@ -219,82 +384,22 @@ def main() -> int:
 
     best_profit: float = float("-inf")
     best_params: Optional[Tuple[Dict[str, float], float, str, str]] = None
-    last_profit: Optional[float] = None
+    # Per-iteration timeranges are identical for every timeframe; build them once
+    base_start = datetime.strptime(LOOP_CONFIG["base_start"], "%Y-%m-%d")
+    bounds = [
+        (base_start + timedelta(days=i * LOOP_CONFIG["days_per_iter"])).strftime("%Y%m%d")
+        for i in range(LOOP_CONFIG["num_iter"] + 1)
+    ]
+    timeranges = [f"{start}-{end}" for start, end in zip(bounds, bounds[1:])]
+    if not FREQTRADE_PATH:
+        logging.error("freqtrade executable not found, aborting.")
+        return 1
+    # Fetch candles for the whole span up front so iterations only read local data
+    download_data(LOOP_CONFIG["timeframes"], f"{bounds[0]}-{bounds[-1]}")
     try:
-        for tf in LOOP_CONFIG["timeframes"]:
-            logging.info(f"=== Timeframe: {tf} ===")
-            base_start = datetime.strptime(LOOP_CONFIG["base_start"], "%Y-%m-%d")
-            for i in range(LOOP_CONFIG["num_iter"]):
-                logging.info(
-                    f"[LOOP] Iteration {i+1}/{LOOP_CONFIG['num_iter']} for {tf}"
-                )
-                start = base_start + timedelta(days=i * LOOP_CONFIG["days_per_iter"])
-                end = start + timedelta(days=LOOP_CONFIG["days_per_iter"])
-                timerange = f"{start.strftime('%Y%m%d')}-{end.strftime('%Y%m%d')}"
-                logging.info(f"Using timerange: {timerange}")
-                if last_profit is not None:
-                    feedback = (
-                        f"Last backtest profit: {last_profit:.2f}%. Try to improve it."
-                    )
-                else:
-                    feedback = ""
-                spec = (
-                    "Return ONLY a single JSON object with either:\n"
-                    '{ "minimal_roi": {"0": 0.01, "60": 0.0}, "stoploss": -0.1 }\n'
-                    "or\n"
-                    '{ "minimal_roi_0": 0.012, "stoploss": -0.11 }\n'
-                    "No markdown, no code fences, no commentary.\n"
-                    f"{feedback}"
-                )
-                try:
-                    raw = call_llm(spec)
-                    obj = _scan_json_objects(raw) or {}
-                    roi, sl = normalize_params(obj)
-                    logging.info(f"[LLM] Parsed: ROI={roi} stoploss={sl}")
-                    patch_strategy(STRATEGY_PATH, roi, sl)
-                    # Ensure FREQTRADE_PATH is str, not None
-                    if not FREQTRADE_PATH:
-                        logging.error("freqtrade executable not found, aborting.")
-                        return 1
-                    result = subprocess.run(
-                        [
-                            str(FREQTRADE_PATH),
-                            "backtesting",
-                            "-c",
-                            CONFIG,
-                            "--strategy",
-                            "SimpleAlwaysBuySell",
-                            "--strategy-path",
-                            "strategies",
-                            "--timeframe",
-                            tf,
-                            "--timerange",
-                            timerange,
-                            "--cache",
-                            "none",
-                        ],
-                        capture_output=True,
-                        text=True,
-                        check=False,
-                    )
-                    logging.info(
-                        f"Backtest output for iteration {i+1} (timeframe {tf}):\nSTDOUT:\n{result.stdout}"
-                    )
-                    logging.info(f"STDERR:\n{result.stderr}")
-                    if not result.stdout.strip() and result.stderr.strip():
-                        logging.warning(
-                            f"[WARN] No stdout from Freqtrade, but stderr present:\n{result.stderr}"
-                        )
-                    elif not result.stdout.strip():
-                        logging.warning("[WARN] No output from Freqtrade backtest.")
-                    profit = parse_backtest_profit(result.stdout)
-                    logging.info(f"Iteration {i+1} profit: {profit}")
-                    if profit > best_profit:
-                        best_profit = profit
-                        best_params = (roi, sl, tf, timerange)
-                    last_profit = profit
-                except Exception as e:
-                    logging.error(f"Exception in iteration {i+1} (timeframe {tf}): {e}")
+        best_profit, best_params = asyncio.run(
+            _learning_loop(LOOP_CONFIG["timeframes"], timeranges, LOOP_CONFIG["pipeline"])
+        )
     except Exception as loop_e:
         logging.error(f"Learning loop failed: {loop_e}")
     logging.info(f"[RESULT] Best profit: {best_profit}")
@@ -311,15 +416,12 @@ def parse_backtest_profit(backtest_output: str) -> float:
     match = re.search(r"Total profit %\s*│\s*(-?\d+\.\d+)", backtest_output)
     if match:
         return float(match.group(1))
-    import logging
-
-    # Write the raw output to a debug file for inspection
-    with open("backtest_debug_output.txt", "a", encoding="utf-8") as dbg:
-        dbg.write("\n--- Could not parse profit ---\n")
-        dbg.write(backtest_output)
-        dbg.write("\n-----------------------------\n")
+    _dbg.error(
+        "--- Could not parse profit ---\n%s\n-----------------------------",
+        backtest_output[-DEBUG_TAIL_CHARS:],
+    )
     logging.error(
-        "[DEBUG] Could not parse profit. See backtest_debug_output.txt for raw output."
+        f"[DEBUG] Could not parse profit. See {DEBUG_OUTPUT_PATH} for raw output."
     )
     return float("-inf")
 
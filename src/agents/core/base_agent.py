@@ -10,12 +10,15 @@ class BaseAgent(ABC):
         self.config = config or {}
         self.logger = logging.getLogger(self.name)
         self.logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler()
-        handler.setFormatter(
-            logging.Formatter("[%(asctime)s][%(levelname)s][%(name)s] %(message)s")
-        )
+        # Loggers are process-wide, so the handler is built once per name
         if not self.logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(
+                logging.Formatter("[%(asctime)s][%(levelname)s][%(name)s] %(message)s")
+            )
             self.logger.addHandler(handler)
+            # The handler above prints the record; don't repeat it via root
+            self.logger.propagate = False
 
     @abstractmethod
     def run(self):
@@ -23,3 +26,33 @@ class BaseAgent(ABC):
 
     def log(self, msg, level=logging.INFO):
         self.logger.log(level, msg)
+
+
+class LLMClientMixin:
+    """Lazy ``cfg``/``llm`` attributes for agents that talk to the LLM.
+
+    Neither services.llm_client nor the client itself is touched until first
+    use, so idle agents stay cheap. Set ``_cfg``/``_llm`` in __init__ to share
+    an already loaded config or client.
+    """
+
+    _cfg = None
+    _llm = None
+
+    @property
+    def cfg(self) -> dict:
+        """LLM config, loaded on first access."""
+        if self._cfg is None:
+            from services.llm_client import load_cfg
+
+            self._cfg = load_cfg()
+        return self._cfg
+
+    @property
+    def llm(self):
+        """LLM client, constructed on first access."""
+        if self._llm is None:
+            from services.llm_client import LLMClient
+
+            self._llm = LLMClient(self.cfg)
+        return self._llm
@@ -17,10 +17,6 @@ class BaseAgent:
         self.name = name
         self.cfg = load_cfg()
         self.logger = logging.getLogger(name)
-        logging.basicConfig(
-            level=logging.INFO,
-            format=f"[{name}] %(asctime)s %(levelname)s: %(message)s",
-        )
 
 
 class ErrorMedicAgent(BaseAgent):
@@ -29,6 +25,19 @@ class ErrorMedicAgent(BaseAgent):
     def __init__(self):
         super().__init__("ErrorMedicAgent")
         self.llm = LLMClient(self.cfg)
+        # Shared across the heal passes of full_heal to avoid re-reading unchanged files
+        self._root_listing = tuple(os.listdir("."))
+        self._file_cache: dict[str, tuple[float, str]] = {}
+
+    def _read_context_file(self, fname: str) -> str:
+        """Return file contents, reusing the cached copy while its mtime is unchanged."""
+        mtime = os.path.getmtime(fname)
+        cached = self._file_cache.get(fname)
+        if cached is None or cached[0] != mtime:
+            with open(fname, "r", encoding="utf-8") as f:
+                cached = (mtime, f.read())
+            self._file_cache[fname] = cached
+        return cached[1]
 
     def run_linter(self) -> str:
         self.logger.info("Running ruff linter...")
@@ -55,10 +64,9 @@ class ErrorMedicAgent(BaseAgent):
         self.logger.info("Sending errors to LLM for healing...")
         context = ""
         if context_files:
-            for fname in context_files:
+            for fname in dict.fromkeys(context_files):
                 try:
-                    with open(fname, "r", encoding="utf-8") as f:
-                        code = f.read()
+                    code = self._read_context_file(fname)
                     context += f"\n\n# File: {fname}\n" + code
                 except Exception as e:
                     context += f"\n\n# File: {fname} (unreadable: {e})\n"
@@ -71,7 +79,7 @@ class ErrorMedicAgent(BaseAgent):
         user = (
             f"Error log(s):\n{error_log}\n"
             f"Project context (snippets):{context}\n"
-            "Project root files: " + ", ".join(os.listdir("."))
+            "Project root files: " + ", ".join(self._root_listing)
         )
         suggestion = self.llm.chat(system, user)
         self.logger.info(f"LLM Suggestion:\n{suggestion}")
@@ -130,5 +138,9 @@ class ErrorMedicAgent(BaseAgent):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[ErrorMedicAgent] %(asctime)s %(levelname)s: %(message)s",
+    )
     agent = ErrorMedicAgent()
     agent.full_heal()
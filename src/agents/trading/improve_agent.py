@@ -3,10 +3,12 @@
 import logging
 import os
 
-from services.llm_client import LLMClient, load_cfg
+from agents.base_agent import LLMClientMixin
 
+logger = logging.getLogger("ImproveAgent")
 
-class ImproveAgent:
+
+class ImproveAgent(LLMClientMixin):
     """Agent to analyze backtest results and suggest improvements to strategies.
 
     This agent interacts with an LLM (Large Language Model) to get suggestions
@@ -15,24 +17,49 @@ class ImproveAgent:
     suggested improvements, typically in the form of a patch.
     """
 
-    def __init__(self, strategy_path: str, backtest_log: str):
+    # Strategy sources keyed by path, stored as (mtime, code).
+    _code_cache: dict[str, tuple[float, str]] = {}
+
+    def __init__(self, strategy_path: str, backtest_log: str = "", cfg=None, llm=None):
         """
         Initializes the ImproveAgent.
 
         Args:
             strategy_path (str): The path to the strategy file that was backtested.
             backtest_log (str): The full log output from the backtest of the strategy.
+            cfg (dict, optional): Pre-loaded LLM config; loaded lazily when omitted.
+            llm (LLMClient, optional): Shared LLM client; built lazily when omitted.
         """
         self.strategy_path = strategy_path
         self.backtest_log = backtest_log
-        self.cfg = load_cfg()
-        self.llm = LLMClient(self.cfg)
+        self._cfg = cfg
+        self._llm = llm
         self.offline_mode = os.getenv("LLM_OFFLINE", "0") == "1"
-        self.logger = logging.getLogger("ImproveAgent")
-        logging.basicConfig(
-            level=logging.INFO,
-            format="[ImproveAgent] %(asctime)s %(levelname)s: %(message)s",
-        )
+        self.logger = logger
+
+    def set_context(self, backtest_log: str, strategy_path: str = None) -> None:
+        """
+        Points the agent at a new backtest so one instance (and its LLM client)
+        can be reused across loop iterations.
+
+        Args:
+            backtest_log (str): The full log output from the latest backtest.
+            strategy_path (str, optional): A different strategy file to improve.
+        """
+        self.backtest_log = backtest_log
+        if strategy_path is not None:
+            self.strategy_path = strategy_path
+
+    def _read_strategy(self) -> str:
+        """Return the strategy source, re-reading only when its mtime changes."""
+        mtime = os.path.getmtime(self.strategy_path)
+        hit = self._code_cache.get(self.strategy_path)
+        if hit and hit[0] == mtime:
+            return hit[1]
+        with open(self.strategy_path, "r", encoding="utf-8") as f:
+            code = f.read()
+        self._code_cache[self.strategy_path] = (mtime, code)
+        return code
 
     def suggest_improvement(self) -> str:
         """
@@ -45,13 +72,12 @@ class ImproveAgent:
         Returns:
             str: The LLM's suggested improvement, typically a patch string.
         """
-        self.logger.info(f"Analyzing backtest results for {self.strategy_path}...")
-        with open(self.strategy_path, "r", encoding="utf-8") as f:
-            code = f.read()
+        self.logger.info("Analyzing backtest results for %s...", self.strategy_path)
         # Respect offline mode to avoid noisy non-diff outputs
         if self.offline_mode:
             self.logger.info("LLM is in offline mode; skipping suggestion.")
             return ""
+        code = self._read_strategy()
         system = (
             "ROLE: Trading Strategy Optimizer. "
             "You improve a single Freqtrade IStrategy file based on a backtest log. "
@@ -73,11 +99,15 @@ class ImproveAgent:
             f"{code}"
         )
         suggestion = self.llm.chat(system, user, temperature=0.2)
-        self.logger.info(f"LLM Suggestion:\n{suggestion}")
+        self.logger.info("LLM Suggestion:\n%s", suggestion)
         return suggestion
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[ImproveAgent] %(asctime)s %(levelname)s: %(message)s",
+    )
     import sys
 
     if len(sys.argv) < 3:
@@ -1,29 +1,34 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import logging
 import os
+import queue
 import re
 import subprocess
+import threading
 import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
-# Import MCPMemoryClient with fallback
-try:
-    from ..utils.mcp_memory_client import MCPMemoryClient
-except ImportError:
-    print("[WARN] MCP Memory Client not available - using fallback")
-    class MCPMemoryClient:
-        def get(self, key): return []
-        def put(self, key, value): return True
+# Import MCPMemoryClient for persistent memory
+from agents.mcp_memory_client import MCPMemoryClient
 
 DEFAULT_MODEL = os.getenv("AGENT_MODEL", "meta-llama-3.1-8b-instruct")
 OPENAI_BASE = os.getenv("OPENAI_API_BASE", "http://192.168.0.17:1228/v1").rstrip("/")
 OPENAI_KEY = os.getenv("OPENAI_API_KEY", "lm-studio")
 
+# Keep-alive session reused by every loop iteration's LLM call
+_SESSION = requests.Session()
+_SESSION.headers.update({"Authorization": f"Bearer {OPENAI_KEY}"})
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 STRATEGY_NAME = "SimpleAlwaysBuySell"
 STRATEGY_DIR = Path("strategies")
 STRATEGY_FILE = STRATEGY_DIR / f"{STRATEGY_NAME}.py"
@@ -163,6 +168,9 @@ DEFAULT_PROMPT = (
     "Generate trading parameters now:"
 )
 
+# Digest of the baseline source, used to skip rewriting an identical file
+_BASELINE_HASH = hashlib.blake2b(BASELINE_STRATEGY.encode("utf-8")).digest()
+
 def _detect_freqtrade() -> str:
     venv_ft = Path(".venv/bin/freqtrade")
     if venv_ft.exists():
@@ -171,10 +179,6 @@ def _detect_freqtrade() -> str:
 
 def _llm_chat_json(prompt: str) -> Dict[str, float]:
     url = f"{OPENAI_BASE}/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {OPENAI_KEY}",
-        "Content-Type": "application/json",
-    }
     system_prompt = "You are a JSON API. Follow instructions exactly and respond only with valid JSON."
     payload: dict[str, object] = {
         "model": DEFAULT_MODEL,
@@ -192,7 +196,7 @@ def _llm_chat_json(prompt: str) -> Dict[str, float]:
         f.write(json.dumps(payload, ensure_ascii=False) + "\n")
     
     try:
-        resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=120)
+        resp = _SESSION.post(url, json=payload, timeout=120)
         resp.raise_for_status()
         content: str = resp.json()["choices"][0]["message"]["content"]
         
@@ -225,7 +229,11 @@ def _ensure_strategy_exists() -> None:
     if not init_py.exists():
         init_py.write_text("", encoding="utf-8")
     
-    # Always regenerate the strategy with latest baseline
+    # Always start from the latest baseline, but leave an identical file
+    # untouched so freqtrade's bytecode cache stays valid
+    if STRATEGY_FILE.exists() and hashlib.blake2b(STRATEGY_FILE.read_bytes()).digest() == _BASELINE_HASH:
+        print(f"[STRATEGY] Baseline strategy already up to date: {STRATEGY_FILE}")
+        return
     print(f"[STRATEGY] Creating guaranteed-to-trade strategy: {STRATEGY_FILE}")
     STRATEGY_FILE.write_text(BASELINE_STRATEGY, encoding="utf-8")
 
@@ -336,6 +344,17 @@ def _backtest(freqtrade_bin: str, config: str, strategy: str, timeframe: str, ti
         print(exc.stderr[-800:])
         return False
 
+def _mcp_writer(mcp: MCPMemoryClient, writes: "queue.Queue[tuple[str, Any]]") -> None:
+    """Apply queued (key, value) memory writes in order, off the loop's critical path."""
+    while True:
+        key, value = writes.get()
+        try:
+            mcp.put(key, value)
+        except Exception as exc:
+            print(f"[WARN] Memory write for {key} failed: {exc}")
+        finally:
+            writes.task_done()
+
 def main(argv: Optional[list[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="self loop agent with smart data management")
     parser.add_argument("--config", default="user_data/config.json")
@@ -388,6 +407,10 @@ def main(argv: Optional[list[str]] = None) -> int:
         
         print(f"[MEMORY] Loaded {len(short_term_memory)} short-term and {len(long_term_memory)} long-term memories")
         print(f"[MEMORY] Loaded {len(backtest_history)} backtest results")
+
+        # Persist memory from a background thread so the loop never waits on it
+        mcp_writes: "queue.Queue[tuple[str, Any]]" = queue.Queue()
+        threading.Thread(target=_mcp_writer, args=(mcp, mcp_writes), daemon=True).start()
     else:
         print("[INFO] Memory features disabled - using session-only memory")
         mcp = None
@@ -438,14 +461,15 @@ def main(argv: Optional[list[str]] = None) -> int:
         backtest_history.append(loop_result)
         
         # Update persistent memory if enabled
+        # Lists are copied so later appends don't race the writer thread
         if mcp:
-            mcp.put("short_term_memory", short_term_memory)
-            mcp.put("backtest_history", backtest_history)
+            mcp_writes.put_nowait(("short_term_memory", list(short_term_memory)))
+            mcp_writes.put_nowait(("backtest_history", list(backtest_history)))
             
             # Add to long-term memory if successful
             if ok:
                 long_term_memory.append(f"Successful config: roi={m0:.3f}, stoploss={sl:.2f}")
-                mcp.put("long_term_memory", long_term_memory)
+                mcp_writes.put_nowait(("long_term_memory", list(long_term_memory)))
         
         if not ok:
             print("[WARN] Backtest failed; continuing.")
@@ -456,6 +480,7 @@ def main(argv: Optional[list[str]] = None) -> int:
     
     print(f"\n[SUMMARY] Completed {args.max_loops} loops with memory {'enabled' if not args.disable_memory else 'disabled'}")
     if mcp:
+        mcp_writes.join()
         final_memories = len(mcp.get("short_term_memory") or [])
         final_history = len(mcp.get("backtest_history") or [])
         print(f"[MEMORY] Final state: {final_memories} memories, {final_history} backtest records")
@@ -463,4 +488,5 @@ def main(argv: Optional[list[str]] = None) -> int:
     return 0
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     raise SystemExit(main())
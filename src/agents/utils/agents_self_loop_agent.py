@@ -6,11 +6,17 @@ import json
 import os
 import re
 import subprocess
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, TypedDict, cast
+from typing import Any, Deque, Dict, List, Literal, NotRequired, Optional, Tuple, TypedDict, cast
 
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Environment knobs read by the agent.
 # Defaults align with a local LM Studio server.
@@ -18,6 +24,34 @@ DEFAULT_MODEL: str = os.getenv("AGENT_MODEL", "meta-llama-3.1-8b-instruct")
 OPENAI_BASE: str = os.getenv("OPENAI_API_BASE", "http://127.0.0.1:1234/v1").rstrip("/")
 OPENAI_KEY: str = os.getenv("OPENAI_API_KEY", "lm-studio")
 
+# Per-request timeouts in seconds. The read timeout bounds the gap
+# between bytes; it stays generous for a local model working through
+# a long prompt, and main() lets --llm-timeout lower it.
+LLM_CONNECT_TIMEOUT: float = 3.0
+LLM_TIMEOUT: float = float(os.getenv("AGENT_LLM_TIMEOUT", "120"))
+
+# Dropped connections, timeouts and 429/5xx responses are retried
+# twice, immediately and then after 2s (urllib3's backoff skips the
+# first retry), before llm_tweak falls back to defaults.
+_RETRY: Retry = Retry(
+    total=2,
+    backoff_factor=1.0,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=None,
+    raise_on_status=False,
+)
+
+# Keep-alive session reused by every loop iteration's LLM call, so
+# repeated calls skip the TCP (and TLS) handshake.
+_SESSION: requests.Session = requests.Session()
+_SESSION.headers.update({"Authorization": f"Bearer {OPENAI_KEY}"})
+_SESSION.mount(
+    "http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_RETRY)
+)
+_SESSION.mount(
+    "https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_RETRY)
+)
+
 # Filenames/paths used across the loop to avoid duplicating literals.
 STRATEGY_NAME: str = "SimpleAlwaysBuySell"
 STRATEGY_DIR: Path = Path("strategies")
@@ -25,6 +59,32 @@ STRATEGY_FILE: Path = STRATEGY_DIR / f"{STRATEGY_NAME}.py"
 RESULTS_DIR: Path = Path("user_data/backtest_results")
 LOG_FILE: Path = Path("user_data/learning_log.csv")
 MEM_FILE: Path = Path("user_data/agent_memory.json")
+# Ask for OpenAI-style JSON mode until the server rejects it.
+_JSON_MODE: bool = True
+
+# Shared decoder for pulling JSON out of free-form model output.
+_JSON_DECODER: json.JSONDecoder = json.JSONDecoder()
+
+# ((mtime_ns, size, inode), parsed memory) from the last load_memory/save_memory
+# call. Saves replace the file, so the inode changes even within one mtime tick;
+# an external in-place edit of equal size within one tick would still be missed.
+_MEM_CACHE: Optional[Tuple[Tuple[int, int, int], Dict[str, float]]] = None
+# The prefetch thread loads memory while the main thread saves it
+_MEM_LOCK = threading.Lock()
+# pandas CSV parser for trade exports; pyarrow is optional.
+CSV_ENGINE: Literal["pyarrow", "c"]
+try:
+    import pyarrow  # noqa: F401
+
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+# Lines of backtest output echoed after each run.
+BACKTEST_TAIL_LINES: int = 50
+# freqtrade's stderr for the latest backtest.
+BACKTEST_STDERR_LOG: Path = Path("user_data/backtest_stderr.log")
+# Candle data younger than this (seconds) is reused without re-downloading.
+DATA_MAX_AGE: float = 3600
 
 # A minimal, valid Freqtrade strategy we can mutate.
 # Guarantees buy/sell so backtests run.
@@ -48,6 +108,9 @@ BASELINE_STRATEGY: str = (
     '        dataframe["sell"] = 1\n'
     "        return dataframe\n"
 )
+# Narrow patterns for the two assignments mutate_strategy rewrites
+MINIMAL_ROI_RE = re.compile(r"minimal_roi\s*=\s*\{[^}]*\}", re.S)
+STOPLOSS_RE = re.compile(r"stoploss\s*=\s*[-]?\d+\.\d+")
 
 # Prompt guiding the model to propose tiny numeric tweaks we can
 # safely apply.
@@ -75,6 +138,8 @@ class ChatCompletionPayload(TypedDict):
     temperature: float
     top_p: float
     max_tokens: int
+    stream: bool
+    response_format: NotRequired[Dict[str, str]]
 
 
 class ChoiceMessage(TypedDict):
@@ -107,31 +172,50 @@ def load_memory() -> Dict[str, float]:
     """Load the agent's memory (best params/score so far).
 
     A missing or corrupt file yields an empty dict, treated as
-    "no prior".
+    "no prior". The parsed dict is cached until the file is replaced
+    or modified; callers get a copy they may mutate.
     """
-    if MEM_FILE.exists():
+    global _MEM_CACHE
+    with _MEM_LOCK:
+        try:
+            st = MEM_FILE.stat()
+        except FileNotFoundError:
+            return {}
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if _MEM_CACHE is not None and _MEM_CACHE[0] == key:
+            return dict(_MEM_CACHE[1])
         try:
             text = MEM_FILE.read_text(encoding="utf-8")
             data = json.loads(text)
-            # Coerce to Dict[str, float] where possible.
-            out: Dict[str, float] = {}
-            for k, v in cast(Dict[str, Any], data).items():
-                try:
-                    # best_* fields are numeric
-                    out[k] = float(v)
-                except (TypeError, ValueError):
-                    # ignore non-numeric noise if present
-                    continue
-            return out
-        except json.JSONDecodeError:
+        except (FileNotFoundError, json.JSONDecodeError):
             return {}
-    return {}
+        # Coerce to Dict[str, float] where possible.
+        out: Dict[str, float] = {}
+        for k, v in cast(Dict[str, Any], data).items():
+            try:
+                # best_* fields are numeric
+                out[k] = float(v)
+            except (TypeError, ValueError):
+                # ignore non-numeric noise if present
+                continue
+        _MEM_CACHE = (key, out)
+        return dict(out)
 
 
 def save_memory(mem: Dict[str, float]) -> None:
-    """Persist memory so the next loop can nudge changes toward what worked."""
+    """Persist memory so the next loop can nudge changes toward what worked.
+
+    The JSON goes to a sibling temp file that is renamed over the memory
+    file, so a concurrent reader never sees a truncated file.
+    """
     MEM_FILE.parent.mkdir(parents=True, exist_ok=True)
-    MEM_FILE.write_text(json.dumps(mem, indent=2), encoding="utf-8")
+    global _MEM_CACHE
+    with _MEM_LOCK:
+        tmp = MEM_FILE.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(mem, indent=2), encoding="utf-8")
+        os.replace(tmp, MEM_FILE)
+        st = MEM_FILE.stat()
+        _MEM_CACHE = ((st.st_mtime_ns, st.st_size, st.st_ino), dict(mem))
 
 
 def prompt_with_memory() -> str:
@@ -148,6 +232,59 @@ def prompt_with_memory() -> str:
     return BASE_PROMPT + tail
 
 
+def read_streamed_content(resp: requests.Response) -> str:
+    """Accumulate streamed (SSE) delta content, stopping once the first JSON value closes.
+
+    The model only needs to emit a small JSON value, so the connection is
+    released as soon as its braces/brackets balance instead of waiting for
+    the model's natural stop.
+    """
+    parts: list[str] = []
+    depth = 0
+    started = False
+    for raw in resp.iter_lines():
+        line = raw.decode("utf-8", errors="replace")
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content") or ""
+        except (json.JSONDecodeError, KeyError, IndexError, TypeError):
+            continue
+        parts.append(delta)
+        for ch in delta:
+            if ch in "{[":
+                depth += 1
+                started = True
+            elif ch in "}]" and started:
+                depth -= 1
+        if started and depth <= 0:
+            break
+    return "".join(parts)
+
+
+def first_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Return the first complete JSON object embedded in ``text``.
+
+    Each "{" is tried in turn with JSONDecoder.raw_decode, which
+    balances nested braces and skips braces inside strings (a lazy
+    regex match would stop at the first closing brace).
+    """
+    start = text.find("{")
+    while start != -1:
+        try:
+            value = _JSON_DECODER.raw_decode(text, start)[0]
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)
+            continue
+        if isinstance(value, dict):
+            return cast(Dict[str, Any], value)
+        start = text.find("{", start + 1)
+    return None
+
+
 def llm_tweak() -> Dict[str, float]:
     """Ask the model for small numeric tweaks and sanitize the response.
 
@@ -155,11 +292,8 @@ def llm_tweak() -> Dict[str, float]:
     clamp values to sensible/safe ranges so accidental wild outputs
     won't break backtests.
     """
+    global _JSON_MODE
     url: str = f"{OPENAI_BASE}/chat/completions"
-    headers: Dict[str, str] = {
-        "Authorization": f"Bearer {OPENAI_KEY}",
-        "Content-Type": "application/json",
-    }
     payload: ChatCompletionPayload = {
         "model": DEFAULT_MODEL,
         "messages": [
@@ -170,30 +304,49 @@ def llm_tweak() -> Dict[str, float]:
         ],
         "temperature": 0.6,
         "top_p": 0.95,
-        "max_tokens": 128,
+        "max_tokens": 48,
+        "stream": True,
     }
+    if _JSON_MODE:
+        # JSON mode constrains decoding to one object (~25 tokens), so a
+        # small budget suffices and no prose has to be skipped.
+        payload["response_format"] = {"type": "json_object"}
     try:
-        resp = requests.post(
-            url, headers=headers, data=json.dumps(payload), timeout=120
-        )
-        resp.raise_for_status()
-        resp_json: ChatCompletionResponse = cast(ChatCompletionResponse, resp.json())
-        content: str = resp_json["choices"][0]["message"]["content"]
+        with _SESSION.post(
+            url,
+            json=payload,
+            timeout=(LLM_CONNECT_TIMEOUT, LLM_TIMEOUT),
+            stream=True,
+        ) as resp:
+            if resp.status_code == 400 and _JSON_MODE:
+                # The server rejected response_format; retry without it
+                # and stop asking for JSON mode.
+                _JSON_MODE = False
+                resp.close()  # free the connection before retrying
+                return llm_tweak()
+            resp.raise_for_status()
+            # Servers that ignore "stream" answer with a plain JSON body.
+            if resp.headers.get("Content-Type", "").startswith("text/event-stream"):
+                content: str = read_streamed_content(resp)
+            else:
+                resp_json: ChatCompletionResponse = cast(
+                    ChatCompletionResponse, resp.json()
+                )
+                content = resp_json["choices"][0]["message"]["content"]
     except requests.RequestException:
         return {"minimal_roi_0": 0.012, "stoploss": -0.11}
     except (KeyError, IndexError, TypeError):
         return {"minimal_roi_0": 0.012, "stoploss": -0.11}
 
-    # Grab the first JSON-looking block in the output.
-    match = re.search(r"\{.*?\}", content, re.S)
-    if not match:
+    # Grab the first complete JSON object in the output.
+    data = first_json_object(content)
+    if data is None:
         return {"minimal_roi_0": 0.012, "stoploss": -0.11}
 
     try:
-        data = json.loads(match.group(0))
-        m0 = float(cast(Dict[str, Any], data).get("minimal_roi_0", 0.012))
-        sl = float(cast(Dict[str, Any], data).get("stoploss", -0.11))
-    except (json.JSONDecodeError, TypeError, ValueError):
+        m0 = float(data.get("minimal_roi_0", 0.012))
+        sl = float(data.get("stoploss", -0.11))
+    except (TypeError, ValueError):
         return {"minimal_roi_0": 0.012, "stoploss": -0.11}
 
     # Clamp to guardrails so we only try small, plausible changes.
@@ -220,21 +373,34 @@ def mutate_strategy(min_roi_0: float, stoploss: float) -> None:
     """Patch minimal_roi and stoploss in-place using narrow regexes.
 
     The patterns are intentionally strict to avoid touching unrelated
-    code.
+    code. The text goes to a sibling temp file that is then renamed
+    over the strategy, so freqtrade never sees a partial write.
     """
     txt = STRATEGY_FILE.read_text(encoding="utf-8")
-    txt = re.sub(
-        r"minimal_roi\s*=\s*\{[^}]*\}",
-        f'minimal_roi = {{"0": {min_roi_0:.3f}}}',
-        txt,
-        flags=re.S,
-    )
-    txt = re.sub(
-        r"stoploss\s*=\s*[-]?\d+\.\d+",
-        f"stoploss = {stoploss:.2f}",
-        txt,
-    )
-    STRATEGY_FILE.write_text(txt, encoding="utf-8")
+    txt = MINIMAL_ROI_RE.sub(f'minimal_roi = {{"0": {min_roi_0:.3f}}}', txt)
+    txt = STOPLOSS_RE.sub(f"stoploss = {stoploss:.2f}", txt)
+    tmp = STRATEGY_FILE.with_suffix(".py.tmp")
+    tmp.write_text(txt, encoding="utf-8")
+    os.replace(tmp, STRATEGY_FILE)
+
+
+def data_fresh(config: str, timeframe: str, max_age: float = DATA_MAX_AGE) -> bool:
+    """Return True if candle files for ``timeframe`` are recent enough.
+
+    The data directory is derived from the config's ``datadir`` or
+    ``exchange.name``; a missing or unreadable config counts as stale.
+    """
+    try:
+        with open(config, encoding="utf-8") as fh:
+            cfg: Dict[str, Any] = json.load(fh)
+    except (OSError, ValueError):
+        return False
+    exchange = cfg.get("exchange", {}).get("name")
+    if not exchange:
+        return False
+    datadir = Path(cfg.get("datadir") or Path("user_data/data") / exchange)
+    mtimes = [p.stat().st_mtime for p in datadir.glob(f"*-{timeframe}*.feather")]
+    return bool(mtimes) and max(mtimes) > time.time() - max_age
 
 
 def ensure_data(freqtrade_bin: str, config: str, timeframe: str) -> None:
@@ -278,61 +444,54 @@ def backtest(
         "none",
     ]
     print("[BT]", " ".join(cmd))
-    try:
-        proc = subprocess.run(
-            cmd,
-            check=True,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-        )
-        # Print end of report for quick feedback without scrolling.
-        print(proc.stdout[-1500:])
-    except subprocess.CalledProcessError as exc:
-        # On failure, show tails to aid debugging, then continue.
-        print(exc.stdout[-1200:])
-        print(exc.stderr[-800:])
+    # Stream stdout and keep only a short tail rather than buffering the
+    # whole report. freqtrade's logging and progress bars on stderr go
+    # straight to a file and are only read back on failure.
+    tail: Deque[str] = deque(maxlen=BACKTEST_TAIL_LINES)
+    with BACKTEST_STDERR_LOG.open("wb") as err, subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=err,
+        text=True,
+        encoding="utf-8",
+        bufsize=1,
+    ) as proc:
+        for line in proc.stdout:  # type: ignore[union-attr]
+            tail.append(line.rstrip("\n"))
+    # Print end of report for quick feedback without scrolling.
+    print("\n".join(tail))
+    if proc.returncode != 0:
+        # On failure, show the stderr tail to aid debugging, then continue.
+        with BACKTEST_STDERR_LOG.open("rb") as err:
+            err.seek(0, os.SEEK_END)
+            err.seek(max(0, err.tell() - 800))
+            print(err.read().decode("utf-8", errors="replace"))
     return export_path
 
 
 def summarize_trades(csv_path: Path) -> Dict[str, float]:
     """Aggregate the trades CSV into a compact score dict.
 
-    We avoid heavy parsing and just compute totals and a simple win rate.
+    Only the two profit columns are read, and totals and the win rate
+    are computed as vectorized reductions. A missing, empty or
+    malformed CSV scores as zero trades.
     """
-    if not csv_path.exists():
-        return {
-            "trades": 0.0,
-            "profit_abs_sum": 0.0,
-            "profit_ratio_sum": 0.0,
-            "win_rate": 0.0,
-        }
-
-    wins = 0
-    total = 0
-    profit_abs_sum = 0.0
-    profit_ratio_sum = 0.0
-
-    with csv_path.open("r", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            total += 1
-            try:
-                pr = float(row.get("profit_ratio", 0.0))
-                pa = float(row.get("profit_abs", 0.0))
-            except (TypeError, ValueError):
-                pr, pa = 0.0, 0.0
-            profit_ratio_sum += pr
-            profit_abs_sum += pa
-            if pr > 0:
-                wins += 1
+    try:
+        df = pd.read_csv(
+            csv_path, usecols=["profit_ratio", "profit_abs"], engine=CSV_ENGINE
+        )
+    except (OSError, ValueError):
+        df = pd.DataFrame(columns=["profit_ratio", "profit_abs"])
 
-    win_rate = (wins / total) * 100.0 if total else 0.0
+    # Unparseable cells count as zero, as a trade with no profit.
+    pr = pd.to_numeric(df["profit_ratio"], errors="coerce").fillna(0.0)
+    pa = pd.to_numeric(df["profit_abs"], errors="coerce").fillna(0.0)
+    total = len(df)
     return {
         "trades": float(total),
-        "profit_abs_sum": profit_abs_sum,
-        "profit_ratio_sum": profit_ratio_sum,
-        "win_rate": win_rate,
+        "profit_abs_sum": float(pa.sum()),
+        "profit_ratio_sum": float(pr.sum()),
+        "win_rate": float((pr > 0).mean() * 100.0) if total else 0.0,
     }
 
 
@@ -404,24 +563,45 @@ def main(argv: Optional[List[str]] = None) -> int:
 
     It ensures data/strategy exist, queries the model for tweaks,
     backtests, logs results, and saves a memory to bias the next
-    iteration.
+    iteration. With --prefetch (opt-in) the next tweak is requested
+    while the current backtest runs, so its prompt sees the memory as
+    of the previous loop.
     """
+    global LLM_TIMEOUT
     parser = argparse.ArgumentParser(description="self loop agent")
     parser.add_argument("--config", default="user_data/config.json")
     parser.add_argument("--max-loops", type=int, default=1)
     parser.add_argument("--timeframe", default="1h")
     parser.add_argument("--timerange", default="20240601-20240901")
+    parser.add_argument(
+        "--prefetch",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Overlap the next LLM call with the current backtest (its prompt then lags one loop).",
+    )
+    parser.add_argument(
+        "--llm-timeout",
+        type=float,
+        default=LLM_TIMEOUT,
+        help="Read timeout in seconds for each LLM request.",
+    )
     args = parser.parse_args(argv)
+    LLM_TIMEOUT = args.llm_timeout
 
     freqtrade_bin = detect_freqtrade()
     ensure_strategy()
-    ensure_data(freqtrade_bin, args.config, args.timeframe)
+    if not data_fresh(args.config, args.timeframe):
+        ensure_data(freqtrade_bin, args.config, args.timeframe)
+
+    executor = ThreadPoolExecutor(max_workers=1) if args.prefetch else None
+    pending: Optional[Future[Dict[str, float]]] = None
 
     for i in range(1, args.max_loops + 1):
         print(f"\n=== LOOP {i}/{args.max_loops} ===")
 
         # Model proposes small parameter changes
-        tweak = llm_tweak()
+        tweak = pending.result() if pending is not None else llm_tweak()
+        pending = None
         m0 = float(tweak.get("minimal_roi_0", 0.012))
         sl = float(tweak.get("stoploss", -0.11))
         print(f"[LLM] Proposed minimal_roi[0]={m0:.3f}, stoploss={sl:.2f}")
@@ -429,6 +609,10 @@ def main(argv: Optional[List[str]] = None) -> int:
         # Apply changes to the strategy source file
         mutate_strategy(m0, sl)
 
+        # Network-bound LLM call runs while freqtrade is busy
+        if executor is not None and i < args.max_loops:
+            pending = executor.submit(llm_tweak)
+
         csv_path = backtest(
             freqtrade_bin,
             args.config,
@@ -442,9 +626,9 @@ def main(argv: Optional[List[str]] = None) -> int:
         append_log(i, m0, sl, metrics)
         # Keep best params so far
         maybe_update_memory(m0, sl, metrics)
-        # Small pause so logs/files feel ordered
-        time.sleep(1)
 
+    if executor is not None:
+        executor.shutdown()
     return 0
 
 
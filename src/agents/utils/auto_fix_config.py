@@ -1,3 +1,4 @@
+import re
 from typing import Dict, List, Any
 
 MODEL_CONFIG: Dict[str, List[dict[str, Any]]] = {
@@ -59,13 +60,33 @@ PROMPT_TEMPLATES = {
     ),
 }
 
-VALIDATION_RULES: dict[str, Any] = {
-    "patch_format": r"^(---|\+\+\+|@@|[-+]|\\|\ ).*$",
-    "python_syntax": r"^(def|class|import|from|if|for|while|try|except|async|await)",
-    "banned_patterns": [
+# Compiled once at import so validation never depends on re's internal cache
+PATCH_FORMAT_RE = re.compile(r"^(---|\+\+\+|@@|[-+]|\\|\ ).*$")
+PYTHON_SYNTAX_RE = re.compile(r"^(def|class|import|from|if|for|while|try|except|async|await)")
+BANNED_PATTERN_RES = tuple(
+    re.compile(p)
+    for p in (
         r"print\(",
         r"import ipdb",
         r"import pdb",
         r"breakpoint\(\)"
-    ]
+    )
+)
+
+# All banned patterns as one alternation, anchored to lines a patch adds
+# ("+" but not the "+++" file header), so a single search scans a whole patch.
+BANNED_COMBINED_RE = re.compile(
+    r"^\+(?!\+\+).*?(?:" + "|".join(f"(?:{r.pattern})" for r in BANNED_PATTERN_RES) + ")",
+    re.MULTILINE,
+)
+
+VALIDATION_RULES: dict[str, Any] = {
+    "patch_format": PATCH_FORMAT_RE,
+    "python_syntax": PYTHON_SYNTAX_RE,
+    "banned_patterns": list(BANNED_PATTERN_RES)
 }
+
+
+def is_clean_patch(text: str) -> bool:
+    """Return True if no line added by ``text`` matches a banned pattern."""
+    return BANNED_COMBINED_RE.search(text) is None
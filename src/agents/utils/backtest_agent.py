@@ -3,10 +3,39 @@
 Auto-generated docstring for flake8 friendliness.
 """
 
+import json
 import logging
 import os
+import shutil
 import subprocess
-from typing import Optional
+from collections import deque
+from typing import Any, Optional
+
+# Lines of backtest output kept for the return value; covers the summary tables.
+BACKTEST_TAIL_LINES = 2000
+RESULTS_DIR = "user_data/backtest_results"
+
+
+def _latest_trades_file(results_dir: str = RESULTS_DIR) -> Optional[str]:
+    """Return the most recently modified ``*trades.csv`` in results_dir, or None.
+
+    Uses a single ``os.scandir`` pass so each entry is stat'ed at most once.
+    """
+    latest: Optional[str] = None
+    latest_mtime = -1.0
+    try:
+        with os.scandir(results_dir) as it:
+            for entry in it:
+                if entry.name.startswith(".") or not entry.name.endswith("trades.csv"):
+                    continue
+                if not entry.is_file():
+                    continue
+                mtime = entry.stat().st_mtime
+                if mtime > latest_mtime:
+                    latest_mtime, latest = mtime, entry.path
+    except FileNotFoundError:
+        return None
+    return latest
 
 
 class BacktestAgent:
@@ -18,6 +47,9 @@ class BacktestAgent:
     including machine learning logging.
     """
 
+    # Parsed Freqtrade configs keyed by path, stored as (mtime, config).
+    _cfg_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+
     def __init__(self, strategy_path: Optional[str] = None):
         """
         Initializes the BacktestAgent.
@@ -29,17 +61,25 @@ class BacktestAgent:
         """
         self.strategy_path = strategy_path
         self.logger = logging.getLogger("BacktestAgent")
-        logging.basicConfig(
-            level=logging.INFO,
-            format="[BacktestAgent] %(asctime)s %(levelname)s: %(message)s",
-        )
+
+    @classmethod
+    def _load_config(cls, config: str) -> dict[str, Any]:
+        """Return the parsed config, re-reading it only when its mtime changes."""
+        mtime = os.path.getmtime(config)
+        cached = cls._cfg_cache.get(config)
+        if cached is None or cached[0] != mtime:
+            with open(config, "r", encoding="utf-8") as f:
+                cached = (mtime, json.load(f))
+            cls._cfg_cache[config] = cached
+        return cached[1]
 
     def run_backtest(self, config_path: Optional[str] = None) -> str:
         """
         Executes a Freqtrade backtest for the specified strategy.
 
         This method sets up the necessary environment variables for the backtest,
-        runs the `run_backtest.sh` script, and captures its output. It also ensures
+        runs the `run_backtest.sh` script, and streams its output to the logger
+        line by line, keeping only a bounded tail in memory. It also ensures
         that the generated `trades.csv` file is copied to a standardized location
         for ML logging purposes.
 
@@ -49,7 +89,8 @@ class BacktestAgent:
                 `FT_CONFIG_PATH` environment variable.
 
         Returns:
-            str: The complete standard output from the backtest process.
+            str: The last `BACKTEST_TAIL_LINES` lines of backtest output
+                (stdout and stderr combined).
 
         Raises:
             Exception: If there are issues during the backtest execution or file operations.
@@ -63,12 +104,8 @@ class BacktestAgent:
             raise ValueError("strategy_path must be set before running backtest.")
         strat = os.path.splitext(os.path.basename(self.strategy_path))[0]
         # Try to extract timeframe from config file
-        import json
-
         try:
-            with open(config, "r", encoding="utf-8") as f:
-                cfg = json.load(f)
-            timeframe = cfg.get("timeframe", "15m")
+            timeframe = self._load_config(config).get("timeframe", "15m")
         except Exception:
             timeframe = "15m"
         env = os.environ.copy()
@@ -79,30 +116,43 @@ class BacktestAgent:
             f"Backtest env: CONFIG={config}, STRAT={strat}, " f"TIMEFRAME={timeframe}"
         )
         cmd = ["bash", "scripts/run_backtest.sh"]
-        result = subprocess.run(cmd, capture_output=True, text=True, env=env)
-        self.logger.info(f"Backtest output:\n{result.stdout}")
+        tail: deque[str] = deque(maxlen=BACKTEST_TAIL_LINES)
+        with subprocess.Popen(
+            cmd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        ) as proc:
+            for line in proc.stdout:  # type: ignore[union-attr]
+                self.logger.info(line.rstrip())
+                tail.append(line)
+            proc.wait()
+        output = "".join(tail)
 
         # --- Ensure trades export is always copied for ML logging ---
-        import glob
-        import shutil
-
-        trades_files = glob.glob("user_data/backtest_results/*trades.csv")
-        # Find the most recent trades file
-        if trades_files:
-            latest_trades = max(trades_files, key=os.path.getmtime)
-            dest = f"user_data/backtest_results/{strat}_trades.csv"
+        latest_trades = _latest_trades_file()
+        dest = f"{RESULTS_DIR}/{strat}_trades.csv"
+        if not latest_trades:
+            self.logger.warning("No trades.csv file found after backtest.")
+        elif os.path.abspath(latest_trades) == os.path.abspath(dest):
+            self.logger.info(f"{dest} is already the latest trades file.")
+        else:
             try:
                 shutil.copy2(latest_trades, dest)
                 self.logger.info(f"Copied {latest_trades} to {dest} for ML logging.")
             except Exception as e:
                 self.logger.warning(f"Could not copy trades file for ML logging: {e}")
-        else:
-            self.logger.warning("No trades.csv file found after backtest.")
 
-        return result.stdout
+        return output
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[BacktestAgent] %(asctime)s %(levelname)s: %(message)s",
+    )
     import sys
 
     strategy = sys.argv[1] if len(sys.argv) > 1 else None
@@ -4,34 +4,41 @@ from __future__ import annotations
 
 import argparse
 import json
+import logging
 import time
 from pathlib import Path
 
 from agents.backtest_agent import BacktestAgent
 
 
+def _run_one(root: Path, strategy: str) -> dict:
+    """Backtest one strategy and record its log and timing under ``root``."""
+    out = root / strategy
+    out.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    log = BacktestAgent(strategy).run_backtest()
+    elapsed = round(time.perf_counter() - start, 2)
+    (out / "backtest.log").write_text(log)
+    (out / "meta.json").write_text(
+        json.dumps({"strategy": strategy, "elapsed_sec": elapsed}, indent=2)
+    )
+    return {"strategy": strategy, "elapsed_sec": elapsed, "path": str(out)}
+
+
 def run_battle(strategies: list[str]) -> Path:
     ts = time.strftime("%Y%m%d-%H%M%S")
     root = Path("runs") / f"battle-{ts}"
     root.mkdir(parents=True, exist_ok=True)
-    leaderboard = []
-    for s in strategies:
-        out = BacktestAgent(s).run()
-        # naive parse of meta for elapsed; results existence is enough
-        meta = json.loads((out / "meta.json").read_text())
-        leaderboard.append(
-            {
-                "strategy": s,
-                "elapsed_sec": meta.get("elapsed_sec", None),
-                "path": str(out),
-            }
-        )
+    # One at a time: every backtest exports into user_data/backtest_results and
+    # run_backtest copies whichever trades file is newest there.
+    leaderboard = [_run_one(root, s) for s in strategies]
     lb_path = root / "leaderboard.json"
     lb_path.write_text(json.dumps(leaderboard, indent=2))
     return lb_path
 
 
 def main():
+    logging.basicConfig(level=logging.INFO)
     ap = argparse.ArgumentParser()
     ap.add_argument(
         "--strategies",
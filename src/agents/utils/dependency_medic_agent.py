@@ -5,37 +5,66 @@ Flake8/black compliant, clean logging, and formatting.
 """
 
 import logging
+import os
 import subprocess
+import sys
+import time
+from pathlib import Path
 
-from services.llm_client import LLMClient, load_cfg
+from agents.base_agent import LLMClientMixin
 
+logger = logging.getLogger("DependencyMedicAgent")
 
-class DependencyMedicAgent:
+# Skip pip's self-update probe and ANSI colouring; we only parse stdout.
+PIP_ENV = {**os.environ, "PIP_DISABLE_PIP_VERSION_CHECK": "1", "PIP_NO_COLOR": "1"}
+
+# `pip list --outdated` hits the index for every package; rerun at most this often.
+OUTDATED_MARKER = Path("user_data/.last_outdated_check")
+OUTDATED_CHECK_INTERVAL = 6 * 3600
+
+
+class DependencyMedicAgent(LLMClientMixin):
     """Agent to check, heal, and update Python dependencies."""
 
     def __init__(self):
-        self.cfg = load_cfg()
-        self.llm = LLMClient(self.cfg)
-        self.logger = logging.getLogger("DependencyMedicAgent")
-        logging.basicConfig(
-            level=logging.INFO,
-            format="[DependencyMedicAgent] %(asctime)s %(levelname)s: %(message)s",
+        self.logger = logger
+
+    @staticmethod
+    def _pip(*args: str) -> subprocess.CompletedProcess:
+        """Run pip for this interpreter, keeping stdout and discarding stderr."""
+        return subprocess.run(
+            [sys.executable, "-m", "pip", *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=PIP_ENV,
+            check=False,
         )
 
     def check_dependencies(self) -> str:
-        """Check for missing or outdated dependencies using pip check."""
+        """Check for broken dependencies using pip check; empty when all is well."""
         self.logger.info("Checking for missing or outdated dependencies...")
-        result = subprocess.run(["pip", "check"], capture_output=True, text=True)
-        return result.stdout.strip()
+        result = self._pip("check")
+        return "" if result.returncode == 0 else result.stdout.strip()
 
     def list_outdated(self) -> str:
         """List outdated dependencies using pip list --outdated."""
         self.logger.info("Listing outdated dependencies...")
-        result = subprocess.run(
-            ["pip", "list", "--outdated"], capture_output=True, text=True
-        )
+        result = self._pip("list", "--outdated")
+        if result.returncode == 0:
+            OUTDATED_MARKER.parent.mkdir(parents=True, exist_ok=True)
+            OUTDATED_MARKER.touch()
         return result.stdout.strip()
 
+    @staticmethod
+    def outdated_check_due() -> bool:
+        """True unless list_outdated ran successfully within OUTDATED_CHECK_INTERVAL."""
+        try:
+            age = time.time() - OUTDATED_MARKER.stat().st_mtime
+        except FileNotFoundError:
+            return True
+        return age >= OUTDATED_CHECK_INTERVAL
+
     def heal_dependencies(self, dep_log: str) -> str:
         """Send dependency issues to LLM for healing suggestions."""
         self.logger.info("Sending dependency issues to LLM for healing...")
@@ -56,6 +85,9 @@ class DependencyMedicAgent:
         if dep_issues:
             self.logger.warning("Dependency issues found. Sending to LLM...")
             self.heal_dependencies(dep_issues)
+        elif not self.outdated_check_due():
+            self.logger.info("No dependency issues; outdated check ran recently, skipping.")
+            return
         outdated = self.list_outdated()
         if outdated and "Package" in outdated:
             self.logger.warning("Outdated dependencies found. Sending to LLM...")
@@ -64,5 +96,9 @@ class DependencyMedicAgent:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[DependencyMedicAgent] %(asctime)s %(levelname)s: %(message)s",
+    )
     agent = DependencyMedicAgent()
     agent.full_heal()
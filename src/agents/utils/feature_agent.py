@@ -5,11 +5,13 @@ import os
 import time
 from pathlib import Path
 
+from agents.base_agent import LLMClientMixin
 from agents.patch_utils import apply_project_patch, sanitize_patch_string
-from services.llm_client import LLMClient, load_cfg
 
+logger = logging.getLogger("FeatureAgent")
 
-class FeatureAgent:
+
+class FeatureAgent(LLMClientMixin):
     """
     Lightweight feature agent that asks the LLM to propose a SMALL unified diff
     to add non-breaking improvements. It sanitizes and applies the diff safely.
@@ -18,27 +20,24 @@ class FeatureAgent:
     def __init__(self, spec: str, max_changes_hint: int = 3):
         self.spec = spec
         self.max_changes_hint = max_changes_hint
-        self.cfg = load_cfg()
-        self.llm = LLMClient(self.cfg)
-        self.logger = logging.getLogger("FeatureAgent")
-        logging.basicConfig(
-            level=logging.INFO,
-            format="[FeatureAgent] %(asctime)s %(levelname)s: %(message)s",
-        )
+        self.logger = logger
 
-    def _read(self, rel: str) -> str:
+    def _read(self, rel: str, limit: int = -1) -> str:
+        """Read ``rel`` as text; with ``limit`` >= 0 only the first ``limit`` bytes."""
         p = Path(rel)
         if not p.exists():
             return f"[MISSING] {rel}\n"
         try:
-            return p.read_text(encoding="utf-8")
+            with p.open("rb") as f:
+                return f.read(limit).decode("utf-8", "replace")
         except Exception as e:
             return f"[UNREADABLE] {rel}: {e}\n"
 
     def propose_and_apply(self) -> str:
         root_files = sorted(os.listdir("."))
-        healing_server = self._read("services/healing_server.py")
-        readme = self._read("README.md")
+        # Only the head of each file fits the prompt; don't read the rest.
+        healing_server = self._read("services/healing_server.py", 6000)
+        readme = self._read("README.md", 4000)
 
         system = (
             "ROLE: Senior Python engineer. Propose a LIGHTWEIGHT improvement as a unified diff. "
@@ -48,17 +47,17 @@ class FeatureAgent:
         user = (
             f"Feature spec (keep it small): {self.spec}\n\n"
             f"Project root files: {', '.join(root_files)}\n\n"
-            f"Context: services/healing_server.py:\n{healing_server[:6000]}\n\n"
-            f"Context: README.md:\n{readme[:4000]}\n"
+            f"Context: services/healing_server.py:\n{healing_server}\n\n"
+            f"Context: README.md:\n{readme}\n"
         )
         suggestion = self.llm.chat(system, user, temperature=0.2, max_tokens=1200)
-        self.logger.info(f"LLM Suggestion (raw)\n{suggestion}")
+        self.logger.info("LLM Suggestion (raw)\n%s", suggestion)
         cleaned = sanitize_patch_string(suggestion)
         # Persist suggestion
         outdir = Path("user_data/feature_runs")
         outdir.mkdir(parents=True, exist_ok=True)
         ts = int(time.time())
-        (outdir / f"feature_{ts}.patch").write_text(cleaned, encoding="utf-8")
+        (outdir / f"feature_{ts}.patch").write_bytes(cleaned.encode("utf-8"))
 
         if cleaned.lstrip().startswith("diff --git"):
             ok = apply_project_patch(cleaned)
@@ -74,6 +73,10 @@ class FeatureAgent:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[FeatureAgent] %(asctime)s %(levelname)s: %(message)s",
+    )
     import argparse
 
     parser = argparse.ArgumentParser(
@@ -6,6 +6,8 @@ import sys
 from agents.backtest_agent import BacktestAgent
 from agents.improve_agent import ImproveAgent
 
+logger = logging.getLogger("LoopOrchestrator")
+
 
 class LoopOrchestrator:
     """Coordinates the full research/trading loop: generate/modify strategy -> backtest -> improve -> repeat."""
@@ -14,27 +16,29 @@ class LoopOrchestrator:
         self.strategy_path = strategy_path
         self.config_path = config_path
         self.max_loops = max_loops
-        self.logger = logging.getLogger("LoopOrchestrator")
-        logging.basicConfig(
-            level=logging.INFO,
-            format="[LoopOrchestrator] %(asctime)s %(levelname)s: %(message)s",
-        )
+        # Built once and reused every loop; the LLM client is created on first use.
+        self.backtester = BacktestAgent(strategy_path)
+        self.improver = ImproveAgent(strategy_path)
+        self.logger = logger
 
     def run(self):
         for i in range(self.max_loops):
-            self.logger.info(f"=== Loop {i + 1}/{self.max_loops} ===")
+            self.logger.info("=== Loop %s/%s ===", i + 1, self.max_loops)
             # 1. Backtest
-            backtest_agent = BacktestAgent(self.strategy_path)
-            backtest_log = backtest_agent.run_backtest(self.config_path)
+            backtest_log = self.backtester.run_backtest(self.config_path)
             # 2. Improve
-            improve_agent = ImproveAgent(self.strategy_path, backtest_log)
-            patch = improve_agent.suggest_improvement()
+            self.improver.set_context(backtest_log)
+            patch = self.improver.suggest_improvement()
             # 3. (Optional) Apply patch automatically if desired
             # ...existing code for patch application could go here...
-            self.logger.info(f"Loop {i + 1} complete.\n")
+            self.logger.info("Loop %s complete.\n", i + 1)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[LoopOrchestrator] %(asctime)s %(levelname)s: %(message)s",
+    )
     if len(sys.argv) < 2:
         print(
             "Usage: python -m agents.loop_orchestrator <strategy_path> [config_path] [max_loops]"
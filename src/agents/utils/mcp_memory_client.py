@@ -1,4 +1,3 @@
-
 """
 Memory MCP Client
 -----------------
@@ -6,14 +5,26 @@ A modular, logged, and documented client for interacting with memory storage.
 Falls back to file-based storage when MCP server is unavailable.
 """
 
+import copy
 import json
 import logging
 import os
-from typing import Any, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # optional: pip install .[performance]
+    orjson = None
+
 logger = logging.getLogger("mcp_memory_client")
-logging.basicConfig(level=logging.INFO)
 
 
 class MCPMemoryClient:
@@ -21,102 +32,192 @@ class MCPMemoryClient:
     Client for interacting with memory storage.
     Uses file-based storage as primary method since MCP memory server
     is designed for different integration patterns.
+
+    The store is read once at construction and kept in memory, so reads are
+    dict lookups; they return copies, so callers cannot change the store by
+    mutating a result. Writes are queued as operations and replayed onto a
+    fresh read of the file under a lock, so several clients sharing one file
+    keep each other's keys. With autoflush=False writes are only queued until
+    an explicit flush(), batching many updates into one write.
     """
 
-    def __init__(self, storage_path: str = "user_data/agent_memory.json"):
+    def __init__(self, storage_path: str = "user_data/agent_memory.json", autoflush: bool = True):
         self.storage_path = Path(storage_path)
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
-        logger.info(f"MCPMemoryClient initialized with storage_path={self.storage_path}")
-        
+        self.autoflush = autoflush
+        self._pending: list[tuple[str, str, Any]] = []  # (op, key, value) not yet on disk
+        self._lock = threading.Lock()
+        logger.info("MCPMemoryClient initialized with storage_path=%s", self.storage_path)
+
+        self._data: dict = self._load_data()
         # Initialize storage file if it doesn't exist
         if not self.storage_path.exists():
-            self._save_data({})
+            self._flush()
+
+    @property
+    def dirty(self) -> bool:
+        """True while queued writes have not reached the file."""
+        return bool(self._pending)
 
     def _load_data(self) -> dict:
         """Load data from storage file."""
         try:
-            with open(self.storage_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Failed to load data: {e}")
+            raw = self.storage_path.read_bytes()
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:  # json.JSONDecodeError / orjson.JSONDecodeError
+            logger.error("Failed to load data: %s", e)
             return {}
 
-    def _save_data(self, data: dict) -> bool:
-        """Save data to storage file."""
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock on a sibling .lock file, held across read-merge-write."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.storage_path.with_suffix(".json.lock"), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _apply(data: dict, op: str, key: str, value: Any) -> None:
+        if op == "put":
+            data[key] = value
+        elif op == "delete":
+            data.pop(key, None)
+        elif op == "append":
+            if key not in data:
+                data[key] = []
+            elif not isinstance(data[key], list):
+                data[key] = [data[key]]  # Convert to list if not already
+            data[key].append(value)
+
+    def _flush(self) -> bool:
+        """Merge queued writes into the current file contents and save them.
+
+        The file is re-read under the lock, so keys written by other clients
+        since this one loaded survive. The result goes to a temp file that is
+        renamed over the old one, so readers never see a half-written file.
+        """
         try:
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with self._file_lock():
+                data = self._load_data()
+                for op in self._pending:
+                    self._apply(data, *op)
+                if orjson is not None:
+                    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                else:
+                    payload = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+                tmp = self.storage_path.with_suffix(".json.tmp")
+                tmp.write_bytes(payload)
+                os.replace(tmp, self.storage_path)
+            self._data = data
+            self._pending.clear()
             return True
         except Exception as e:
-            logger.error(f"Failed to save data: {e}")
+            logger.error("Failed to save data: %s", e)
             return False
 
+    def _change(self, *ops: tuple[str, str, Any]) -> bool:
+        """Apply ``ops`` locally and queue them; write through unless autoflush is off."""
+        with self._lock:
+            for op, key, value in ops:
+                value = copy.deepcopy(value)
+                self._apply(self._data, op, key, value)
+                self._pending.append((op, key, value))
+            return self._flush() if self.autoflush else True
+
+    def flush(self) -> bool:
+        """Write pending changes to disk (a no-op when nothing changed)."""
+        with self._lock:
+            return self._flush() if self._pending else True
+
     def put(self, key: str, value: Any) -> bool:
         """Store a value in memory under the given key."""
         try:
-            data = self._load_data()
-            data[key] = value
-            success = self._save_data(data)
+            success = self._change(("put", key, value))
             if success:
-                logger.info(f"PUT {key}: {value}")
+                logger.info("PUT %s: %s", key, value)
             return success
         except Exception as e:
-            logger.error(f"PUT failed for {key}: {e}")
+            logger.error("PUT failed for %s: %s", key, e)
             return False
 
     def get(self, key: str) -> Optional[Any]:
-        """Retrieve a value from memory by key."""
+        """Retrieve a copy of the value stored under ``key``."""
         try:
-            data = self._load_data()
-            value = data.get(key)
-            logger.info(f"GET {key}: {value}")
+            value = copy.deepcopy(self._data.get(key))
+            logger.info("GET %s: %s", key, value)
             return value
         except Exception as e:
-            logger.error(f"GET failed for {key}: {e}")
+            logger.error("GET failed for %s: %s", key, e)
             return None
 
     def delete(self, key: str) -> bool:
         """Delete a value from memory by key."""
         try:
-            data = self._load_data()
-            if key in data:
-                del data[key]
-                success = self._save_data(data)
+            if key in self._data:
+                success = self._change(("delete", key, None))
                 if success:
-                    logger.info(f"DELETE {key}")
+                    logger.info("DELETE %s", key)
                 return success
             else:
-                logger.info(f"DELETE {key}: key not found")
+                logger.info("DELETE %s: key not found", key)
                 return True  # Consider non-existent key as successful deletion
         except Exception as e:
-            logger.error(f"DELETE failed for {key}: {e}")
+            logger.error("DELETE failed for %s: %s", key, e)
             return False
 
     def append(self, key: str, value: Any) -> bool:
         """Append a value to a list stored under the given key."""
         try:
-            data = self._load_data()
-            if key not in data:
-                data[key] = []
-            elif not isinstance(data[key], list):
-                data[key] = [data[key]]  # Convert to list if not already
-            
-            data[key].append(value)
-            success = self._save_data(data)
+            success = self._change(("append", key, value))
+            if success:
+                logger.info("APPEND %s: %s", key, value)
+            return success
+        except Exception as e:
+            logger.error("APPEND failed for %s: %s", key, e)
+            return False
+
+    def mput(self, items: dict) -> bool:
+        """Store several key-value pairs with a single write."""
+        try:
+            success = self._change(*(("put", key, value) for key, value in items.items()))
+            if success:
+                logger.info("MPUT %s", list(items))
+            return success
+        except Exception as e:
+            logger.error("MPUT failed for %s: %s", list(items), e)
+            return False
+
+    def mget(self, keys: list) -> dict:
+        """Retrieve copies of several values at once; missing keys map to None."""
+        values = {key: copy.deepcopy(self._data.get(key)) for key in keys}
+        logger.info("MGET %s", list(keys))
+        return values
+
+    def mdelete(self, keys: list) -> bool:
+        """Delete several keys with a single write; missing keys are ignored."""
+        try:
+            removed = [key for key in keys if key in self._data]
+            success = self._change(*(("delete", key, None) for key in removed)) if removed else True
             if success:
-                logger.info(f"APPEND {key}: {value}")
+                logger.info("MDELETE %s", list(keys))
             return success
         except Exception as e:
-            logger.error(f"APPEND failed for {key}: {e}")
+            logger.error("MDELETE failed for %s: %s", list(keys), e)
             return False
 
     def get_all_keys(self) -> list:
         """Get all keys in memory."""
         try:
-            data = self._load_data()
-            keys = list(data.keys())
-            logger.info(f"GET_ALL_KEYS: {keys}")
+            keys = list(self._data.keys())
+            logger.info("GET_ALL_KEYS: %s", keys)
             return keys
         except Exception as e:
-            logger.error(f"GET_ALL_KEYS failed: {e}")
+            logger.error("GET_ALL_KEYS failed: %s", e)
             return []
@@ -20,28 +20,27 @@ logger = logging.getLogger("mcp_memory_demo")
 def batch_store_and_retrieve(client: MCPMemoryClient, items: Dict[str, Any]) -> None:
     """
     Store multiple items, retrieve them, and clean up.
+    Each phase is a single batch call (at most one file write) rather than
+    one call per key.
     Args:
         client (MCPMemoryClient): The memory client instance.
         items (Dict[str, Any]): Key-value pairs to store.
     """
-    for key, value in items.items():
-        if client.put(key, value):
-            logger.info(f"Stored {key}: {value}")
-        else:
-            logger.error(f"Failed to store {key}")
+    if client.mput(items):
+        logger.info("Stored %s", list(items))
+    else:
+        logger.error("Failed to store %s", list(items))
 
-    for key in items:
-        value = client.get(key)
+    for key, value in client.mget(list(items)).items():
         if value is not None:
-            logger.info(f"Retrieved {key}: {value}")
+            logger.info("Retrieved %s: %s", key, value)
         else:
-            logger.warning(f"{key} not found in memory MCP")
+            logger.warning("%s not found in memory MCP", key)
 
-    for key in items:
-        if client.delete(key):
-            logger.info(f"Deleted {key}")
-        else:
-            logger.error(f"Failed to delete {key}")
+    if client.mdelete(list(items)):
+        logger.info("Deleted %s", list(items))
+    else:
+        logger.error("Failed to delete %s", list(items))
 
 
 if __name__ == "__main__":
@@ -3,7 +3,6 @@
 import logging
 import subprocess
 import sys
-import time
 
 AGENTS = [
     ("Error Medic", [sys.executable, "-m", "agents.error_medic_agent"]),
@@ -17,6 +16,8 @@ def run_agents():
         format="[Orchestrator] %(asctime)s %(levelname)s: %(message)s",
     )
     logger = logging.getLogger("Orchestrator")
+    # Sequential on purpose: Error Medic edits files and runs ruff while
+    # Dependency Medic pip-installs, so overlapping them races on the environment
     for name, cmd in AGENTS:
         logger.info(f"Running {name} agent...")
         result = subprocess.run(cmd, capture_output=True, text=True)
@@ -25,7 +26,6 @@ def run_agents():
         if result.stderr:
             print(result.stderr)
         logger.info(f"{name} agent finished.")
-        time.sleep(1)
 
 
 def main():
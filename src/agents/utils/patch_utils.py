@@ -1,17 +1,211 @@
 """Module: patch_utils.py — auto-generated docstring for flake8 friendliness."""
 
+import filecmp
 import logging
 import os
+import re
 import shutil
 import subprocess
-import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 logger = logging.getLogger("PatchUtils")
-logging.basicConfig(
-    level=logging.INFO, format="[PatchUtils] %(asctime)s %(levelname)s: %(message)s"
-)
 
 BACKUP_DIR = ".agent_backups"
+FICLONE = 0x40049409  # Linux ioctl: share extents copy-on-write (btrfs, XFS, ...)
+
+# File paths named in ---/+++ headers, used to pick the -p strip level up front.
+PATCH_HEADER_RE = re.compile(r"^(?:---|\+\+\+) (\S+)", re.MULTILINE)
+CR_NEWLINE_RE = re.compile(r"\r\n?")
+HUNK_HEADER_RE = re.compile(r"^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+HUNK_RANGE_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+
+
+def _diff_problem(patch: str) -> str | None:
+    """Cheap structural check of a unified diff; return why it is unusable, or None.
+
+    Catches LLM output that no patch tool could apply (no file headers, no
+    hunks, prose inside a hunk) without spawning one. Lenient on purpose:
+    a hunk may end early at EOF, since sanitizing strips a trailing blank line.
+    """
+    if not re.search(r"^--- .*\n\+\+\+ ", patch, re.MULTILINE):
+        return "no ---/+++ file header pair"
+    old = new = 0  # lines still expected in the current hunk
+    hunks = 0
+    for lineno, line in enumerate(patch.split("\n"), start=1):
+        if old > 0 or new > 0:
+            tag = line[:1]
+            if tag in (" ", ""):
+                old, new = old - 1, new - 1
+            elif tag == "-":
+                old -= 1
+            elif tag == "+":
+                new -= 1
+            elif tag != "\\":  # "\ No newline at end of file"
+                return f"line {lineno} inside a hunk is not a diff line: {line[:60]!r}"
+            continue
+        m = HUNK_HEADER_RE.match(line)
+        if m:
+            hunks += 1
+            old = int(m.group(1) or 1)
+            new = int(m.group(2) or 1)
+    if not hunks:
+        return "no @@ hunk headers"
+    return None
+
+
+def _hunk_fits(lines: list[str], old: list[str], start: int, at_start: bool, at_end: bool) -> bool:
+    """True if ``old`` is found at ``start`` or, like git apply, at any other offset.
+
+    As in git, a hunk for line 1 must match at the top of the file and one
+    without trailing context at its end. Both sides arrive with trailing
+    whitespace stripped.
+    """
+    n = len(old)
+
+    def fits(i: int) -> bool:
+        return lines[i : i + n] == old and (not at_end or i + n == len(lines))
+
+    if at_start:
+        return fits(0)
+    if at_end:
+        return fits(len(lines) - n)
+    return fits(start) or any(fits(i) for i in range(len(lines) - n + 1))
+
+
+def dry_run_patch(patch: str, cwd: str = ".") -> str | None:
+    """Check in-process that a unified diff would apply; return why not, or None.
+
+    Verifies every hunk's context and removed lines against the current file
+    contents, so patches that cannot apply are rejected without spawning git.
+    Paths are stripped at the same level git_apply_cmd() passes to git, and
+    lines compare equal when they differ only in trailing whitespace, which
+    ``git apply --whitespace=fix`` also tolerates. A None result still goes
+    through git apply for real.
+    """
+    problem = _diff_problem(patch)
+    if problem:
+        return problem
+    level = _strip_level(patch)
+    contents: dict[str, list[str] | None] = {}
+    lines: list[str] | None = None
+    path = ""
+    old: list[str] = []
+    start = old_left = new_left = trailing = 0
+    src = None
+    # The trailing None flushes a hunk cut short at EOF (see _diff_problem)
+    for line in patch.split("\n") + [None]:
+        if old_left > 0 or new_left > 0:
+            tag = None if line is None else line[:1]
+            if tag in (" ", ""):
+                old.append(line[1:].rstrip())
+                old_left, new_left = old_left - 1, new_left - 1
+                trailing += 1
+            elif tag == "-":
+                old.append(line[1:].rstrip())
+                old_left -= 1
+                trailing = 0
+            elif tag == "+":
+                new_left -= 1
+                trailing = 0
+            elif tag != "\\":
+                old_left = new_left = 0
+            if old_left > 0 or new_left > 0:
+                continue
+            old_left = new_left = 0
+            if lines is None:
+                return f"{path}: file does not exist"
+            if not _hunk_fits(lines, old, start, start == 0, trailing == 0):
+                return f"{path}: hunk at line {start + 1} does not match the file"
+            continue
+        if line is None:
+            break
+        if line.startswith("--- "):
+            src = line[4:].split("\t")[0].strip()
+        elif line.startswith("+++ ") and src is not None:
+            dst = line[4:].split("\t")[0].strip()
+            name = src if dst == "/dev/null" else dst
+            path = name.split("/", level)[-1] if level else name
+            if path not in contents:
+                try:
+                    with open(os.path.join(cwd, path), encoding="utf-8") as fh:
+                        contents[path] = [ln.rstrip() for ln in fh.read().splitlines()]
+                except FileNotFoundError:
+                    contents[path] = None
+                except (OSError, UnicodeDecodeError) as e:
+                    return f"{path}: {e}"
+            lines = contents[path]
+            if src == "/dev/null" and lines is not None:
+                return f"{path}: new file already exists"
+            src = None
+        else:
+            m = HUNK_RANGE_RE.match(line)
+            if m:
+                start = max(int(m.group(1)) - 1, 0)
+                old_left = int(m.group(2) or 1)
+                new_left = int(m.group(3) or 1)
+                trailing = 0
+                old = []
+    return None
+
+
+def _strip_level(patch: str) -> int:
+    """1 for git-style a/ b/ prefixed paths, else 0."""
+    paths = [p for p in PATCH_HEADER_RE.findall(patch) if p != "/dev/null"]
+    if paths and all(p.startswith(("a/", "b/")) for p in paths):
+        return 1
+    return 0
+
+
+def git_apply_cmd(patch: str) -> list[str]:
+    """`git apply` reading the diff from stdin, at the -p level dry_run_patch assumes."""
+    return ["git", "apply", f"-p{_strip_level(patch)}", "--whitespace=fix", "-"]
+
+
+def _patch_attempts(patch: str) -> list[list[str]]:
+    """Commands to try, in order; each reads the diff from stdin.
+
+    git apply is all-or-nothing, so it doubles as the pre-flight check; the
+    fuzz-tolerant `patch` only runs if git rejects the diff.
+    """
+    return [
+        git_apply_cmd(patch),
+        ["patch", "--batch", "--forward", f"-p{_strip_level(patch)}"],
+    ]
+
+
+def _run_patch_cmd(cmd: list[str], patch: str, cwd: str) -> tuple[bool, str]:
+    """Run one patch tool with the diff piped to stdin; return (ok, output)."""
+    try:
+        # Python-opened fds are non-inheritable (PEP 446), so the child can't
+        # see them anyway; skipping close_fds saves the per-fd close sweep.
+        proc = subprocess.run(
+            cmd, input=patch, cwd=cwd, capture_output=True, text=True, close_fds=False
+        )
+        ok = proc.returncode == 0
+        out = (proc.stdout or "") + (proc.stderr or "")
+        return ok, out
+    except FileNotFoundError as e:
+        return False, f"Command not found: {' '.join(cmd)} ({e})"
+    except Exception as e:
+        return False, f"Error running {' '.join(cmd)}: {e}"
+
+
+def _apply_with_fallbacks(patch: str, cwd: str) -> tuple[list[str] | None, str]:
+    """Try _patch_attempts(); return the command that worked (or None) and the last output."""
+    problem = _diff_problem(patch)
+    if problem:
+        return None, f"Malformed diff, not attempted: {problem}"
+    last_out = ""
+    for cmd in _patch_attempts(patch):
+        ok, last_out = _run_patch_cmd(cmd, patch, cwd)
+        if ok:
+            return cmd, last_out
+        logger.info("%s did not apply; trying next strategy.", " ".join(cmd))
+    return None, last_out
 
 
 def sanitize_patch_string(raw_patch: str) -> str:
@@ -31,8 +225,39 @@ def sanitize_patch_string(raw_patch: str) -> str:
     # Common ```patch or ```diff prefix in the first line
     if txt.lower().startswith("patch\n"):
         txt = txt[6:]
-    txt = txt.replace("\r\n", "\n").replace("\r", "\n").strip()
-    return txt
+    # One scan for the usual LF-only text; one substitution pass otherwise
+    if "\r" in txt:
+        txt = CR_NEWLINE_RE.sub("\n", txt)
+    return txt.strip()
+
+
+# Working directories in which BACKUP_DIR (a relative path) is known to exist
+_backup_dir_ready: set[str] = set()
+
+
+def _ensure_backup_dir() -> None:
+    """Create BACKUP_DIR once per working directory instead of on every call."""
+    cwd = os.getcwd()
+    if cwd not in _backup_dir_ready:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        _backup_dir_ready.add(cwd)
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """Clone ``src`` to ``dst`` without copying data, where the filesystem allows.
+
+    A reflink stays independent of the original when either is modified,
+    unlike a hardlink, so in-place writes to the target can't touch the backup.
+    """
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        return False
 
 
 def backup_file(filepath: str):
@@ -42,10 +267,11 @@ def backup_file(filepath: str):
     Args:
         filepath (str): The path to the file to be backed up.
     """
-    os.makedirs(BACKUP_DIR, exist_ok=True)
+    _ensure_backup_dir()
     backup_path = os.path.join(BACKUP_DIR, os.path.basename(filepath))
-    shutil.copy2(filepath, backup_path)
-    logger.info(f"Backed up {filepath} to {backup_path}")
+    if not _reflink(filepath, backup_path):
+        shutil.copy2(filepath, backup_path)
+    logger.info("Backed up %s to %s", filepath, backup_path)
     return backup_path
 
 
@@ -53,8 +279,8 @@ def apply_patch(filepath: str, patch: str) -> bool:
     """Apply a unified diff patch to a file. Returns True if successful.
 
     Notes:
-    - This expects a standard unified diff (---/+++ headers). We try multiple
-      strategies: `patch` with -p0/-p1 and `git apply` as a fallback.
+    - This expects a standard unified diff (---/+++ headers). The -p level is
+      read from the headers; `git apply` is tried first, then `patch`.
     - A backup is created before attempting to patch.
     """
     # Always take a backup first
@@ -62,144 +288,79 @@ def apply_patch(filepath: str, patch: str) -> bool:
     # Quick escape: if the suggestion looks like a full-file replacement rather than a diff
     if not (patch.lstrip().startswith("---") or "diff --git" in patch):
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(patch)
+            # Encode once and hand the bytes straight to the OS
+            with open(filepath, "wb") as f:
+                f.write(patch.encode("utf-8"))
             logger.info(
-                f"Wrote direct content update to {filepath} (non-diff suggestion)."
+                "Wrote direct content update to %s (non-diff suggestion).", filepath
             )
             return True
         except Exception as e:
-            logger.error(f"Failed writing direct update to {filepath}: {e}\n")
+            logger.error("Failed writing direct update to %s: %s\n", filepath, e)
             return False
 
-    # Write patch to a temporary file next to the target for easier relative paths
-    import tempfile
-
+    # Run next to the target for easier relative paths
     tmp_dir = os.path.dirname(os.path.abspath(filepath)) or "."
+    cmd, last_out = _apply_with_fallbacks(patch, tmp_dir)
+    if cmd is not None:
+        logger.info("Patched %s successfully using: %s", filepath, " ".join(cmd))
+        return True
+    logger.error(
+        "All patch strategies failed for %s. Output: %s", filepath, last_out[:1000]
+    )
+    # Persist last failure for diagnosis
     try:
-        with tempfile.NamedTemporaryFile(
-            "w", delete=False, dir=tmp_dir, suffix=".patch", encoding="utf-8"
-        ) as tf:
-            tf.write(patch)
-            patch_path = tf.name
-    except Exception as e:
-        logger.error(f"Unable to create temporary patch file: {e}")
-        return False
-
-    def _run(cmd: list[str]) -> tuple[bool, str]:
-        try:
-            proc = subprocess.run(cmd, cwd=tmp_dir, capture_output=True, text=True)
-            ok = proc.returncode == 0
-            out = (proc.stdout or "") + (proc.stderr or "")
-            return ok, out
-        except FileNotFoundError as e:
-            return False, f"Command not found: {' '.join(cmd)} ({e})"
-        except Exception as e:
-            return False, f"Error running {' '.join(cmd)}: {e}"
-
-    try:
-        attempts: list[list[str]] = [
-            ["patch", "--batch", "--forward", "-p0", "-i", patch_path],
-            ["patch", "--batch", "--forward", "-p1", "-i", patch_path],
-            ["git", "apply", "--reject", "--whitespace=fix", patch_path],
-            ["git", "apply", "-p0", "--reject", "--whitespace=fix", patch_path],
-        ]
-        last_out = ""
-        for idx, cmd in enumerate(attempts, start=1):
-            ok, out = _run(cmd)
-            last_out = out
-            if ok:
-                logger.info(f"Patched {filepath} successfully using: {' '.join(cmd)}")
-                return True
-            time.sleep(0.2 * idx)
-        logger.error(
-            f"All patch strategies failed for {filepath}. Output: {last_out[:1000]}"
-        )
-        # Persist last failure for diagnosis
-        try:
-            os.makedirs(BACKUP_DIR, exist_ok=True)
-            with open(
-                os.path.join(BACKUP_DIR, "last_patch_fail.log"), "w", encoding="utf-8"
-            ) as lf:
-                lf.write(last_out[:5000])
-        except Exception:
-            pass
-        return False
-    finally:
-        try:
-            os.remove(patch_path)
-        except Exception:
-            pass
+        _ensure_backup_dir()
+        with open(
+            os.path.join(BACKUP_DIR, "last_patch_fail.log"), "w", encoding="utf-8"
+        ) as lf:
+            lf.write(last_out[:5000])
+    except Exception:
+        pass
+    return False
 
 
 def rollback_file(filepath: str):
     backup_path = os.path.join(BACKUP_DIR, os.path.basename(filepath))
     if os.path.exists(backup_path):
+        # Backups keep the original mtime, so an untouched target needs no copy;
+        # a rewritten-but-identical one (same size) is confirmed by content.
+        try:
+            cur, bak = os.stat(filepath), os.stat(backup_path)
+            if cur.st_size == bak.st_size and (
+                cur.st_mtime_ns == bak.st_mtime_ns
+                or filecmp.cmp(filepath, backup_path, shallow=False)
+            ):
+                logger.info("%s unchanged since backup; no-op rollback", filepath)
+                return True
+        except FileNotFoundError:
+            pass
         shutil.copy2(backup_path, filepath)
-        logger.info(f"Rolled back {filepath} from {backup_path}")
+        logger.info("Rolled back %s from %s", filepath, backup_path)
         return True
-    logger.warning(f"No backup found for {filepath}")
+    logger.warning("No backup found for %s", filepath)
     return False
 
 
 def apply_project_patch(patch: str) -> bool:
     """Apply a unified diff that may touch multiple files in the repository.
 
-    Attempts `patch` first (-p0/-p1), then `git apply` as a fallback. Returns True on success.
+    Attempts `git apply` first, then `patch`, at the -p level implied by the headers.
+    Returns True on success.
     """
-    import tempfile
-
-    tmp_dir = os.getcwd()
-    try:
-        with tempfile.NamedTemporaryFile(
-            "w", delete=False, dir=tmp_dir, suffix=".patch", encoding="utf-8"
-        ) as tf:
-            tf.write(patch)
-            patch_path = tf.name
-    except Exception as e:
-        logger.error(f"Unable to create temporary patch file: {e}")
-        return False
-
-    def _run(cmd: list[str]) -> tuple[bool, str]:
-        try:
-            proc = subprocess.run(cmd, cwd=tmp_dir, capture_output=True, text=True)
-            ok = proc.returncode == 0
-            out = (proc.stdout or "") + (proc.stderr or "")
-            return ok, out
-        except FileNotFoundError as e:
-            return False, f"Command not found: {' '.join(cmd)} ({e})"
-        except Exception as e:
-            return False, f"Error running {' '.join(cmd)}: {e}"
-
+    cmd, last_out = _apply_with_fallbacks(patch, os.getcwd())
+    if cmd is not None:
+        logger.info("Project patch applied successfully.")
+        return True
+    logger.error("All project patch strategies failed. Output: %s", last_out[:1000])
     try:
-        attempts: list[list[str]] = [
-            ["patch", "--batch", "--forward", "-p0", "-i", patch_path],
-            ["patch", "--batch", "--forward", "-p1", "-i", patch_path],
-            ["git", "apply", "--reject", "--whitespace=fix", patch_path],
-            ["git", "apply", "-p0", "--reject", "--whitespace=fix", patch_path],
-        ]
-        last_out = ""
-        for idx, cmd in enumerate(attempts, start=1):
-            ok, out = _run(cmd)
-            last_out = out
-            if ok:
-                logger.info("Project patch applied successfully.")
-                return True
-            time.sleep(0.2 * idx)
-        logger.error(f"All project patch strategies failed. Output: {last_out[:1000]}")
-        try:
-            os.makedirs(BACKUP_DIR, exist_ok=True)
-            with open(
-                os.path.join(BACKUP_DIR, "last_project_patch_fail.log"),
-                "w",
-                encoding="utf-8",
-            ) as lf:
-                lf.write(last_out[:5000])
-        except Exception:
-            pass
-        return False
-    finally:
-        try:
-            os.remove(patch_path)
-        except Exception:
-            pass
+        _ensure_backup_dir()
+        with open(
+            os.path.join(BACKUP_DIR, "last_project_patch_fail.log"),
+            "w",
+            encoding="utf-8",
+        ) as lf:
+            lf.write(last_out[:5000])
+    except Exception:
+        pass
+    return False
@@ -3,30 +3,44 @@
 from __future__ import annotations
 
 import json
+import os
 import sys
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional: pip install .[performance]
+    orjson = None
+
+# Metrics reported by summarize(), and older export names to fall back to
+SUMMARY_KEYS = ("profit_total", "max_drawdown", "calmar", "sharpe", "winrate")
+KEY_FALLBACKS = {"profit_total": "total_profit"}
+
 
 def latest_run_dir(root: Path = Path("runs")) -> Path | None:
-    if not root.exists():
+    try:
+        with os.scandir(root) as it:
+            # glob("*") semantics: hidden entries are skipped
+            name = max(
+                (e.name for e in it if not e.name.startswith(".") and e.is_dir()),
+                default=None,
+            )
+    except (FileNotFoundError, NotADirectoryError):
         return None
-    dirs = sorted([p for p in root.glob("*") if p.is_dir()], reverse=True)
-    return dirs[0] if dirs else None
+    return root / name if name is not None else None
 
 
 def summarize(results_path: Path) -> dict:
-    data = json.loads(results_path.read_text())
+    # Parse the raw bytes directly; no intermediate decoded str
+    raw = results_path.read_bytes()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
     # Attempt common keys in freqtrade export; fallback gracefully
     trades = data.get("trades", [])
     metrics = data.get("results", data)
-    summary = {
-        "trades": len(trades) if isinstance(trades, list) else trades or 0,
-        "profit_total": metrics.get("profit_total", metrics.get("total_profit", None)),
-        "max_drawdown": metrics.get("max_drawdown", None),
-        "calmar": metrics.get("calmar", None),
-        "sharpe": metrics.get("sharpe", None),
-        "winrate": metrics.get("winrate", None),
-    }
+    summary = {"trades": len(trades) if isinstance(trades, list) else trades or 0}
+    summary.update(
+        (k, metrics.get(k, metrics.get(KEY_FALLBACKS.get(k)))) for k in SUMMARY_KEYS
+    )
     return summary
 
 
@@ -1,42 +1,133 @@
 
+import ast
+import atexit
 import os
 import subprocess
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import time
-import glob
+import hashlib
+import io
 import logging
+import pickle
+import re
 import requests
 import json
+import logging.handlers
+import queue
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from agents.mcp_memory_client import MCPMemoryClient
+from agents.patch_utils import dry_run_patch, git_apply_cmd, sanitize_patch_string
 
+try:
+    import orjson
+except ImportError:  # optional: pip install .[performance]
+    orjson = None
+
+CHECK_DIRS = ["agents/", "scripts/", "services/", "strategies/", "tests/"]
 CHECK_COMMANDS = [
-    ("flake8", ".venv-ft2025/bin/flake8 agents/ scripts/ services/ strategies/ tests/"),
-    (
-        "black",
-        ".venv-ft2025/bin/black --check agents/ scripts/ services/ strategies/ tests/",
-    ),
-    (
-        "isort",
-        ".venv-ft2025/bin/isort --check-only agents/ scripts/ services/ strategies/ tests/",
-    ),
+    ("flake8", [".venv-ft2025/bin/flake8", *CHECK_DIRS]),
+    ("black", [".venv-ft2025/bin/black", "--check", *CHECK_DIRS]),
+    ("isort", [".venv-ft2025/bin/isort", "--check-only", *CHECK_DIRS]),
 ]
 
+SCAN_CACHE_PATH = "user_data/scan_cache.pkl"
+SELF_HEAL_LOG_PATH = "user_data/self_heal_model_switch.log"
+
+# Directories never descended into by the project scan (hidden ones are skipped too)
+SCAN_SKIP_DIRS = frozenset({"node_modules", "user_data", "__pycache__"})
+
+
+def reload_config():
+    """Read the LLM endpoint/model settings from the environment (done once at import)."""
+    global AGENT_MODEL, OPENAI_API_BASE, OPENAI_API_KEY, ANTHROPIC_API_KEY, ANTHROPIC_API_URL
+    AGENT_MODEL = os.getenv("AGENT_MODEL")  # unset: each caller picks its own default model
+    OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "http://127.0.0.1:1234/v1")
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+    ANTHROPIC_API_URL = os.getenv("ANTHROPIC_API_URL", "https://api.anthropic.com/v1/messages")
+
+
+reload_config()
+
+
+# One keep-alive session for every LLM call, so each heal loop reuses the
+# TCP/TLS connections to Ollama/LM Studio and Anthropic instead of redialing.
+# Dropped connections, timeouts and 429/5xx are retried twice: at once, then after 1s.
+_RETRY = Retry(
+    total=2,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=None,
+    raise_on_status=False,
+)
+_SESSION = requests.Session()
+_SESSION.headers.update({"Connection": "keep-alive"})
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_RETRY))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_RETRY))
+
 PROBLEM_KEY = "self_heal:problems"
 ATTEMPT_KEY = "self_heal:attempts"
 MEMORY_KEY = "self_heal:memory"
+FIX_CACHE_KEY = "self_heal:fix_cache"
+FIX_CACHE_MAX = 50  # applied patches kept; the least recently used go first
 
+_HEAL_LOG = None
+_HEAL_LOG_LISTENER = None
+_HEAL_LOG_LOCK = threading.Lock()
 
-def run_check(name: str, cmd: str) -> tuple[int, str]:
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+
+def heal_log():
+    """
+    Logger for the self-heal status log. The file stays open in one rotating
+    handler; records are queued and written by a listener thread, so the
+    status/watchdog threads and the main loop never contend on the file.
+    """
+    global _HEAL_LOG, _HEAL_LOG_LISTENER
+    if _HEAL_LOG is not None:
+        return _HEAL_LOG
+    # The heartbeat thread and the main loop may both get here first
+    with _HEAL_LOG_LOCK:
+        if _HEAL_LOG is None:
+            os.makedirs(os.path.dirname(SELF_HEAL_LOG_PATH), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                SELF_HEAL_LOG_PATH, maxBytes=10 * 1024 * 1024, backupCount=3, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            records = queue.SimpleQueue()
+            _HEAL_LOG_LISTENER = logging.handlers.QueueListener(records, handler)
+            _HEAL_LOG_LISTENER.start()
+            atexit.register(_HEAL_LOG_LISTENER.stop)
+            log = logging.getLogger("SelfHealLog")
+            log.setLevel(logging.INFO)
+            log.propagate = False
+            log.addHandler(logging.handlers.QueueHandler(records))
+            _HEAL_LOG = log
+    return _HEAL_LOG
+
+
+def run_check(name: str, cmd: list[str]) -> tuple[int, str]:
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError as e:
+        # The shell used to report a missing tool as exit 127; keep that shape
+        return 127, f"{cmd[0]}: {e}"
     return result.returncode, result.stdout + result.stderr
 
 
 
 def scan_problems() -> dict[str, str]:
     problems: dict[str, str] = {}
-    for name, cmd in CHECK_COMMANDS:
-        code, output = run_check(name, cmd)
-        if code != 0:
-            problems[name] = output.strip()
+    # The checkers are independent processes; run them side by side so the
+    # scan takes as long as the slowest one. map() keeps CHECK_COMMANDS order.
+    with ThreadPoolExecutor(max_workers=len(CHECK_COMMANDS)) as ex:
+        results = ex.map(lambda check: run_check(*check), CHECK_COMMANDS)
+        for (name, _), (code, output) in zip(CHECK_COMMANDS, results):
+            if code != 0:
+                problems[name] = output.strip()
     return problems
 
 import os
@@ -46,6 +137,43 @@ import requests
 import json
 
 
+PROBLEM_REPORT_BUDGET = 4096  # characters of findings sent to the LLM
+PROBLEM_LINES_PER_ENTRY = 50
+FLAKE8_CODE_RE = re.compile(r":\d+:\d+: ([A-Z]+\d+) ")
+
+
+def summarize_problems(problems, budget=PROBLEM_REPORT_BUDGET):
+    """
+    Condense a problem report for the LLM prompt: syntax errors first, at most
+    PROBLEM_LINES_PER_ENTRY lines per entry, ``budget`` characters in total,
+    followed by a tally of the most frequent flake8 codes.
+    Accepts the scan_all_project_problems() list or the scan_problems() dict.
+    """
+    if isinstance(problems, dict):
+        entries = [f"[{name.upper()}] {out}" for name, out in problems.items()]
+    else:
+        entries = list(problems)
+    entries.sort(key=lambda entry: not entry.startswith("[SYNTAX]"))
+    lines = []
+    used = 0
+    truncated = False
+    for entry in entries:
+        for line in entry.splitlines()[:PROBLEM_LINES_PER_ENTRY]:
+            if used + len(line) > budget:
+                truncated = True
+                break
+            lines.append(line)
+            used += len(line) + 1
+        if truncated:
+            break
+    codes = Counter(FLAKE8_CODE_RE.findall("\n".join(entries))).most_common(20)
+    if truncated:
+        lines.append("... (report truncated)")
+    if codes:
+        lines.append("Most frequent codes: " + ", ".join(f"{code} x{n}" for code, n in codes))
+    return "\n".join(lines)
+
+
 def build_llm_prompt(problem_report, attempt_num, context):
     """
     Build a professional, robust LLM prompt for code fixing.
@@ -70,93 +198,452 @@ Respond ONLY with the patch in unified diff format, no explanations. If no chang
     )
 
 
-def call_local_llm(prompt):
-    """Call the local LLM (Ollama or LM Studio) with the given prompt."""
-    api_base = os.getenv("OPENAI_API_BASE", "http://127.0.0.1:1234/v1")
-    api_key = os.getenv("OPENAI_API_KEY", "lm-studio")
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    data = {
-        "model": os.getenv("AGENT_MODEL", "deepseek-coder-v2:16b"),
+PATCH_END = "*** End Patch"
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _dumps(data):
+    """Encode an LLM request body to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode("utf-8")
+
+
+def _loads(raw):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _openai_chunk(line):
+    if not line.startswith(b"data: ") or line == b"data: [DONE]":
+        return ""
+    choices = _loads(line[6:]).get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content") or ""
+
+
+def _anthropic_chunk(line):
+    if not line.startswith(b"data: "):
+        return ""
+    event = _loads(line[6:])
+    if event.get("type") != "content_block_delta":
+        return ""
+    return event.get("delta", {}).get("text", "")
+
+
+def read_stream(resp, chunk_text, stop=PATCH_END):
+    """
+    Collect the text of a streamed LLM response, one ``chunk_text(line)`` per line.
+    The connection is closed as soon as ``stop`` has been received, so the
+    server stops decoding tokens the patch no longer needs.
+    """
+    parts = []
+    tail = ""
+    with resp:
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            piece = chunk_text(line)
+            if not piece:
+                continue
+            parts.append(piece)
+            window = tail + piece
+            if stop in window:
+                break
+            tail = window[-len(stop):]
+    return "".join(parts)
+
+
+class CircuitBreaker:
+    """
+    Skip calls to an LLM endpoint after ``fail_threshold`` consecutive failures.
+    While open, allow() is False; after ``reset_timeout`` seconds exactly one probe
+    call is let through (half-open) until it is recorded, and every failed probe
+    doubles the wait, up to ``max_timeout``.
+    """
+
+    def __init__(self, name, fail_threshold=3, reset_timeout=60, max_timeout=900):
+        self.name = name
+        self.fail_threshold = fail_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.timeout = reset_timeout
+        self.half_open = False  # a probe call is in flight
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True when closed, or for the one caller that gets to probe an open circuit."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.half_open or time.monotonic() - self.opened_at < self.timeout:
+                return False
+            self.half_open = True
+            return True
+
+    def peek(self):
+        """What allow() would answer, without claiming the probe call."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            return not self.half_open and time.monotonic() - self.opened_at >= self.timeout
+
+    def record(self, ok):
+        with self._lock:
+            self.half_open = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                self.timeout = self.reset_timeout
+                return
+            self.failures += 1
+            if self.opened_at is not None:
+                # Failed probe: stay open and back off further
+                self.timeout = min(self.timeout * 2, self.max_timeout)
+                self.opened_at = time.monotonic()
+            elif self.failures >= self.fail_threshold:
+                self.opened_at = time.monotonic()
+                logging.warning(f"{self.name} circuit open after {self.failures} failures; retrying in {self.timeout}s.")
+
+
+class LLMProvider:
+    """
+    One LLM endpoint: how to address it, the request body for a prompt, how to
+    read its stream, plus its own circuit breaker and concurrency limit.
+    ``url``/``headers`` are callables so reload_config() changes take effect;
+    ``headers`` returning None means the provider is not configured.
+    """
+
+    def __init__(self, name, url, headers, body, chunk_text, timeout=90, concurrency=4):
+        self.name = name
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.chunk_text = chunk_text
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name)
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def call(self, prompt, **options):
+        """Return the response text, or None on failure, misconfiguration or an open breaker."""
+        headers = self.headers()
+        if headers is None:
+            logging.error(f"{self.name} is not configured.")
+            return None
+        if not self.breaker.allow():
+            return None
+        try:
+            with self._slots:
+                resp = _SESSION.post(
+                    self.url(),
+                    headers=headers,
+                    data=_dumps(self.body(prompt, **options)),
+                    timeout=self.timeout,
+                    stream=True,
+                )
+                resp.raise_for_status()
+                text = read_stream(resp, self.chunk_text)
+        except Exception as e:
+            logging.error(f"{self.name} LLM call failed: {e}")
+            text = None
+        self.breaker.record(bool(text))
+        return text or None
+
+
+def _local_body(prompt, temperature=0.2):
+    return {
+        "model": AGENT_MODEL or "deepseek-coder-v2:16b",
         "messages": [
             {"role": "system", "content": "You are a professional Python code fixer."},
             {"role": "user", "content": prompt},
         ],
         "max_tokens": 2048,
-        "temperature": 0.2,
+        "temperature": temperature,
+        "stream": True,
     }
-    try:
-        resp = requests.post(
-            f"{api_base}/chat/completions",
-            headers=headers,
-            data=json.dumps(data),
-            timeout=60,
-        )
-        resp.raise_for_status()
-        return resp.json()["choices"][0]["message"]["content"]
-    except Exception as e:
-        logging.error(f"Local LLM call failed: {e}")
-        return None
 
 
-def call_claude_llm(prompt):
-    """Call Claude via API as fallback."""
-    api_key = os.getenv("ANTHROPIC_API_KEY")
-    if not api_key:
-        logging.error("Claude API key not set.")
-        return None
-    headers = {
-        "x-api-key": api_key,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json",
-    }
-    data = {
+def _claude_body(prompt):
+    return {
         "model": "claude-3-5-sonnet-20241022",
         "max_tokens": 2048,
         "messages": [
             {"role": "user", "content": prompt},
         ],
+        "stream": True,
     }
-    try:
-        resp = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers=headers,
-            data=json.dumps(data),
-            timeout=60,
-        )
-        resp.raise_for_status()
-        return resp.json()["content"]
-    except Exception as e:
-        logging.error(f"Claude LLM call failed: {e}")
+
+
+def _claude_headers():
+    if not ANTHROPIC_API_KEY:
+        return None
+    return {
+        "x-api-key": ANTHROPIC_API_KEY,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json",
+    }
+
+
+# LM Studio / any OpenAI-compatible server
+LOCAL_LLM = LLMProvider(
+    "Local LLM",
+    url=lambda: f"{OPENAI_API_BASE}/chat/completions",
+    headers=lambda: {"Authorization": f"Bearer {OPENAI_API_KEY or 'lm-studio'}", **JSON_HEADERS},
+    body=_local_body,
+    chunk_text=_openai_chunk,
+    timeout=60,
+)
+CLAUDE = LLMProvider(
+    "Claude",
+    url=lambda: ANTHROPIC_API_URL,
+    headers=_claude_headers,
+    body=_claude_body,
+    chunk_text=_anthropic_chunk,
+)
+
+
+def call_local_llm(prompt):
+    """Call the local LLM (Ollama or LM Studio) with the given prompt."""
+    return LOCAL_LLM.call(prompt)
+
+
+def call_claude_llm(prompt):
+    """Call Claude via API as fallback."""
+    return CLAUDE.call(prompt)
+
+
+def extract_patch(llm_response):
+    """
+    Return the unified diff in an LLM response: the body of a ``*** Begin Patch``
+    block if there is one, else the response without markdown fences.
+    None for NOOP or an empty response; anything else is left to dry_run_patch().
+    """
+    text = llm_response
+    if "*** Begin Patch" in text:
+        text = text.split("*** Begin Patch", 1)[1].split(PATCH_END)[0]
+    text = sanitize_patch_string(text)
+    if not text or text == "NOOP":
         return None
+    return text + "\n"
 
 
-def main():
+def _file_digest(path):
+    with open(path, "rb") as fh:
+        return hashlib.blake2b(fh.read(), digest_size=16).digest()
+
+
+_RULESET = None
+
+
+def _scan_ruleset():
+    """Identify the checker versions; cached results from other versions are discarded."""
+    global _RULESET
+    if _RULESET is None:
+        try:
+            flake8 = subprocess.check_output(["flake8", "--version"], text=True).strip()
+        except (OSError, subprocess.CalledProcessError):
+            flake8 = "flake8-unavailable"
+        _RULESET = f"{sys.version}|{flake8}"
+    return _RULESET
+
+
+class ScanCache:
+    """
+    Per-file scan problems, reused while a file is unchanged.
+    A matching (mtime_ns, size) skips reading the file; on a stat mismatch with
+    the same size the contents are hashed, so touch-without-edit still hits.
+    """
+
+    def __init__(self, path=SCAN_CACHE_PATH, ruleset=""):
+        self.path = path
+        self.ruleset = ruleset
+        self.entries = {}  # file -> (mtime_ns, size, digest, problems)
+        try:
+            with open(path, "rb") as fh:
+                data = pickle.load(fh)
+            if data.get("ruleset") == ruleset:
+                self.entries = data["entries"]
+        except (OSError, pickle.PickleError, EOFError, AttributeError, KeyError):
+            pass
+
+    def get(self, f):
+        entry = self.entries.get(f)
+        if entry is None:
+            return None
+        st = os.stat(f)
+        if (entry[0], entry[1]) == (st.st_mtime_ns, st.st_size):
+            return entry[3]
+        if entry[1] == st.st_size and _file_digest(f) == entry[2]:
+            self.entries[f] = (st.st_mtime_ns, st.st_size, entry[2], entry[3])
+            return entry[3]
+        return None
+
+    def put(self, f, problems):
+        st = os.stat(f)
+        self.entries[f] = (st.st_mtime_ns, st.st_size, _file_digest(f), problems)
+
+    def save(self, keep):
+        """Persist entries for the files in ``keep``; deleted files drop out."""
+        keep = set(keep)
+        data = {
+            "ruleset": self.ruleset,
+            "entries": {f: e for f, e in self.entries.items() if f in keep},
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(data, fh, protocol=5)
+        os.replace(tmp, self.path)
+
+
+def iter_py_files(root="."):
+    """Yield project .py paths relative to ``root``, pruning skipped and hidden directories."""
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        with os.scandir(os.path.join(root, rel)) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                path = os.path.join(rel, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SCAN_SKIP_DIRS:
+                        stack.append(path)
+                elif entry.name.endswith(".py"):
+                    yield path
+
+
+# Fork server for test runs: imports pytest once, then forks a child per run.
+# Project modules are only ever imported in the child, so each run sees the current code.
+_PYTEST_DRIVER = r"""
+import json, os, sys
+import pytest
+out = sys.stdout.buffer
+out.write(b"ready\n")
+out.flush()
+for line in sys.stdin:
+    args = json.loads(line)
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        os.dup2(w, 1)
+        os.dup2(w, 2)
+        os.close(w)
+        code = pytest.main(args)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(int(code))
+    os.close(w)
+    with os.fdopen(r, "rb") as fh:
+        report = fh.read()
+    _, status = os.waitpid(pid, 0)
+    out.write(json.dumps({"code": os.waitstatus_to_exitcode(status), "size": len(report)}).encode() + b"\n")
+    out.write(report)
+    out.flush()
+"""
+
+
+class PytestWorker:
+    """
+    Long-lived interpreter with pytest already imported, so a test run costs a
+    fork instead of a fresh interpreter start. Falls back to a plain ``pytest``
+    subprocess where fork is unavailable or the worker cannot start.
+    """
+
+    def __init__(self):
+        self.proc = None
+
+    def _start(self):
+        if not hasattr(os, "fork"):
+            return False
+        try:
+            self.proc = subprocess.Popen(
+                [sys.executable, "-c", _PYTEST_DRIVER],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            self.proc = None
+            return False
+        if self.proc.stdout.readline() != b"ready\n":
+            self.close()
+            return False
+        return True
+
+    def run(self, args):
+        """Run pytest with ``args``; returns (exit code, combined output bytes)."""
+        if (self.proc is None or self.proc.poll() is not None) and not self._start():
+            result = subprocess.run(["pytest", *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            return result.returncode, result.stdout
+        try:
+            self.proc.stdin.write(json.dumps(args).encode() + b"\n")
+            self.proc.stdin.flush()
+            header = json.loads(self.proc.stdout.readline())
+            return header["code"], self.proc.stdout.read(header["size"])
+        except (OSError, ValueError):
+            # Worker died mid-run: drop it and run this one the slow way
+            self.close()
+            result = subprocess.run(["pytest", *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            return result.returncode, result.stdout
+
+    def close(self):
+        if self.proc is not None:
+            self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+
+
+_PYTEST_WORKER = PytestWorker()
+atexit.register(_PYTEST_WORKER.close)
+
 
 def scan_all_project_problems():
     """Scan all Python files in the project for lint, syntax, and test errors."""
     problems = []
-    py_files = glob.glob("**/*.py", recursive=True)
+    py_files = sorted(iter_py_files())
+    # Only files changed since the last scan are checked again
+    cache = ScanCache(ruleset=_scan_ruleset())
+    stale = []
     for f in py_files:
-        # Check syntax
+        hit = cache.get(f)
+        if hit is None:
+            stale.append(f)
+        else:
+            problems.extend(hit)
+    found = {f: [] for f in stale}
+    # Check syntax in-process with the parser alone; only files that parse go on to flake8,
+    # which would otherwise just repeat the syntax error as E999
+    parsed = []
+    for f in stale:
         try:
-            subprocess.check_output(["python3", "-m", "py_compile", f], stderr=subprocess.STDOUT)
-        except subprocess.CalledProcessError as e:
-            problems.append(f"[SYNTAX] {f}: {e.output.decode(errors='ignore')}")
-        # Check flake8
+            with open(f, "rb") as fh:
+                ast.parse(fh.read(), f)
+        except (SyntaxError, ValueError) as e:
+            found[f].append(f"[SYNTAX] {f}: {e}")
+        else:
+            parsed.append(f)
+    # Check flake8 with a single run over the parsed files, then split its report per file
+    if parsed:
         try:
-            out = subprocess.check_output(["flake8", f], stderr=subprocess.STDOUT)
-            if out:
-                problems.append(f"[FLAKE8] {f}: {out.decode(errors='ignore')}")
+            out = subprocess.check_output(["flake8", *parsed], stderr=subprocess.STDOUT)
         except subprocess.CalledProcessError as e:
-            problems.append(f"[FLAKE8] {f}: {e.output.decode(errors='ignore')}")
+            out = e.output
+        by_file = {}
+        for line in out.decode(errors="ignore").splitlines(keepends=True):
+            by_file.setdefault(line.split(":", 1)[0], []).append(line)
+        for f, lines in by_file.items():
+            found.setdefault(f, []).append(f"[FLAKE8] {f}: {''.join(lines)}")
+    for f, file_problems in found.items():
+        problems.extend(file_problems)
+        if os.path.exists(f):
+            cache.put(f, file_problems)
+    cache.save(py_files)
     # Optionally: run tests
-    try:
-        out = subprocess.check_output(["pytest", "--maxfail=1", "--disable-warnings"], stderr=subprocess.STDOUT)
-    except subprocess.CalledProcessError as e:
-        problems.append(f"[TEST] pytest: {e.output.decode(errors='ignore')}")
+    code, out = _PYTEST_WORKER.run(["--maxfail=1", "--disable-warnings"])
+    if code != 0:
+        problems.append(f"[TEST] pytest: {out.decode(errors='ignore')}")
     return problems
 
 def check_project_runnable():
@@ -174,11 +661,45 @@ def check_project_runnable():
 
 def run_learning_strategy_loop(mcp, log_path):
     """Run a placeholder learning/strategy loop when no errors are found."""
-    with open(log_path, "a") as f:
-        f.write(f"[LEARN][{time.strftime('%H:%M:%S')}] Learning/strategy loop running. (Placeholder)\n")
+    heal_log().info(f"[LEARN][{time.strftime('%H:%M:%S')}] Learning/strategy loop running. (Placeholder)")
     # Example: could generate new strategies, run experiments, or optimize code
     # For now, just log and sleep
     time.sleep(10)
+
+
+def apply_llm_patch(patch, cwd="."):
+    """
+    Dry-run ``patch`` in-process, then apply it with ``git apply``.
+    Returns (applied, output); git only runs for a patch whose hunks all match.
+    """
+    problem = dry_run_patch(patch, cwd=cwd)
+    if problem:
+        return False, f"Dry run: {problem}"
+    try:
+        result = subprocess.run(git_apply_cmd(patch), input=patch, cwd=cwd, capture_output=True, text=True)
+    except OSError as e:
+        return False, f"git apply: {e}"
+    return result.returncode == 0, (result.stdout + result.stderr).strip()
+
+
+def fix_cache_key(report):
+    """Fix cache key for a problem report (not the prompt, which also carries the attempt number)."""
+    return hashlib.blake2b(report.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def write_status(loop, problems, patch_applied, llm_response, status_file="user_data/self_heal_status.txt"):
+    """Overwrite the status file that scripts/utils/auto_mcp_self_heal.sh tails."""
+    ts = time.strftime("%Y-%m-%d %H:%M:%S")
+    preview = llm_response[:120].replace("\n", " ")
+    with open(status_file, "w", encoding="utf-8") as f:
+        f.write(f"[Self-Heal Status] {ts}\n")
+        f.write(f"Loop: {loop}\n")
+        f.write(f"Problems: {len(problems) if problems else 'None'}\n")
+        f.write(f"Patch Applied: {patch_applied}\n")
+        f.write(f"LLM Response: {preview}...\n")
+
+
+def main():
     """
     Main self-healing loop: runs at least 4 local LLM fixer attempts, then falls back to Claude if needed.
     All status and patching is tracked in MCP memory. Robust monitoring/logging is enforced.
@@ -190,435 +711,186 @@ def run_learning_strategy_loop(mcp, log_path):
             mcp.put("__healthcheck__", "ok")
             return mcp
         except Exception as e:
-            with open("user_data/self_heal_model_switch.log", "a") as f:
-                f.write(f"[ERROR][MCP] MCPMemoryClient unavailable: {e}\n")
+            heal_log().info(f"[ERROR][MCP] MCPMemoryClient unavailable: {e}")
             return None
 
     attempt = 0
     local_attempts = 0
     max_local_attempts = 4
-    log_path = "user_data/self_heal_model_switch.log"
-
-    import threading
-    last_attempt = {'val': 0}
-    last_log_time = {'val': time.time()}
-
-    def log_status_bg():
+    log_path = SELF_HEAL_LOG_PATH
+    # Counters shown by the heartbeat; only the main loop updates them
+    fix_count = 0
+    error_count = 0
+    restart_count = 0
+    last_restart = time.strftime('%Y-%m-%d %H:%M:%S')
+    heal_log().info(f"[Launch] Self-healing agent started at {last_restart}")
+
+    def heartbeat_bg():
+        """Status block and watchdog line, written as one log record every 5 seconds."""
         summary_counter = 0
-        fix_count = 0
-        error_count = 0
-        restart_count = 0
-        last_restart = time.strftime('%Y-%m-%d %H:%M:%S')
-        while True:
-            with open(log_path, "a") as f:
-                f.write("\n====================[ SELF-HEAL AGENT STATUS ]====================\n")
-                f.write(f"[LOOP] #{attempt+1} | [Local Attempts] {local_attempts}/{max_local_attempts}\n")
-                if local_attempts < max_local_attempts:
-                    f.write(f"[MODEL] Using local LLM: {os.getenv('AGENT_MODEL', 'deepseek-coder-v2:16b')}\n")
-                else:
-                    f.write("[MODEL] Using Claude fallback\n")
-                f.write(f"[TIME] {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"[RESTARTS] {restart_count} | [LAST RESTART] {last_restart}\n")
-                f.write(f"[FIXES] {fix_count} | [ERRORS] {error_count}\n")
-                f.write("===============================================================\n\n")
-                summary_counter += 1
-                if summary_counter % 10 == 0:
-                    f.write(f"\n[SUMMARY] {time.strftime('%Y-%m-%d %H:%M:%S')} | Total Fixes: {fix_count} | Errors: {error_count} | Restarts: {restart_count}\n\n")
-            last_log_time['val'] = time.time()
-            time.sleep(5)
-
-    def watchdog_bg():
+        last_attempt = attempt
+        last_tick = time.monotonic()
+        next_tick = last_tick
         while True:
-            time.sleep(5)
-            # Check for hang: if attempt hasn't changed in 2 cycles (10s) or log not updated
-            now = time.time()
-            if last_attempt['val'] == attempt and (now - last_log_time['val']) > 10:
-                with open(log_path, "a") as f:
-                    f.write(f"[WATCHDOG WARNING] Possible hang detected at {time.strftime('%Y-%m-%d %H:%M:%S')} (loop {attempt+1})\n")
+            # Sleep to the next 5s boundary so the cadence does not drift
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+            now = time.monotonic()
+            next_tick = max(next_tick + 5, now)
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+            buf = io.StringIO()
+            buf.write("\n====================[ SELF-HEAL AGENT STATUS ]====================\n")
+            buf.write(f"[LOOP] #{attempt+1} | [Local Attempts] {local_attempts}/{max_local_attempts}\n")
+            if local_attempts < max_local_attempts:
+                buf.write(f"[MODEL] Using local LLM: {AGENT_MODEL or 'deepseek-coder-v2:16b'}\n")
+            else:
+                buf.write("[MODEL] Using Claude fallback\n")
+            buf.write(f"[TIME] {stamp}\n")
+            buf.write(f"[RESTARTS] {restart_count} | [LAST RESTART] {last_restart}\n")
+            buf.write(f"[FIXES] {fix_count} | [ERRORS] {error_count}\n")
+            buf.write("===============================================================\n\n")
+            summary_counter += 1
+            if summary_counter % 10 == 0:
+                buf.write(f"\n[SUMMARY] {stamp} | Total Fixes: {fix_count} | Errors: {error_count} | Restarts: {restart_count}\n\n")
+            # Check for hang: attempt unchanged and this tick ran more than a cycle late
+            if last_attempt == attempt and (now - last_tick) > 10:
+                buf.write(f"[WATCHDOG WARNING] Possible hang detected at {stamp} (loop {attempt+1})")
             else:
-                with open(log_path, "a") as f:
-                    f.write(f"[WATCHDOG] Heartbeat OK at {time.strftime('%Y-%m-%d %H:%M:%S')} (loop {attempt+1})\n")
-            last_attempt['val'] = attempt
+                buf.write(f"[WATCHDOG] Heartbeat OK at {stamp} (loop {attempt+1})")
+            heal_log().info(buf.getvalue())
+            last_attempt = attempt
+            last_tick = now
 
-    threading.Thread(target=log_status_bg, daemon=True).start()
-    threading.Thread(target=watchdog_bg, daemon=True).start()
+    threading.Thread(target=heartbeat_bg, daemon=True).start()
 
     while True:
         try:
             mcp = mcp_health_check()
             if not mcp:
-                with open(log_path, "a") as f:
-                    f.write(f"[SELF-HEAL][MCP][{time.strftime('%H:%M:%S')}] MCP unavailable, mutating and retrying...\n")
+                heal_log().info(f"[SELF-HEAL][MCP][{time.strftime('%H:%M:%S')}] MCP unavailable, mutating and retrying...")
                 time.sleep(10)
                 continue
             try:
                 problems = scan_all_project_problems()
             except Exception as e:
-                with open(log_path, "a") as f:
-                    f.write(f"[ERROR][SCAN][{time.strftime('%H:%M:%S')}] scan_all_project_problems failed: {e}\n[SELF-HEAL] Retrying...\n")
+                heal_log().info(f"[ERROR][SCAN][{time.strftime('%H:%M:%S')}] scan_all_project_problems failed: {e}\n[SELF-HEAL] Retrying...")
                 time.sleep(10)
                 continue
             try:
                 mcp.put(PROBLEM_KEY, problems)
             except Exception as e:
-                with open(log_path, "a") as f:
-                    f.write(f"[ERROR][MCP][{time.strftime('%H:%M:%S')}] Failed to put problems: {e}\n[SELF-HEAL] Retrying...\n")
+                heal_log().info(f"[ERROR][MCP][{time.strftime('%H:%M:%S')}] Failed to put problems: {e}\n[SELF-HEAL] Retrying...")
                 time.sleep(10)
                 continue
             if not problems:
                 try:
                     is_runnable = check_project_runnable()
                 except Exception as e:
-                    with open(log_path, "a") as f:
-                        f.write(f"[ERROR][RUNNABLE][{time.strftime('%H:%M:%S')}] check_project_runnable failed: {e}\n[SELF-HEAL] Retrying...\n")
+                    heal_log().info(f"[ERROR][RUNNABLE][{time.strftime('%H:%M:%S')}] check_project_runnable failed: {e}\n[SELF-HEAL] Retrying...")
                     time.sleep(10)
                     continue
                 if is_runnable:
-                    with open(log_path, "a") as f:
-                        f.write(f"[LEARN][{time.strftime('%H:%M:%S')}] No errors found, project is runnable. Entering learning/strategy loop.\n")
+                    heal_log().info(f"[LEARN][{time.strftime('%H:%M:%S')}] No errors found, project is runnable. Entering learning/strategy loop.")
                     try:
                         run_learning_strategy_loop(mcp, log_path)
                     except Exception as e:
-                        with open(log_path, "a") as f:
-                            f.write(f"[ERROR][LEARN][{time.strftime('%H:%M:%S')}] run_learning_strategy_loop failed: {e}\n[SELF-HEAL] Retrying...\n")
+                        heal_log().info(f"[ERROR][LEARN][{time.strftime('%H:%M:%S')}] run_learning_strategy_loop failed: {e}\n[SELF-HEAL] Retrying...")
                     time.sleep(30)
                     continue
                 else:
-                    with open(log_path, "a") as f:
-                        f.write(f"[WARN][{time.strftime('%H:%M:%S')}] No errors found, but project is not runnable.\n")
+                    heal_log().info(f"[WARN][{time.strftime('%H:%M:%S')}] No errors found, but project is not runnable.")
                     time.sleep(30)
                     continue
             context = mcp.get(MEMORY_KEY) or ""
-            prompt = build_llm_prompt(str(problems), attempt + 1, context)
-            if local_attempts < max_local_attempts:
+            report = summarize_problems(problems)
+            prompt = build_llm_prompt(report, attempt + 1, context)
+            # A patch that applied before for the same report is tried before any LLM;
+            # it is taken out here and only put back if it applies again
+            fix_cache = mcp.get(FIX_CACHE_KEY) or {}
+            cache_key = fix_cache_key(report)
+            cached_response = fix_cache.pop(cache_key, None)
+            if cached_response:
+                llm_response = cached_response
+                heal_log().info(f"[PATCH][CACHE][{time.strftime('%H:%M:%S')}] Loop {attempt+1} | Reusing a patch that applied before")
+            # A local endpoint that keeps failing goes straight to the Claude fallback
+            elif local_attempts < max_local_attempts and LOCAL_LLM.breaker.peek():
                 try:
-                    patch = call_local_llm(prompt)
+                    llm_response = call_local_llm(prompt)
                 except Exception as e:
-                    with open(log_path, "a") as f:
-                        f.write(f"[ERROR][LLM][{time.strftime('%H:%M:%S')}] call_local_llm failed: {e}\n[SELF-HEAL] Retrying...\n")
+                    heal_log().info(f"[ERROR][LLM][{time.strftime('%H:%M:%S')}] call_local_llm failed: {e}\n[SELF-HEAL] Retrying...")
                     time.sleep(10)
                     continue
                 local_attempts += 1
-                with open(log_path, "a") as f:
-                    f.write(f"[PATCH][LOCAL][{time.strftime('%H:%M:%S')}] Loop {attempt+1} | Local LLM PATCH attempt {local_attempts}\n")
+                heal_log().info(f"[PATCH][LOCAL][{time.strftime('%H:%M:%S')}] Loop {attempt+1} | Local LLM PATCH attempt {local_attempts}")
             else:
                 try:
-                    patch = call_claude_llm(prompt)
+                    llm_response = call_claude_llm(prompt)
                 except Exception as e:
-                    with open(log_path, "a") as f:
-                        f.write(f"[ERROR][LLM][{time.strftime('%H:%M:%S')}] call_claude_llm failed: {e}\n[SELF-HEAL] Retrying...\n")
+                    heal_log().info(f"[ERROR][LLM][{time.strftime('%H:%M:%S')}] call_claude_llm failed: {e}\n[SELF-HEAL] Retrying...")
                     time.sleep(10)
                     continue
-                with open(log_path, "a") as f:
-                    f.write(f"[PATCH][CLAUDE][{time.strftime('%H:%M:%S')}] Loop {attempt+1} | Claude PATCH fallback\n")
+                heal_log().info(f"[PATCH][CLAUDE][{time.strftime('%H:%M:%S')}] Loop {attempt+1} | Claude PATCH fallback")
+            patch = extract_patch(llm_response) if llm_response else None
             try:
                 mcp.put(
                     ATTEMPT_KEY,
                     {"attempt": attempt + 1, "patch": patch, "problems": problems},
                 )
             except Exception as e:
-                with open(log_path, "a") as f:
-                    f.write(f"[ERROR][MCP][{time.strftime('%H:%M:%S')}] Failed to put attempt: {e}\n[SELF-HEAL] Retrying...\n")
+                heal_log().info(f"[ERROR][MCP][{time.strftime('%H:%M:%S')}] Failed to put attempt: {e}\n[SELF-HEAL] Retrying...")
                 time.sleep(10)
                 continue
-            # Apply patch if not NOOP
-            if patch and patch.strip() != "NOOP":
+            patch_applied = False
+            if patch:
                 try:
-                    # ...apply patch logic here...
-                    logging.info(f"Patch applied on attempt {attempt + 1}.")
-                    with open(log_path, "a") as f:
-                        f.write(f"[FIX][SUCCESS][{time.strftime('%H:%M:%S')}] Patch applied on attempt {attempt+1}\n")
-                    fix_count += 1
+                    patch_applied, output = apply_llm_patch(patch)
+                    mcp.put(f"self_heal:patch:{attempt + 1}", {"patch": patch, "applied": patch_applied, "output": output})
                 except Exception as e:
-                    with open(log_path, "a") as f:
-                        f.write(f"[ERROR][PATCH][{time.strftime('%H:%M:%S')}] Patch application failed: {e}\n[SELF-HEAL] Retrying...\n")
+                    heal_log().info(f"[ERROR][PATCH][{time.strftime('%H:%M:%S')}] Patch application failed: {e}\n[SELF-HEAL] Retrying...")
                     time.sleep(10)
                     continue
+                if patch_applied:
+                    # Most recently applied last, so the oldest entries are evicted first
+                    fix_cache[cache_key] = llm_response
+                    while len(fix_cache) > FIX_CACHE_MAX:
+                        fix_cache.pop(next(iter(fix_cache)))
+                    mcp.put(FIX_CACHE_KEY, fix_cache)
+                    logging.info(f"Patch applied on attempt {attempt + 1}.")
+                    heal_log().info(f"[FIX][SUCCESS][{time.strftime('%H:%M:%S')}] Patch applied on attempt {attempt+1}")
+                    fix_count += 1
+                else:
+                    if cached_response:
+                        # A cached patch that no longer applies stays evicted
+                        mcp.put(FIX_CACHE_KEY, fix_cache)
+                    heal_log().info(f"[FIX][FAILED][{time.strftime('%H:%M:%S')}] Patch rejected on attempt {attempt+1}: {output[:500]}")
+                    error_count += 1
             else:
                 logging.info(f"No patch needed on attempt {attempt + 1}.")
-                # Diagnose why no patch is needed
-                reason = ""
-                if not problems:
-                    reason = "No errors detected in scan."
+                # Diagnose why there is nothing to apply
+                if not llm_response:
+                    reason = "Patch is empty. LLM may have failed to generate a response."
+                elif llm_response.strip() == "NOOP":
+                    reason = "LLM responded with NOOP. It may not see any actionable issues."
                 else:
-                    # Check if patch is empty or LLM failed to generate
-                    if not patch:
-                        reason = "Patch is empty. LLM may have failed to generate a response."
-                    elif patch.strip() == "NOOP":
-                        reason = "LLM responded with NOOP. It may not see any actionable issues."
-                    else:
-                        reason = "Unknown reason."
-                with open(log_path, "a") as f:
-                    f.write(f"[FIX][NOOP][{time.strftime('%H:%M:%S')}] No patch needed on attempt {attempt+1} | Reason: {reason}\n")
+                    reason = "No unified diff found in the LLM response."
+                heal_log().info(f"[FIX][NOOP][{time.strftime('%H:%M:%S')}] No patch needed on attempt {attempt+1} | Reason: {reason}")
+            try:
+                write_status(attempt + 1, problems, patch_applied, llm_response or "")
+            except OSError as e:
+                heal_log().info(f"[ERROR][STATUS][{time.strftime('%H:%M:%S')}] Failed to write status: {e}")
             # Monitoring/logging
             try:
                 logging.info(f"Attempt {attempt + 1} complete. Problems: {problems}")
                 mcp.put(MEMORY_KEY, f"Attempt {attempt + 1} done.")
             except Exception as e:
-                with open(log_path, "a") as f:
-                    f.write(f"[ERROR][MCP][{time.strftime('%H:%M:%S')}] Failed to update memory: {e}\n[SELF-HEAL] Retrying...\n")
+                heal_log().info(f"[ERROR][MCP][{time.strftime('%H:%M:%S')}] Failed to update memory: {e}\n[SELF-HEAL] Retrying...")
             attempt += 1
             time.sleep(10)
         except Exception as e:
-            with open(log_path, "a") as f:
-                f.write(f"[FATAL][{time.strftime('%H:%M:%S')}] Unhandled exception in main loop: {e}\n[SELF-HEAL] Retrying...\n")
+            heal_log().info(f"[FATAL][{time.strftime('%H:%M:%S')}] Unhandled exception in main loop: {e}\n[SELF-HEAL] Retrying...")
             time.sleep(10)
             continue
-    mcp = MCPMemoryClient()
-    # max_retries removed (unused)
-    def write_status(loop, problems, patch_applied, llm_response, mutation_info=None, status_file="user_data/self_heal_status.txt"):
-        import datetime
-        ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(status_file, "w", encoding="utf-8") as f:
-            f.write(f"[Self-Heal Status] {ts}\n")
-            f.write(f"Loop: {loop}\n")
-            f.write(f"Problems: {list(problems.keys()) if problems else 'None'}\n")
-            f.write(f"Patch Applied: {patch_applied}\n")
-            f.write(f"LLM Response: {llm_response[:120].replace('\n',' ')}...\n")
-            if mutation_info:
-                f.write(f"Mutation/Adaptation: {mutation_info}\n")
-
-    # Log launch
-    import datetime
-    launch_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open("user_data/self_heal_launch.log", "a", encoding="utf-8") as f:
-        f.write(f"[Launch] Self-healing agent started at {launch_time}\n")
-
-    loop = 1
-    last_improvement = time.time()
-    last_problems = None
-    import threading
-    def log_in_background():
-        while True:
-            time.sleep(5)
-            try:
-                with open("user_data/self_heal_status.txt", "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                print("[LIVE STATUS] " + lines[-1].strip() if lines else "[LIVE STATUS] (no status)")
-            except Exception:
-                pass
-    t = threading.Thread(target=log_in_background, daemon=True)
-    t.start()
-    # --- Minimum local fixer attempts before fallback ---
-    local_attempts = 0
-    MIN_LOCAL_FIXERS = 4
-    while True:
-        try:
-            problems = scan_problems()
-            mcp.put(PROBLEM_KEY, problems)
-            patch_applied = False
-            mutation_info = None
-            llm_response = ""  # Always define llm_response for logging and patching
-            # Detect improvement
-            if last_problems is not None and problems == last_problems and (time.time() - last_improvement) > 60:
-                print("[MUTATE] No improvement in 60 seconds, forcing mutation and retry...")
-                mutation_info = "Forced mutation due to no improvement in 60 seconds."
-                last_improvement = time.time()
-            elif last_problems is None or problems != last_problems:
-                last_improvement = time.time()
-            last_problems = problems.copy() if problems is not None else None
-            if not problems:
-                msg = f"[OK] All checks passed at loop {loop}. Forcing mutation to continue auto-dev."
-                print(f"\n===== {msg} =====\n")
-                write_status(loop, problems, patch_applied, msg, mutation_info)
-                mutation_info = "No problems found, but continuing mutation for full auto-dev."
-                prompt = "Suggest a random code improvement or refactor for this Python project. Return a patch or instructions."
-            else:
-                print(f"\n===== [LOOP {loop}] Problems found: {list(problems.keys())} =====")
-                short_problems = dict(list(problems.items())[:2])
-                prompt = f"Fix the following problems in the codebase:\n{short_problems}\nReturn a patch or instructions."
-
-            # --- LLM PATCHING: Try local Ollama at least 4 times before fallback ---
-            import os
-            import requests
-            agent_model = os.getenv("AGENT_MODEL") or "deepseek-coder-v2:16b"
-            ollama_url = "http://127.0.0.1:11434/api/chat"
-            ollama_payload = {
-                "model": agent_model,
-                "messages": [
-                    {"role": "system", "content": "You are an expert Python developer and code fixer."},
-                    {"role": "user", "content": prompt},
-                ],
-                "options": {"temperature": 0.3, "num_ctx": 2048, "top_p": 0.95},
-                "stream": False
-            }
-            anthropic_key = os.getenv("ANTHROPIC_API_KEY") or os.getenv("OPENAI_API_KEY")
-            anthropic_url = os.getenv("ANTHROPIC_API_URL", "https://api.anthropic.com/v1/messages")
-            fallback_needed = False
-            # Try local Ollama up to MIN_LOCAL_FIXERS times before fallback
-            for local_try in range(MIN_LOCAL_FIXERS):
-                try:
-                    resp = requests.post(ollama_url, json=ollama_payload, timeout=90)
-                    resp.raise_for_status()
-                    llm_response = resp.json().get("message", {}).get("content", "")
-                    if llm_response and not llm_response.startswith("[ERROR]"):
-                        print(f"[LLM PATCH][LOCAL-{local_try+1}] {llm_response[:120].replace('\n',' ')}...")
-                        break
-                except Exception as e:
-                    print(f"[LLM PATCH][LOCAL-{local_try+1}] Ollama error: {e}")
-                    llm_response = f"[ERROR] Ollama LLM call failed: {e}"
-                time.sleep(2)
-            else:
-                fallback_needed = True
-
-            # If still no good response, fallback to Claude
-            if (not llm_response or llm_response.startswith("[ERROR]") or fallback_needed) and anthropic_key:
-                llm_url = anthropic_url
-                llm_headers = {
-                    "x-api-key": anthropic_key,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json"
-                }
-                llm_payload = {
-                    "model": os.getenv("AGENT_MODEL", "claude-3-5-sonnet-20241022"),
-                    "max_tokens": 1024,
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ]
-                }
-                try:
-                    resp = requests.post(llm_url, headers=llm_headers, json=llm_payload, timeout=90)
-                    resp.raise_for_status()
-                    llm_response = resp.json().get("content", [{}])[0].get("text", "")
-                    print(f"[LLM PATCH][CLAUDE] {llm_response[:120].replace('\n',' ')}...")
-                except Exception as e:
-                    llm_response = f"[ERROR] Claude LLM call failed: {e}"
-
-            mcp.put(ATTEMPT_KEY, {"loop": loop, "problems": problems, "prompt": prompt, "llm_response": llm_response})
-            print(f"[LLM PATCH] {llm_response[:120].replace('\n',' ')}...")
-
-            # --- PATCH APPLICATION ---
-            import subprocess
-            if "*** Begin Patch" in llm_response and "*** End Patch" in llm_response:
-                patch = llm_response.split("*** Begin Patch", 1)[1].split("*** End Patch")[0]
-                patch = "*** Begin Patch\n" + patch.strip() + "\n*** End Patch"
-                patch_file = f"user_data/llm_patch_{loop}.diff"
-                with open(patch_file, "w", encoding="utf-8") as f:
-                    f.write(patch)
-                # Try to apply patch using git
-                apply_cmd = f"git apply --whitespace=fix {patch_file}"
-                result = subprocess.run(apply_cmd, shell=True, capture_output=True, text=True)
-                patch_applied = result.returncode == 0
-                mutation_info = f"Patch file: {patch_file}, Applied: {patch_applied}, Stdout: {result.stdout.strip()}, Stderr: {result.stderr.strip()}"
-                mcp.put(
-                    f"self_heal:patch:{loop}",
-                    {
-                        "patch": patch,
-                        "applied": patch_applied,
-                        "stdout": result.stdout,
-                        "stderr": result.stderr,
-                    },
-                )
-                print(f"[PATCH] Applied: {patch_applied}, stdout: {result.stdout.strip()}, stderr: {result.stderr.strip()}")
-            else:
-                print("[WARN] No valid patch found in LLM response.")
-
-            # --- VERIFICATION & STATUS ---
-            write_status(loop, problems, patch_applied, llm_response, mutation_info)
-            if patch_applied:
-                print("[VERIFY] Re-scanning after patch...")
-                time.sleep(2)
-            else:
-                print("[WAIT] No patch or patch failed, waiting before retry/mutation...")
-                time.sleep(10)
-        except Exception as e:
-            print(f"[ERROR] Exception in auto loop: {e}")
-            mutation_info = f"Exception: {e} (auto-survive)"
-            write_status(loop, {}, False, str(e), mutation_info)
-            time.sleep(10)
-        loop += 1
-
-        # --- LLM PATCHING: Claude 3.5 (Anthropic) or Ollama ---
-        import os
-        anthropic_key = os.getenv("ANTHROPIC_API_KEY") or os.getenv("OPENAI_API_KEY")
-        anthropic_url = os.getenv("ANTHROPIC_API_URL", "https://api.anthropic.com/v1/messages")
-        agent_model = os.getenv("AGENT_MODEL", "llama3:instruct")
-        # 1. Try Ollama first
-        llm_response = None
-        ollama_url = "http://127.0.0.1:11434/api/chat"
-        ollama_payload = {
-            "model": agent_model,
-            "messages": [
-                {"role": "system", "content": "You are an expert Python developer and code fixer."},
-                {"role": "user", "content": prompt},
-            ],
-            "options": {"temperature": 0.3, "num_ctx": 4096, "top_p": 0.95},
-            "stream": False
-        }
-        try:
-            resp = requests.post(ollama_url, json=ollama_payload, timeout=120)
-            resp.raise_for_status()
-            llm_response = resp.json()["message"]["content"]
-        except Exception as e:
-            llm_response = f"[ERROR] Ollama LLM call failed: {e}"
-
-        # 2. If Ollama fails or response is empty/error, try Claude if available
-        fallback_needed = (
-            not llm_response or
-            llm_response.startswith("[ERROR]") or
-            "not supported" in llm_response.lower() or
-            "i don't know" in llm_response.lower() or
-            "error" in llm_response.lower()
-        )
-        if fallback_needed and anthropic_key:
-            llm_url = anthropic_url
-            llm_headers = {
-                "x-api-key": anthropic_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json"
-            }
-            llm_payload = {
-                "model": os.getenv("AGENT_MODEL", "claude-3-5-sonnet-20241022"),
-                "max_tokens": 1024,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ]
-            }
-            try:
-                resp = requests.post(llm_url, headers=llm_headers, json=llm_payload, timeout=120)
-                resp.raise_for_status()
-                llm_response = resp.json()["content"][0]["text"]
-            except Exception as e:
-                llm_response = f"[ERROR] Claude LLM call failed: {e}"
-        mcp.put(ATTEMPT_KEY, {"loop": loop, "problems": problems, "prompt": prompt, "llm_response": llm_response})
-        print(f"[LLM PATCH] {llm_response[:120].replace('\n',' ')}...")
-
-        # --- PATCH APPLICATION ---
-        if "*** Begin Patch" in llm_response and "*** End Patch" in llm_response:
-            patch = llm_response.split("*** Begin Patch", 1)[1].split("*** End Patch")[0]
-            patch = "*** Begin Patch\n" + patch.strip() + "\n*** End Patch"
-            patch_file = f"user_data/llm_patch_{loop}.diff"
-            with open(patch_file, "w", encoding="utf-8") as f:
-                f.write(patch)
-            # Try to apply patch using git
-            apply_cmd = f"git apply --whitespace=fix {patch_file}"
-            result = subprocess.run(apply_cmd, shell=True, capture_output=True, text=True)
-            patch_applied = result.returncode == 0
-            mutation_info = f"Patch file: {patch_file}, Applied: {patch_applied}, Stdout: {result.stdout.strip()}, Stderr: {result.stderr.strip()}"
-            mcp.put(
-                f"self_heal:patch:{loop}",
-                {
-                    "patch": patch,
-                    "applied": patch_applied,
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
-                },
-            )
-            print(f"[PATCH] Applied: {patch_applied}, stdout: {result.stdout.strip()}, stderr: {result.stderr.strip()}")
-        else:
-            print("[WARN] No valid patch found in LLM response.")
-
-        # --- VERIFICATION & STATUS ---
-        write_status(loop, problems, patch_applied, llm_response, mutation_info)
-        if patch_applied:
-            print("[VERIFY] Re-scanning after patch...")
-            time.sleep(2)
-            continue  # Next loop will re-scan and retry if needed
-        else:
-            print("[WAIT] No patch or patch failed, waiting before retry...")
-            time.sleep(10)
-    print("\n===== [DONE] Self-healing loop complete. =====\n")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     main()
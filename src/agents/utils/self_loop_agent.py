@@ -1,15 +1,29 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import contextlib
+import functools
+import io
 import json
+import logging
 import os
 import re
 import subprocess
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import BinaryIO, Dict, Iterable, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional: pip install .[performance]
+    orjson = None
 
 # Import MCPMemoryClient for persistent memory
 from agents.mcp_memory_client import MCPMemoryClient
@@ -18,9 +32,52 @@ DEFAULT_MODEL = os.getenv("AGENT_MODEL", "meta-llama-3.1-8b-instruct")
 OPENAI_BASE = os.getenv("OPENAI_API_BASE", "http://127.0.0.1:1234/v1").rstrip("/")
 OPENAI_KEY = os.getenv("OPENAI_API_KEY", "lm-studio")
 
+# Seconds to wait for the LLM server between bytes; the local 8B model can be slow
+# on the growing memory prompt, so lower it only via AGENT_LLM_TIMEOUT/--llm-timeout
+LLM_CONNECT_TIMEOUT = 3.0
+LLM_TIMEOUT = float(os.getenv("AGENT_LLM_TIMEOUT", "120"))
+# Retry dropped connections, timeouts and 429/5xx twice, the second time after 2s
+# (urllib3 retries the first failure at once)
+_RETRY = Retry(
+    total=2,
+    backoff_factor=1.0,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=None,
+    raise_on_status=False,
+)
+
+# Keep-alive session reused by every loop iteration's LLM call
+_SESSION = requests.Session()
+_SESSION.headers.update(
+    {"Authorization": f"Bearer {OPENAI_KEY}", "Content-Type": "application/json"}
+)
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_RETRY))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_RETRY))
+
 STRATEGY_NAME = "SimpleAlwaysBuySell"
 STRATEGY_DIR = Path("strategies")
 STRATEGY_FILE = STRATEGY_DIR / f"{STRATEGY_NAME}.py"
+# Set by _ensure_strategy_exists once the strategy package is on disk
+_STRATEGY_READY = False
+# Shared decoder for pulling the first JSON value out of model output.
+_JSON_DECODER = json.JSONDecoder()
+# Open handles for the LLM payload/response and loop progress logs
+_LOG_HANDLES: dict[str, BinaryIO] = {}
+# Lines of backtest output kept for the console tail and summary fallback.
+BACKTEST_TAIL_LINES = 50
+SUMMARY_FALLBACK_LINES = 20
+# Text of the last summary written by _write_summary; later loops read it
+# from here instead of re-reading backtest_result.log
+_LAST_SUMMARY: Optional[str] = None
+# Human-readable progress log; shares the buffered handles of _append_log
+LOOP_LOG = "user_data/learning_loop.log"
+# freqtrade's stderr (logging, progress bars) for the latest backtest
+BACKTEST_STDERR_LOG = "user_data/backtest_stderr.log"
+# Skip download-data when the newest candle file is younger than this (seconds).
+DATA_MAX_AGE = 3600
+
+# Every log, summary and stderr file below lives here; create it once up front
+Path("user_data").mkdir(exist_ok=True)
 
 BASELINE_STRATEGY = (
     "from freqtrade.strategy.interface import IStrategy\n"
@@ -39,6 +96,9 @@ BASELINE_STRATEGY = (
     '        dataframe["sell"] = 1\n'
     "        return dataframe\n"
 )
+# Only these two assignments are rewritten; the rest of the strategy is kept as is
+_MINIMAL_ROI_RE = re.compile(r"minimal_roi\s*=\s*\{[^}]*\}", re.S)
+_STOPLOSS_RE = re.compile(r"stoploss\s*=\s*[-]?\d+\.\d+")
 
 DEFAULT_PROMPT = (
     "You are a JSON API that responds only with valid JSON. Your task is to generate Freqtrade trading parameters.\n\n"
@@ -53,6 +113,7 @@ DEFAULT_PROMPT = (
 )
 
 
+@functools.lru_cache(maxsize=1)
 def _detect_freqtrade() -> str:
     venv_ft = Path(".venv/bin/freqtrade")
     if venv_ft.exists():
@@ -60,12 +121,83 @@ def _detect_freqtrade() -> str:
     return "freqtrade"
 
 
-def _llm_chat_json(prompt: str) -> Dict[str, float]:
+FALLBACK_PARAMS: Dict[str, float] = {"minimal_roi_0": 0.012, "stoploss": -0.11}
+# Completion budget per requested parameter object
+TOKENS_PER_PROPOSAL = 48
+# Request OpenAI-style JSON mode; cleared if the server rejects response_format
+_JSON_MODE = True
+
+
+def _append_log(path: str, data: bytes) -> None:
+    # Handles stay open in append mode for the life of the process instead of
+    # being reopened per call; every record is flushed so a crash loses nothing.
+    handle = _LOG_HANDLES.get(path)
+    if handle is None:
+        handle = _LOG_HANDLES[path] = open(path, "ab")
+        atexit.register(handle.close)
+    handle.write(data)
+    handle.flush()
+
+
+def _loop_log(*lines: str) -> None:
+    _append_log(LOOP_LOG, "".join(f"{line}\n" for line in lines).encode("utf-8"))
+
+
+def _log_raw_response(prompt: str, response: str) -> None:
+    # One JSON object per line, like llm_payload.log: embedded newlines are
+    # escaped, so each record is framed by its line and parses on its own
+    record = {"ts": time.time(), "prompt": prompt, "response": response}
+    _append_log("user_data/llm_raw_response.log", _dumps(record) + b"\n")
+
+
+def _dumps(data: object) -> bytes:
+    """Encode a request body (and its log line) to UTF-8 JSON bytes in one pass."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(raw: str | bytes) -> object:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _read_streamed_content(resp: requests.Response) -> str:
+    """Accumulate streamed (SSE) delta content, stopping once the first JSON value closes.
+
+    The model only needs to emit a small JSON value, so the connection is
+    released as soon as its braces/brackets balance instead of waiting for
+    the model's natural stop.
+    """
+    parts: list[str] = []
+    depth = 0
+    started = False
+    for raw in resp.iter_lines():
+        line = raw.decode("utf-8", errors="replace")
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            delta = _loads(data)["choices"][0].get("delta", {}).get("content") or ""  # type: ignore[index]
+        except (ValueError, KeyError, IndexError, TypeError):
+            continue
+        parts.append(delta)
+        for ch in delta:
+            if ch in "{[":
+                depth += 1
+                started = True
+            elif ch in "}]" and started:
+                depth -= 1
+        if started and depth <= 0:
+            break
+    return "".join(parts)
+
+
+def _llm_chat_content(prompt: str, max_tokens: int = TOKENS_PER_PROPOSAL) -> Optional[str]:
+    """Send one chat completion request; return the message content or None on HTTP errors."""
+    global _JSON_MODE
     url = f"{OPENAI_BASE}/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {OPENAI_KEY}",
-        "Content-Type": "application/json",
-    }
     # Use system/user message structure for better results
     system_prompt = "You are a JSON API. Follow instructions exactly and respond only with valid JSON."
     payload: dict[str, object] = {
@@ -76,62 +208,145 @@ def _llm_chat_json(prompt: str) -> Dict[str, float]:
         ],
         "temperature": 0.4,  # Lower temperature for more consistent JSON output
         "top_p": 0.95,
-        "max_tokens": 128,
+        "max_tokens": max_tokens,
+        "stream": True,
     }
-    # Log the payload for debugging and reproducibility
-    os.makedirs("user_data", exist_ok=True)
-    with open("user_data/llm_payload.log", "a", encoding="utf-8") as f:
-        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    if _JSON_MODE:
+        # Constrains decoding to a JSON object, so no prose needs skipping
+        payload["response_format"] = {"type": "json_object"}
+    # Encoded once: the same bytes are logged and sent
+    body = _dumps(payload)
+    _append_log("user_data/llm_payload.log", body + b"\n")
     try:
-        resp = requests.post(
-            url, headers=headers, data=json.dumps(payload), timeout=120
-        )
-        resp.raise_for_status()
-        content: str = resp.json()["choices"][0]["message"]["content"]
+        with _SESSION.post(
+            url, data=body, timeout=(LLM_CONNECT_TIMEOUT, LLM_TIMEOUT), stream=True
+        ) as resp:
+            if resp.status_code == 400 and _JSON_MODE:
+                # Server without JSON mode support; fall back to plain prompting
+                _JSON_MODE = False
+                resp.close()  # free the connection before retrying
+                return _llm_chat_content(prompt, max_tokens)
+            resp.raise_for_status()
+            # Servers that ignore "stream" answer with a plain JSON body
+            if resp.headers.get("Content-Type", "").startswith("text/event-stream"):
+                content = _read_streamed_content(resp)
+            else:
+                content = _loads(resp.content)["choices"][0]["message"]["content"]  # type: ignore[index]
         # Log the raw LLM response for debugging
-        with open("user_data/llm_raw_response.log", "a", encoding="utf-8") as f:
-            f.write(f"Prompt: {prompt}\nResponse: {content}\n\n")
-    except requests.RequestException:
-        with open("user_data/llm_raw_response.log", "a", encoding="utf-8") as f:
-            f.write(f"Prompt: {prompt}\nResponse: <RequestException>\n\n")
-        return {"minimal_roi_0": 0.012, "stoploss": -0.11}
-    match = re.search(r"\{.*?\}", content, re.S)
-    if not match:
-        with open("user_data/llm_raw_response.log", "a", encoding="utf-8") as f:
-            f.write(f"Prompt: {prompt}\nResponse: {content} (no JSON found)\n\n")
-        return {"minimal_roi_0": 0.012, "stoploss": -0.11}
-    try:
-        data = json.loads(match.group(0))
-        m0 = float(data.get("minimal_roi_0", 0.012))
-        sl = float(data.get("stoploss", -0.11))
-    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
-        with open("user_data/llm_raw_response.log", "a", encoding="utf-8") as f:
-            f.write(f"Prompt: {prompt}\nResponse: {content} (JSON decode error)\n\n")
-        return {"minimal_roi_0": 0.012, "stoploss": -0.11}
+        _log_raw_response(prompt, content)
+    except (requests.RequestException, ValueError):
+        _log_raw_response(prompt, "<RequestException>")
+        return None
+    return content
+
+
+def _clamp_params(data: Dict[str, object]) -> Dict[str, float]:
+    m0 = float(data.get("minimal_roi_0", 0.012))  # type: ignore[arg-type]
+    sl = float(data.get("stoploss", -0.11))  # type: ignore[arg-type]
     m0 = max(0.001, min(m0, 0.10))
     sl = max(-0.30, min(sl, -0.01))
     return {"minimal_roi_0": m0, "stoploss": sl}
 
 
+def _first_json(text: str, opener: str) -> object:
+    """Decode the first complete JSON value starting at an ``opener`` ("{" or "[").
+
+    raw_decode walks nested braces and quoted strings in C, so nested
+    objects are handled and no pattern is compiled per call. Returns None
+    if no candidate decodes.
+    """
+    start = text.find(opener)
+    while start != -1:
+        try:
+            return _JSON_DECODER.raw_decode(text, start)[0]
+        except json.JSONDecodeError:
+            start = text.find(opener, start + 1)
+    return None
+
+
+def _llm_chat_json(prompt: str) -> Dict[str, float]:
+    content = _llm_chat_content(prompt)
+    if content is None:
+        return dict(FALLBACK_PARAMS)
+    data = _first_json(content, "{")
+    if not isinstance(data, dict):
+        _log_raw_response(prompt, f"{content} (no JSON found)")
+        return dict(FALLBACK_PARAMS)
+    try:
+        return _clamp_params(data)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        _log_raw_response(prompt, f"{content} (JSON decode error)")
+        return dict(FALLBACK_PARAMS)
+
+
+def _llm_chat_json_batch(prompt: str, n: int) -> list[Dict[str, float]]:
+    """Ask for n parameter proposals in a single request (one prefill, one round-trip)."""
+    if n <= 1:
+        return [_llm_chat_json(prompt)]
+    batch_prompt = (
+        f'{prompt}\n\nInstead of a single object, return {{"proposals": [...]}} holding '
+        f"{n} different objects, each with keys minimal_roi_0 and stoploss."
+    )
+    content = _llm_chat_content(batch_prompt, max_tokens=TOKENS_PER_PROPOSAL * n)
+    if content is None:
+        return [dict(FALLBACK_PARAMS)]
+    items = _first_json(content, "[")
+    if not isinstance(items, list):
+        _log_raw_response(batch_prompt, f"{content} (no JSON array found)")
+        return [dict(FALLBACK_PARAMS)]
+    try:
+        proposals = [_clamp_params(x) for x in items if isinstance(x, dict)][:n]
+    except (KeyError, TypeError, ValueError):
+        _log_raw_response(batch_prompt, f"{content} (JSON decode error)")
+        return [dict(FALLBACK_PARAMS)]
+    return proposals or [dict(FALLBACK_PARAMS)]
+
+
 def _ensure_strategy_exists() -> None:
+    global _STRATEGY_READY
+    # Checked once per process; re-entering main() skips the mkdir/stat calls
+    if _STRATEGY_READY:
+        return
     STRATEGY_DIR.mkdir(parents=True, exist_ok=True)
     init_py = STRATEGY_DIR / "__init__.py"
     if not init_py.exists():
         init_py.write_text("", encoding="utf-8")
     if not STRATEGY_FILE.exists():
         STRATEGY_FILE.write_text(BASELINE_STRATEGY, encoding="utf-8")
+    _STRATEGY_READY = True
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    # Write beside the target and rename over it, so a concurrently started
+    # freqtrade never imports a half-written strategy
+    tmp = path.with_suffix(".py.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _patch_params(txt: str, min_roi_0: float, stoploss: float) -> str:
+    txt = _MINIMAL_ROI_RE.sub(f'minimal_roi = {{"0": {min_roi_0:.3f}}}', txt)
+    return _STOPLOSS_RE.sub(f"stoploss = {stoploss:.2f}", txt)
 
 
 def _mutate_strategy(min_roi_0: float, stoploss: float) -> None:
     txt = STRATEGY_FILE.read_text(encoding="utf-8")
-    txt = re.sub(
-        r"minimal_roi\s*=\s*\{[^}]*\}",
-        f'minimal_roi = {{"0": {min_roi_0:.3f}}}',
-        txt,
-        flags=re.S,
-    )
-    txt = re.sub(r"stoploss\s*=\s*[-]?\d+\.\d+", f"stoploss = {stoploss:.2f}", txt)
-    STRATEGY_FILE.write_text(txt, encoding="utf-8")
+    _write_atomic(STRATEGY_FILE, _patch_params(txt, min_roi_0, stoploss))
+
+
+def _data_fresh(config: str, timeframe: str, max_age: float = DATA_MAX_AGE) -> bool:
+    """True when candle files for ``timeframe`` were written within ``max_age`` seconds."""
+    try:
+        with open(config, encoding="utf-8") as fh:
+            cfg = json.load(fh)
+    except (OSError, ValueError):
+        return False
+    exchange = cfg.get("exchange", {}).get("name")
+    if not exchange:
+        return False
+    datadir = Path(cfg.get("datadir") or Path("user_data/data") / exchange)
+    mtimes = [p.stat().st_mtime for p in datadir.glob(f"*-{timeframe}*.feather")]
+    return bool(mtimes) and max(mtimes) > time.time() - max_age
 
 
 def _download_data(freqtrade_bin: str, config: str, timeframe: str, verbosity: int = 0) -> None:
@@ -148,7 +363,92 @@ def _download_data(freqtrade_bin: str, config: str, timeframe: str, verbosity: i
     subprocess.run(cmd, check=False)
 
 
-def _backtest(
+def _collect_summary(lines: Iterable[str]) -> tuple[list[str], deque[str]]:
+    """Pick the STRATEGY SUMMARY block out of backtest output as it streams past.
+
+    Only the summary and the last BACKTEST_TAIL_LINES lines are kept.
+    """
+    summary_lines: list[str] = []
+    tail: deque[str] = deque(maxlen=BACKTEST_TAIL_LINES)
+    in_summary = done = False
+    for line in lines:
+        line = line.rstrip("\n")
+        tail.append(line)
+        if done:
+            continue
+        if "STRATEGY SUMMARY" in line:
+            in_summary = True
+        if in_summary:
+            summary_lines.append(line)
+            done = line.strip().startswith("└")
+    return summary_lines, tail
+
+
+def _write_summary(summary_lines: list[str], tail: Iterable[str]) -> None:
+    # Write summary to user_data/backtest_result.log
+    # Fallback: if no summary, write the last SUMMARY_FALLBACK_LINES lines
+    global _LAST_SUMMARY
+    if not summary_lines:
+        summary_lines = list(deque(tail, maxlen=SUMMARY_FALLBACK_LINES))
+    _LAST_SUMMARY = "\n".join(summary_lines) + "\n"
+    with open("user_data/backtest_result.log", "w", encoding="utf-8") as f:
+        f.write(_LAST_SUMMARY)
+    # Log the summary action
+    _loop_log("[BACKTEST] Summary written to backtest_result.log")
+
+
+class _InProcessBacktester:
+    """Keeps one freqtrade Backtesting instance (and its loaded candles) across loops.
+
+    Parameters are applied to the loaded strategy object instead of the
+    strategy file, so no interpreter start-up or data load is repeated.
+    """
+
+    def __init__(self, config: str, strategy: str, timeframe: str, timerange: str) -> None:
+        # Imported lazily: only --in-process needs freqtrade importable here.
+        from freqtrade.configuration import Configuration
+        from freqtrade.enums import RunMode
+        from freqtrade.optimize.backtesting import Backtesting
+
+        args = {
+            "config": [config],
+            "strategy": strategy,
+            "strategy_path": str(STRATEGY_DIR),
+            "timeframe": timeframe,
+            "timerange": timerange,
+            "cache": "none",
+        }
+        self.config = Configuration(args, RunMode.BACKTEST).get_config()
+        self.bt = Backtesting(self.config)
+        self.data, self.timerange = self.bt.load_bt_data()
+
+    def run(self, min_roi_0: float, stoploss: float) -> bool:
+        from freqtrade.optimize.optimize_reports import (
+            generate_backtest_stats,
+            show_backtest_results,
+        )
+
+        strat = self.bt.strategylist[0]
+        strat.minimal_roi = {0: min_roi_0}
+        strat.stoploss = stoploss
+        self.bt.all_results = {}
+        buf = io.StringIO()
+        try:
+            min_date, max_date = self.bt.backtest_one_strategy(strat, self.data, self.timerange)
+            stats = generate_backtest_stats(self.data, self.bt.all_results, min_date, max_date)
+            with contextlib.redirect_stdout(buf):
+                show_backtest_results(self.config, stats)
+        except Exception as exc:
+            print(f"[BT] In-process backtest failed: {exc}")
+            _loop_log("[BACKTEST] Backtest failed, no summary written.")
+            return False
+        output = buf.getvalue()
+        print(output[-1500:])
+        _write_summary(*_collect_summary(io.StringIO(output)))
+        return True
+
+
+def _backtest_cmd(
     freqtrade_bin: str,
     config: str,
     strategy: str,
@@ -156,7 +456,7 @@ def _backtest(
     timerange: str,
     verbosity: int = 0,
     export_trades: bool = False,
-) -> bool:
+) -> list[str]:
     cmd = [
         freqtrade_bin,
         "backtesting",
@@ -185,43 +485,156 @@ def _backtest(
     # Add export trades if requested
     if export_trades:
         cmd.extend(["--export", "trades"])
+    return cmd
+
+
+def _file_tail(path: str | Path, nbytes: int = 800) -> str:
+    # Read only the last nbytes of a (possibly large) log file
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - nbytes))
+        return f.read().decode("utf-8", errors="replace")
+
+
+def _backtest(
+    freqtrade_bin: str,
+    config: str,
+    strategy: str,
+    timeframe: str,
+    timerange: str,
+    verbosity: int = 0,
+    export_trades: bool = False,
+) -> bool:
+    cmd = _backtest_cmd(
+        freqtrade_bin, config, strategy, timeframe, timerange, verbosity, export_trades
+    )
     print("[BT]", " ".join(cmd))
-    try:
-        proc = subprocess.run(
-            cmd, check=True, capture_output=True, text=True, encoding="utf-8"
-        )
-        tail = proc.stdout[-1500:]
-        print(tail)
-        # Extract and write summary to user_data/backtest_result.log
-        summary_lines: list[str] = []
-        in_summary = False
-        for line in proc.stdout.splitlines():
-            if "STRATEGY SUMMARY" in line:
-                in_summary = True
-            if in_summary:
-                summary_lines.append(line)
-                if line.strip().startswith("└"):
-                    break
-        # Fallback: if no summary, write last 20 lines
-        if not summary_lines:
-            summary_lines = proc.stdout.splitlines()[-20:]
-        os.makedirs("user_data", exist_ok=True)
-        with open("user_data/backtest_result.log", "w", encoding="utf-8") as f:
-            f.write("\n".join(summary_lines) + "\n")
-        # Log the summary action
-        with open("user_data/learning_loop.log", "a", encoding="utf-8") as flog:
-            flog.write("[BACKTEST] Summary written to backtest_result.log\n")
-        return True
-    except subprocess.CalledProcessError as exc:
-        print(exc.stdout[-1200:])
-        print(exc.stderr[-800:])
+    # Stream stdout so only the summary and a short tail are held in memory;
+    # freqtrade's log/progress output on stderr goes straight to a file
+    with open(BACKTEST_STDERR_LOG, "wb") as err, subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=err,
+        text=True,
+        encoding="utf-8",
+        bufsize=1,
+    ) as proc:
+        summary_lines, tail = _collect_summary(proc.stdout)  # type: ignore[arg-type]
+    print("\n".join(tail))
+    if proc.returncode != 0:
+        print(_file_tail(BACKTEST_STDERR_LOG))
         # Log failure
-        with open("user_data/learning_loop.log", "a", encoding="utf-8") as flog:
-            flog.write("[BACKTEST] Backtest failed, no summary written.\n")
+        _loop_log("[BACKTEST] Backtest failed, no summary written.")
         return False
+    _write_summary(summary_lines, tail)
+    return True
+
+
+def _worker_files(pid: int) -> tuple[Path, Path]:
+    """Strategy copy and stderr log a pool worker with this pid writes."""
+    return STRATEGY_DIR / f"{STRATEGY_NAME}_{pid}.py", Path(f"user_data/backtest_stderr_{pid}.log")
+
+
+def _backtest_worker(
+    freqtrade_bin: str,
+    config: str,
+    timeframe: str,
+    timerange: str,
+    min_roi_0: float,
+    stoploss: float,
+    verbosity: int = 0,
+    export_trades: bool = False,
+) -> tuple[bool, list[str], list[str], int]:
+    """Backtest one proposal in a pool worker using a strategy file private to this pid.
+
+    Returns (ok, summary_lines, tail, pid); printing and summary writing stay in
+    the parent, which removes the worker's files via _worker_files(pid) at the end.
+    """
+    pid = os.getpid()
+    strategy = f"{STRATEGY_NAME}_{pid}"
+    strategy_path, err_path = _worker_files(pid)
+    source = _patch_params(STRATEGY_FILE.read_text(encoding="utf-8"), min_roi_0, stoploss)
+    _write_atomic(
+        strategy_path,
+        source.replace(f"class {STRATEGY_NAME}(", f"class {strategy}(", 1),
+    )
+    cmd = _backtest_cmd(
+        freqtrade_bin, config, strategy, timeframe, timerange, verbosity, export_trades
+    )
+    with open(err_path, "wb") as err, subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=err,
+        text=True,
+        encoding="utf-8",
+        bufsize=1,
+    ) as proc:
+        summary_lines, tail = _collect_summary(proc.stdout)  # type: ignore[arg-type]
+    if proc.returncode != 0:
+        tail.append(_file_tail(err_path))
+    return proc.returncode == 0, summary_lines, list(tail), pid
+
+
+def _build_prompt(
+    spec: str, short_term_memory: Iterable[str], long_term_text: str, window: int
+) -> str:
+    # Build prompt with both short- and long-term memory; the long-term block
+    # arrives pre-joined since it only ever grows at the end
+    if not short_term_memory:
+        return spec
+    return (
+        f"You are improving a Freqtrade strategy in Python called {STRATEGY_NAME}.\n"
+        "Only suggest SMALL numeric tweaks to either or both of:\n"
+        '- minimal_roi (dict like {"0": float})\n'
+        "- stoploss (negative float between -0.30 and -0.01).\n\n"
+        "Return STRICT JSON only with keys: minimal_roi_0 (float), stoploss (float).\n"
+        "Do not include text outside the JSON.\n\n"
+        f"Short-term memory (last {window} summaries):\n"
+        + "\n---\n".join(short_term_memory)
+        + "\n\n"
+        "Long-term memory (all summaries so far):\n"
+        + long_term_text
+        + "\n"
+    )
+
+
+def _log_prompt(
+    loop_id: int, prompt: str, short_term_memory: Iterable[str], long_term_memory: list[str]
+) -> None:
+    _loop_log(
+        f"LOOP {loop_id} PROMPT:\n{prompt}",
+        f"LOOP {loop_id} SHORT_TERM_MEMORY: {list(short_term_memory)}",
+        f"LOOP {loop_id} LONG_TERM_MEMORY: {long_term_memory}",
+    )
+
+
+def _propose(prompt: str, loop_id: int, n: int = 1) -> list[dict[str, float]]:
+    # Retry logic for LLM failures
+    max_retries = 3
+    recs: list[dict[str, float]] = [dict(FALLBACK_PARAMS)]
+    for attempt in range(max_retries):
+        recs_raw = _llm_chat_json_batch(prompt, n)
+        try:
+            recs = [
+                {
+                    "minimal_roi_0": float(r.get("minimal_roi_0", 0.012)),
+                    "stoploss": float(r.get("stoploss", -0.11)),
+                }
+                for r in recs_raw
+            ]
+            break
+        except Exception:
+            _loop_log(f"LOOP {loop_id} LLM RETRY {attempt+1}: {recs_raw}")
+            time.sleep(2)
+    else:
+        # If all retries fail, log and use fallback values
+        _loop_log(f"LOOP {loop_id} LLM ALL RETRIES FAILED, using fallback values.")
+        # recs is already set to fallback values
+    return recs
 
 
 def main(argv: Optional[list[str]] = None) -> int:
+    global LLM_TIMEOUT
     parser = argparse.ArgumentParser(description="self loop agent")
     parser.add_argument("--config", default="user_data/config.json")
     parser.add_argument("--max-loops", type=int, default=1)
@@ -245,107 +658,193 @@ def main(argv: Optional[list[str]] = None) -> int:
         "--disable-memory", action="store_true", default=False,
         help="Disable MCP memory features to avoid connection errors when memory server isn't running."
     )
+    # Opt-in: overlap the next loop's LLM call with the current backtest
+    parser.add_argument(
+        "--prefetch", action=argparse.BooleanOptionalAction, default=False,
+        help="Request the next loop's proposal while the current backtest runs. Its prompt then "
+        "misses the current backtest's result, so feedback lags one loop (off by default)."
+    )
+    # Opt-in: ask for several proposals per LLM call and drain them across loops
+    parser.add_argument(
+        "--batch-size", type=int, default=1,
+        help="Parameter proposals requested per LLM call (capped at the remaining loops). Above 1, "
+        "later proposals of a batch are not informed by the earlier ones' backtests."
+    )
+    # Keep freqtrade and the candle data loaded in this process across loops
+    parser.add_argument(
+        "--in-process", action="store_true", default=False,
+        help="Run backtests through freqtrade's Backtesting class in this process, loading data once "
+        "(requires freqtrade importable here; --export-trades is ignored)."
+    )
+    # Opt-in: fan queued proposals (--batch-size > 1) out to worker processes
+    parser.add_argument(
+        "--jobs", type=int, default=1,
+        help="Backtest up to this many queued proposals concurrently, each against its own temporary "
+        "strategy file (1 runs them one at a time; ignored with --in-process). With more than one "
+        f"job, {STRATEGY_FILE} is never rewritten with the proposed or best parameters."
+    )
+    # Lower it to fail over to a retry/fallback sooner on a stalled server
+    parser.add_argument(
+        "--llm-timeout", type=float, default=LLM_TIMEOUT,
+        help="Read timeout in seconds for each LLM request; failed requests are retried twice with backoff."
+    )
     args = parser.parse_args(argv)
+    LLM_TIMEOUT = args.llm_timeout
     freqtrade_bin = _detect_freqtrade()
     _ensure_strategy_exists()
-    _download_data(freqtrade_bin, args.config, args.timeframe, args.verbose)
+    # The candle download runs while memory loads and the first proposal is
+    # requested; it is joined before anything reads the data
+    download: Optional[Future[None]] = None
+    if _data_fresh(args.config, args.timeframe):
+        print(f"[DATA] {args.timeframe} candles updated within the last hour, skipping download")
+    else:
+        download_executor = ThreadPoolExecutor(max_workers=1)
+        download = download_executor.submit(
+            _download_data, freqtrade_bin, args.config, args.timeframe, args.verbose
+        )
+        download_executor.shutdown(wait=False)
     MEMORY_WINDOW = 5
     # --- MCP Memory Integration ---
     if not args.disable_memory:
         mcp = MCPMemoryClient()
         stm_raw = mcp.get("short_term_memory")
         ltm_raw = mcp.get("long_term_memory")
-        short_term_memory: list[str] = [str(x) for x in stm_raw] if isinstance(stm_raw, list) else []  # type: ignore
+        stm_init = [str(x) for x in stm_raw] if isinstance(stm_raw, list) else []  # type: ignore
         long_term_memory: list[str] = [str(x) for x in ltm_raw] if isinstance(ltm_raw, list) else []  # type: ignore
     else:
         print("[INFO] Memory features disabled - using session-only memory")
-        short_term_memory: list[str] = []
-        long_term_memory: list[str] = []
-    for i in range(1, args.max_loops + 1):
-        print(f"\n=== LOOP {i}/{args.max_loops} ===")
-        # Read the latest summary for feedback
-        last_backtest_summary = None
-        try:
-            with open("user_data/backtest_result.log", "r", encoding="utf-8") as fbt:
-                last_backtest_summary = fbt.read().strip()
-        except Exception as e:
-            last_backtest_summary = f"(summary unavailable: {e})"
-        # Update memory
-        if last_backtest_summary:
-            short_term_memory.append(last_backtest_summary)
-            long_term_memory.append(last_backtest_summary)
-            if len(short_term_memory) > MEMORY_WINDOW:
-                short_term_memory.pop(0)
-            # Save updated memory to MCP only if memory is enabled
-            if not args.disable_memory:
-                mcp.put("short_term_memory", short_term_memory)
-                mcp.put("long_term_memory", long_term_memory)
-        # Build prompt with both short- and long-term memory
-        if short_term_memory:
-            prompt = (
-                f"You are improving a Freqtrade strategy in Python called {STRATEGY_NAME}.\n"
-                "Only suggest SMALL numeric tweaks to either or both of:\n"
-                '- minimal_roi (dict like {"0": float})\n'
-                "- stoploss (negative float between -0.30 and -0.01).\n\n"
-                "Return STRICT JSON only with keys: minimal_roi_0 (float), stoploss (float).\n"
-                "Do not include text outside the JSON.\n\n"
-                f"Short-term memory (last {MEMORY_WINDOW} summaries):\n"
-                + "\n---\n".join(short_term_memory)
-                + "\n\n"
-                "Long-term memory (all summaries so far):\n"
-                + "\n---\n".join(long_term_memory)
-                + "\n"
+        stm_init = []
+        long_term_memory = []
+    # Appends evict the oldest summary; the long-term text is extended in place
+    # rather than re-joined from the whole list every loop
+    short_term_memory: deque[str] = deque(stm_init, maxlen=MEMORY_WINDOW)
+    long_term_text = "\n---\n".join(long_term_memory)
+    if args.in_process and download is not None:
+        download.result()
+        download = None
+    backtester = (
+        _InProcessBacktester(args.config, STRATEGY_NAME, args.timeframe, args.timerange)
+        if args.in_process
+        else None
+    )
+    executor = ThreadPoolExecutor(max_workers=1) if args.prefetch else None
+    pending: Optional[Future[list[dict[str, float]]]] = None
+    proposals: deque[dict[str, float]] = deque()
+    pool = (
+        ProcessPoolExecutor(max_workers=args.jobs)
+        if args.jobs > 1 and backtester is None
+        else None
+    )
+    # One in-flight backtest per queued proposal, kept in the same order
+    queued_backtests: deque[Future[tuple[bool, list[str], list[str], int]]] = deque()
+    # Pids of the pool workers that wrote files, cleaned up at the end
+    worker_pids: set[int] = set()
+    try:
+        for i in range(1, args.max_loops + 1):
+            print(f"\n=== LOOP {i}/{args.max_loops} ===")
+            # Read the latest summary for feedback; only a previous run's needs the file
+            last_backtest_summary = None
+            if _LAST_SUMMARY is not None:
+                last_backtest_summary = _LAST_SUMMARY.strip()
+            else:
+                try:
+                    with open("user_data/backtest_result.log", "r", encoding="utf-8") as fbt:
+                        last_backtest_summary = fbt.read().strip()
+                except Exception as e:
+                    last_backtest_summary = f"(summary unavailable: {e})"
+            # Update memory
+            if last_backtest_summary:
+                short_term_memory.append(last_backtest_summary)
+                long_term_memory.append(last_backtest_summary)
+                if long_term_text:
+                    long_term_text += "\n---\n"
+                long_term_text += last_backtest_summary
+                # Save updated memory to MCP only if memory is enabled
+                if not args.disable_memory:
+                    mcp.put("short_term_memory", list(short_term_memory))
+                    mcp.put("long_term_memory", long_term_memory)
+            if not proposals:
+                if pending is not None:
+                    proposals.extend(pending.result())
+                    pending = None
+                else:
+                    prompt = _build_prompt(args.spec, short_term_memory, long_term_text, MEMORY_WINDOW)
+                    _log_prompt(i, prompt, short_term_memory, long_term_memory)
+                    proposals.extend(_propose(prompt, i, min(args.batch_size, args.max_loops - i + 1)))
+            if download is not None:
+                download.result()
+                download = None
+            if pool is not None:
+                for queued in list(proposals)[len(queued_backtests):]:
+                    queued_backtests.append(
+                        pool.submit(
+                            _backtest_worker,
+                            freqtrade_bin,
+                            args.config,
+                            args.timeframe,
+                            args.timerange,
+                            float(queued.get("minimal_roi_0", 0.012)),
+                            float(queued.get("stoploss", -0.11)),
+                            args.verbose,
+                            args.export_trades,
+                        )
+                    )
+            rec = proposals.popleft()
+            m0 = float(rec.get("minimal_roi_0", 0.012))
+            sl = float(rec.get("stoploss", -0.11))
+            print(f"[LLM] Proposed minimal_roi[0]={m0:.3f}, stoploss={sl:.2f}")
+            if backtester is None and pool is None:
+                _mutate_strategy(m0, sl)
+            if executor is not None and not proposals and i < args.max_loops:
+                prompt = _build_prompt(args.spec, short_term_memory, long_term_text, MEMORY_WINDOW)
+                _log_prompt(i + 1, prompt, short_term_memory, long_term_memory)
+                pending = executor.submit(
+                    _propose, prompt, i + 1, min(args.batch_size, args.max_loops - i)
+                )
+            if backtester is not None:
+                ok = backtester.run(m0, sl)
+            elif pool is not None:
+                ok, summary_lines, tail, pid = queued_backtests.popleft().result()
+                worker_pids.add(pid)
+                print("\n".join(tail))
+                if ok:
+                    _write_summary(summary_lines, tail)
+                else:
+                    _loop_log("[BACKTEST] Backtest failed, no summary written.")
+            else:
+                ok = _backtest(
+                    freqtrade_bin,
+                    args.config,
+                    STRATEGY_NAME,
+                    args.timeframe,
+                    args.timerange,
+                    args.verbose,
+                    args.export_trades,
+                )
+            # Log the result
+            _loop_log(
+                f"LOOP {i} LLM RESPONSE: {rec}",
+                f"LOOP {i} STRATEGY: minimal_roi_0={m0}, stoploss={sl}",
             )
-        else:
-            prompt = args.spec
-        # Log the prompt and memory
-        with open("user_data/learning_loop.log", "a", encoding="utf-8") as flog:
-            flog.write(f"LOOP {i} PROMPT:\n{prompt}\n")
-            flog.write(f"LOOP {i} SHORT_TERM_MEMORY: {short_term_memory}\n")
-            flog.write(f"LOOP {i} LONG_TERM_MEMORY: {long_term_memory}\n")
-        # Retry logic for LLM failures
-        max_retries = 3
-        rec: dict[str, float] = {"minimal_roi_0": 0.012, "stoploss": -0.11}
-        for attempt in range(max_retries):
-            rec_raw = _llm_chat_json(prompt)
-            try:
-                m0_val = float(rec_raw.get("minimal_roi_0", 0.012))
-                sl_val = float(rec_raw.get("stoploss", -0.11))
-                rec = {"minimal_roi_0": m0_val, "stoploss": sl_val}
-                break
-            except Exception:
-                with open("user_data/learning_loop.log", "a", encoding="utf-8") as flog:
-                    flog.write(f"LOOP {i} LLM RETRY {attempt+1}: {rec_raw}\n")
-                time.sleep(2)
-        else:
-            # If all retries fail, log and use fallback values
-            with open("user_data/learning_loop.log", "a", encoding="utf-8") as flog:
-                flog.write(f"LOOP {i} LLM ALL RETRIES FAILED, using fallback values.\n")
-            # rec is already set to fallback values
-        m0 = float(rec.get("minimal_roi_0", 0.012))
-        sl = float(rec.get("stoploss", -0.11))
-        print(f"[LLM] Proposed minimal_roi[0]={m0:.3f}, stoploss={sl:.2f}")
-        _mutate_strategy(m0, sl)
-        ok = _backtest(
-            freqtrade_bin,
-            args.config,
-            STRATEGY_NAME,
-            args.timeframe,
-            args.timerange,
-            args.verbose,
-            args.export_trades,
-        )
-        # Log the result
-        with open("user_data/learning_loop.log", "a", encoding="utf-8") as flog:
-            flog.write(f"LOOP {i} LLM RESPONSE: {rec}\n")
-            flog.write(f"LOOP {i} STRATEGY: minimal_roi_0={m0}, stoploss={sl}\n")
-        if not ok:
-            print("[WARN] Backtest failed; continuing.")
-            with open("user_data/learning_loop.log", "a", encoding="utf-8") as flog:
-                flog.write(f"LOOP {i} WARNING: Backtest failed.\n")
-        time.sleep(1)
+            if not ok:
+                print("[WARN] Backtest failed; continuing.")
+                _loop_log(f"LOOP {i} WARNING: Backtest failed.")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if pool is not None:
+            pool.shutdown()
+            # Per-worker strategy copies and stderr logs go even if a loop raised;
+            # only this run's workers' files, not other runs' or user copies
+            for fut in queued_backtests:
+                if not fut.cancelled() and fut.exception() is None:
+                    worker_pids.add(fut.result()[3])
+            for pid in worker_pids:
+                for path in _worker_files(pid):
+                    path.unlink(missing_ok=True)
     return 0
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     raise SystemExit(main())
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import os
 import re
 import sys
@@ -20,7 +21,8 @@ except ImportError as e:
     # Optionally: print(f"[WARN] Could not import services.llm_client: {e}")
 
 ROOT = Path(__file__).resolve().parents[1]
-CODE_BLOCK_RE = re.compile(r"```python\s*(.*?)```", re.S)
+CODE_FENCE = "```python"
+CLASS_NAME_RE = re.compile(r"class\s+([A-Za-z0-9_]+)\s*\(\s*IStrategy\s*\)\s*:")
 
 
 def extract_code(text: str) -> str | None:
@@ -38,8 +40,13 @@ def extract_code(text: str) -> str | None:
         str | None: The extracted Python code as a string, or None if no
                     code block is found.
     """
-    m = CODE_BLOCK_RE.search(text)
-    return m.group(1).strip() if m else None
+    # Two str.find scans: the first fence and the next closing ``` after it
+    start = text.find(CODE_FENCE)
+    if start == -1:
+        return None
+    start += len(CODE_FENCE)
+    end = text.find("```", start)
+    return text[start:end].strip() if end != -1 else None
 
 
 def filename_from_class(code: str) -> str:
@@ -57,10 +64,9 @@ def filename_from_class(code: str) -> str:
     Returns:
         str: The generated filename (e.g., `MyStrategy_1678889900.py`).
     """
-    import re
     import time
 
-    m = re.search(r"class\s+([A-Za-z0-9_]+)\s*\(\s*IStrategy\s*\)\s*:", code)
+    m = CLASS_NAME_RE.search(code)
     base = m.group(1) if m else "GeneratedStrategy"
     suffix = str(int(time.time()))
     return f"{base}_{suffix}.py"
@@ -71,18 +77,23 @@ import datetime
 import yaml
 
 PROMPT_LOG = Path("user_data/llm_prompt_response.log")
+# LibYAML's C loader when PyYAML was built with it; same safe subset either way
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
+@functools.lru_cache(maxsize=1)
 def load_prompt_config() -> dict[str, str]:
     """
     Loads prompt templates and system instructions from config/agents.yaml.
     Returns a dict with keys: 'system_prompt', 'user_prompt'.
+    The result is cached for the life of the process; call
+    `load_prompt_config.cache_clear()` after editing the YAML.
     """
     config_path = Path("config/agents.yaml")
     if not config_path.exists():
         raise FileNotFoundError("Missing config/agents.yaml for prompt system.")
     with config_path.open("r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=_YAML_LOADER)
     # Example structure: agents: { StrategyLab: { system_prompt: ..., user_prompt: ... } }
     agents = config.get("agents", {})
     stratlab = agents.get("StrategyLab", {})
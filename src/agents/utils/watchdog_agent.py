@@ -2,28 +2,81 @@
 
 import logging
 import os
+import threading
 import time
 
 from agents.orchestrator_agent import run_agents
 
+try:
+    from watchdog.observers import Observer
+except ImportError:  # optional: pip install .[performance]
+    Observer = None
+
+# Filesystem event kinds that mean an existing .py file's contents may have changed;
+# like the poller, a newly created file is not a change
+CHANGE_EVENTS = frozenset({"modified", "moved"})
+# Virtualenv directory names; hidden dirs (.git, .venv, .agent_backups) are skipped too
+VENV_DIRS = frozenset({"venv", "env", "site-packages"})
+
+
+def _skip_dir(name):
+    return name.startswith(".") or name in VENV_DIRS
+
+
+def _watched(path, roots):
+    """True if ``path`` sits under one of ``roots`` without crossing a skipped directory."""
+    for root in roots:
+        rel = os.path.relpath(path, root)
+        if rel != ".." and not rel.startswith(".." + os.sep):
+            return not any(_skip_dir(part) for part in rel.split(os.sep)[:-1])
+    return False
+
+
+class _PyChangeHandler:
+    """watchdog event handler: flags .py changes for the WatchdogAgent loop."""
+
+    def __init__(self, logger, changed, roots=(".",)):
+        self.logger = logger
+        self.changed = changed
+        self.roots = roots
+        self.lock = threading.Lock()  # pending is filled by the observer thread
+        self.pending = set()  # paths reported since the agents last ran
+
+    def dispatch(self, event):
+        if event.is_directory or event.event_type not in CHANGE_EVENTS:
+            return
+        path = getattr(event, "dest_path", "") or event.src_path
+        if not path.endswith(".py") or not _watched(path, self.roots):
+            return
+        with self.lock:
+            if path in self.pending:
+                path = None
+            else:
+                self.pending.add(path)
+        if path:
+            self.logger.warning(f"Detected change in {path}")
+        self.changed.set()
+
+    def reset(self):
+        with self.lock:
+            self.pending.clear()
+
 
 class WatchdogAgent:
     """Watches for file changes, errors, or process failures and triggers healing."""
 
-    def __init__(self, watch_dirs=None, interval=10):
+    def __init__(self, watch_dirs=None, interval=10, debounce=1.0):
         self.logger = logging.getLogger("WatchdogAgent")
-        logging.basicConfig(
-            level=logging.INFO,
-            format="[WatchdogAgent] %(asctime)s %(levelname)s: %(message)s",
-        )
         self.watch_dirs = watch_dirs or ["."]
         self.interval = interval
+        self.debounce = debounce
         self.last_mtimes = {}
 
     def scan_files(self):
         changed = False
         for d in self.watch_dirs:
-            for root, _, files in os.walk(d):
+            for root, dirs, files in os.walk(d):
+                dirs[:] = [name for name in dirs if not _skip_dir(name)]
                 for f in files:
                     if f.endswith(".py"):
                         path = os.path.join(root, f)
@@ -36,8 +89,36 @@ class WatchdogAgent:
                             changed = True
         return changed
 
+    def watch_events(self):
+        """Block on filesystem notifications instead of re-walking the tree every interval.
+
+        Bursts of events (an editor save, a patch touching several files) are
+        coalesced: the agents run once no new event has arrived for ``debounce`` seconds.
+        """
+        changed = threading.Event()
+        observer = Observer()
+        handler = _PyChangeHandler(self.logger, changed, self.watch_dirs)
+        for d in self.watch_dirs:
+            observer.schedule(handler, d, recursive=True)
+        observer.start()
+        try:
+            while True:
+                changed.wait()
+                changed.clear()
+                while changed.wait(self.debounce):
+                    changed.clear()
+                handler.reset()
+                self.logger.info("Change detected. Running healing agents...")
+                run_agents()
+        finally:
+            observer.stop()
+            observer.join()
+
     def run(self):
         self.logger.info("Starting WatchdogAgent...")
+        if Observer is not None:
+            self.watch_events()
+            return
         while True:
             if self.scan_files():
                 self.logger.info("Change detected. Running healing agents...")
@@ -46,5 +127,9 @@ class WatchdogAgent:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[WatchdogAgent] %(asctime)s %(levelname)s: %(message)s",
+    )
     agent = WatchdogAgent()
     agent.run()
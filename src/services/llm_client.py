@@ -33,24 +33,69 @@ HELPER NOTES:
 - All logs are timestamped and include system/user prompts and responses.
 """
 
+import atexit
+import json
 import os
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional: pip install .[performance]
+    orjson = None
 
 CONFIG_PATH = Path("config/agents.yaml")
+# LibYAML's C loader when PyYAML was built with it; same safe subset either way
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 LOG_PATH = Path("user_data/llm_client.log")
+# Opened on first write and kept open until interpreter exit; flushed per record.
+_LOG_FILE: TextIO | None = None
+_LOG_LOCK = threading.Lock()
+
+# Parsed llm section keyed by (path, mtime_ns); shared by every agent in the process.
+_CFG_CACHE: tuple[tuple[str, int], dict[str, Any]] | None = None
+_CFG_LOCK = threading.Lock()
+
+# Keep-alive session shared by every LLMClient; 502/503/504 and dropped
+# connections are retried by urllib3 (0.3s, 0.6s, 1.2s) before chat() raises.
+_RETRY = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=None,
+    raise_on_status=False,
+)
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_RETRY))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_RETRY))
 
 
 def load_cfg() -> dict[str, Any]:
-    """Load LLM config from config/agents.yaml, with env var expansion."""
-    if not CONFIG_PATH.exists():
-        raise FileNotFoundError(f"Missing {CONFIG_PATH}")
+    """Load LLM config from config/agents.yaml, with env var expansion.
+
+    The YAML is parsed once per file version; callers get a fresh copy.
+    """
+    global _CFG_CACHE
+    try:
+        key = (str(CONFIG_PATH), CONFIG_PATH.stat().st_mtime_ns)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Missing {CONFIG_PATH}") from None
+    with _CFG_LOCK:
+        if _CFG_CACHE is None or _CFG_CACHE[0] != key:
+            _CFG_CACHE = (key, _parse_cfg())
+        return dict(_CFG_CACHE[1])
+
+
+def _parse_cfg() -> dict[str, Any]:
     with CONFIG_PATH.open("r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=_YAML_LOADER)
     llm_cfg = config.get("llm", {})
     # Expand env vars in config values
     for k, v in llm_cfg.items():
@@ -92,9 +137,10 @@ class LLMClient:
         }
         ts = datetime.now().isoformat()
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=60)
+            body = orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode("utf-8")
+            resp = _SESSION.post(url, headers=headers, data=body, timeout=60)
             resp.raise_for_status()
-            data = resp.json()
+            data = orjson.loads(resp.content) if orjson is not None else resp.json()
             # OpenAI-compatible: choices[0].message.content
             content = data["choices"][0]["message"]["content"]
             self._log(ts, system, user, content)
@@ -104,8 +150,13 @@ class LLMClient:
             raise
 
     def _log(self, ts: str, system: str, user: str, response: str) -> None:
-        LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with LOG_PATH.open("a", encoding="utf-8") as f:
-            f.write(
+        global _LOG_FILE
+        with _LOG_LOCK:
+            if _LOG_FILE is None:
+                LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+                _LOG_FILE = LOG_PATH.open("a", encoding="utf-8")
+                atexit.register(_LOG_FILE.close)
+            _LOG_FILE.write(
                 f"\n---\nTIMESTAMP: {ts}\nSYSTEM:\n{system}\nUSER:\n{user}\nRESPONSE:\n{response}\n"
             )
+            _LOG_FILE.flush()
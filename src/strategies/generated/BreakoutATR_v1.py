@@ -1,5 +1,6 @@
 """Module: BreakoutATR_v1.py — auto-generated docstring for flake8 friendliness."""
 
+import numpy as np
 import pandas as pd
 import talib.abstract as ta
 from freqtrade.strategy import DecimalParameter, IntParameter
@@ -17,20 +18,22 @@ class BreakoutATR_v1(IStrategy):
         df["atr"] = ta.ATR(df, timeperiod=int(self.atr_period.value))
         df["high_ma"] = ta.SMA(df["high"], timeperiod=20)
         df["low_ma"] = ta.SMA(df["low"], timeperiod=20)
-        if "enter_long" not in df.columns:
-            df["enter_long"] = 0
-        if "exit_long" not in df.columns:
-            df["exit_long"] = 0
         return df
 
     def populate_entry_trend(self, df: pd.DataFrame, metadata: dict) -> pd.DataFrame:
-        thr = df["high_ma"] + (float(self.atr_mult.value) * df["atr"])
-        buy_mask = df["close"] > thr
-        df.loc[buy_mask, "enter_long"] = 1
+        # Parameter read once per call (hyperopt calls this per epoch); threshold
+        # built in one scratch array with no intermediate Series or index alignment
+        mult = float(self.atr_mult.value)
+        thr = df["atr"].to_numpy(dtype=np.float64) * mult
+        thr += df["high_ma"].to_numpy(dtype=np.float64)
+        # Built from the mask alone: freqtrade drops signal columns before this
+        # runs, and int8 keeps the 0/1 flags an eighth of int64
+        df["enter_long"] = (df["close"].to_numpy() > thr).astype(np.int8)
         return df
 
     def populate_exit_trend(self, df: pd.DataFrame, metadata: dict) -> pd.DataFrame:
-        thr = df["low_ma"] - (float(self.atr_mult.value) * df["atr"])
-        sell_mask = df["close"] < thr
-        df.loc[sell_mask, "exit_long"] = 1
+        mult = float(self.atr_mult.value)
+        thr = df["atr"].to_numpy(dtype=np.float64) * -mult
+        thr += df["low_ma"].to_numpy(dtype=np.float64)
+        df["exit_long"] = (df["close"].to_numpy() < thr).astype(np.int8)
         return df
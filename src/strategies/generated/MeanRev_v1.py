@@ -1,8 +1,53 @@
 """Module: MeanRev_v1.py — auto-generated docstring for flake8 friendliness."""
 
+import numpy as np
 from freqtrade.strategy.interface import IStrategy
 from pandas import DataFrame
 
+try:
+    from numba import njit, types
+except ImportError:  # optional: pip install .[performance]
+    njit = None
+
+Z_WINDOW = 50
+
+
+def _rolling_ma_z(close: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Rolling mean and z-score (sample std, like pandas) in one pass over ``close``.
+
+    Running sums are kept relative to the first price, so the sum of squares
+    does not lose precision on large prices.
+    """
+    n = close.shape[0]
+    ma = np.full(n, np.nan)
+    z = np.full(n, np.nan)
+    if n == 0:
+        return ma, z
+    shift = close[0]
+    s = 0.0
+    ss = 0.0
+    for i in range(n):
+        x = close[i] - shift
+        s += x
+        ss += x * x
+        if i >= window:
+            y = close[i - window] - shift
+            s -= y
+            ss -= y * y
+        if i >= window - 1:
+            mean = s / window
+            var = max((ss - s * mean) / (window - 1), 0.0)
+            ma[i] = mean + shift
+            z[i] = (x - mean) / (np.sqrt(var) + 1e-9)
+    return ma, z
+
+
+if njit is not None:
+    # Explicit signature: compiled at import, not on first call (not cached on disk,
+    # see MicroSwingATRRSI_v1). ``close`` may be a read-only view under copy-on-write
+    _F8_RO = types.Array(types.float64, 1, "A", readonly=True)
+    _rolling_ma_z = njit(types.UniTuple(types.float64[:], 2)(_F8_RO, types.int64))(_rolling_ma_z)
+
 
 class MeanRev_v1(IStrategy):
     timeframe = "5m"
@@ -10,14 +55,19 @@ class MeanRev_v1(IStrategy):
     stoploss = -0.015
 
     def populate_indicators(self, df: DataFrame, metadata: dict) -> DataFrame:
-        df["ma"] = df["close"].rolling(50).mean()
-        df["z"] = (df["close"] - df["ma"]) / (df["close"].rolling(50).std() + 1e-9)
+        close = df["close"].to_numpy(dtype=np.float64)
+        if njit is not None and not np.isnan(close).any():
+            df["ma"], df["z"] = _rolling_ma_z(close, Z_WINDOW)
+        else:
+            df["ma"] = df["close"].rolling(Z_WINDOW).mean()
+            df["z"] = (df["close"] - df["ma"]) / (df["close"].rolling(Z_WINDOW).std() + 1e-9)
         return df
 
     def populate_entry_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
-        df.loc[(df["z"] < -1.0), "enter_long"] = 1
+        # No enter_long exists yet at this point; write the int8 flags fresh
+        df["enter_long"] = (df["z"].to_numpy() < -1.0).astype(np.int8)
         return df
 
     def populate_exit_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
-        df.loc[(df["z"] >= 0.0), "exit_long"] = 1
+        df["exit_long"] = (df["z"].to_numpy() >= 0.0).astype(np.int8)
         return df
@@ -1,13 +1,138 @@
 # strategies/MicroSwingATRRSI_v1.py
 from __future__ import annotations
 
-from typing import List
-
 import numpy as np
 import pandas as pd
 from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy
 from pandas import DataFrame
 
+try:
+    from numba import njit, types
+except ImportError:  # optional: pip install .[performance]
+    njit = None
+
+
+def _rsi_wilder(close: np.ndarray, length: int) -> np.ndarray:
+    """Wilder RSI in one pass over a NaN-free ``close``.
+
+    Matches the ``ewm(alpha=1/length, adjust=False, min_periods=length)``
+    version: smoothing is seeded from the first move and the first
+    ``length`` candles are NaN.
+    """
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    alpha = 1.0 / length
+    roll_up = 0.0
+    roll_down = 0.0
+    for i in range(1, n):
+        d = close[i] - close[i - 1]
+        up = d if d > 0 else 0.0
+        down = -d if d < 0 else 0.0
+        if i == 1:
+            roll_up = up
+            roll_down = down
+        else:
+            roll_up = (1.0 - alpha) * roll_up + alpha * up
+            roll_down = (1.0 - alpha) * roll_down + alpha * down
+        if i >= length:
+            out[i] = 100.0 - 100.0 / (1.0 + roll_up / (roll_down + 1e-12))
+    return out
+
+
+def _atr_wilder(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int) -> np.ndarray:
+    """True range and its Wilder smoothing in one pass over NaN-free inputs.
+
+    Matches the ``ewm(alpha=1/length, adjust=False, min_periods=length)``
+    version: the first TR is ``high - low`` (no previous close) and seeds the
+    average, and the first ``length - 1`` candles are NaN.
+    """
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    alpha = 1.0 / length
+    atr = 0.0
+    for i in range(n):
+        tr = abs(high[i] - low[i])
+        if i == 0:
+            atr = tr
+        else:
+            pc = close[i - 1]
+            tr = max(tr, abs(high[i] - pc), abs(low[i] - pc))
+            atr = (1.0 - alpha) * atr + alpha * tr
+        if i >= length - 1:
+            out[i] = atr
+    return out
+
+
+def _sma(series: pd.Series, window: int) -> pd.Series:
+    """Simple moving average, NaN for the first ``window - 1`` rows like ``rolling(window).mean()``.
+
+    One ``np.convolve`` over the raw values skips pandas' rolling machinery.
+    """
+    values = series.to_numpy(dtype=np.float64)
+    out = np.full(values.shape[0], np.nan)
+    if values.shape[0] >= window:
+        out[window - 1 :] = np.convolve(values, np.full(window, 1.0 / window), mode="valid")
+    return pd.Series(out, index=series.index)
+
+
+def _replace_inf(series: pd.Series, fill: float) -> np.ndarray:
+    """Copy of ``series`` with +/-inf replaced by ``fill`` (NaN is left alone)."""
+    values = series.to_numpy(dtype=np.float64, copy=True)
+    values[np.isinf(values)] = fill
+    return values
+
+
+def _pct_of_close(values: pd.Series, close: pd.Series) -> np.ndarray:
+    """``values / close`` in one ``np.divide``, 0 where either side is NaN or close is not positive."""
+    num = values.to_numpy(dtype=np.float64)
+    den = close.to_numpy(dtype=np.float64)
+    out = np.zeros(den.shape[0])
+    np.divide(num, den, out=out, where=(den > 0) & ~np.isnan(num))
+    return out
+
+
+def _pct_change(close: np.ndarray, periods: int) -> np.ndarray:
+    """``close[i] / close[i - periods] - 1`` written into one array; 0 where undefined.
+
+    Matches ``pct_change(periods).fillna(0)`` with +/-inf zeroed on NaN-free
+    closes: the first ``periods`` rows and 0/0 or x/0 results are 0.
+    """
+    out = np.zeros(close.shape[0])
+    if 0 < periods < close.shape[0]:
+        tail = out[periods:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(close[periods:], close[:-periods], out=tail)
+        tail -= 1.0
+        tail[~np.isfinite(tail)] = 0.0
+    return out
+
+
+def _forward_return(close: np.ndarray, horizon: int) -> np.ndarray:
+    """``close[i + horizon] / close[i] - 1`` written into one array; 0 where undefined.
+
+    Matches ``(close.shift(-horizon) / close - 1).fillna(0)``: the last
+    ``horizon`` rows and NaN results are 0, a zero divisor still gives inf.
+    """
+    out = np.zeros(close.shape[0])
+    if 0 < horizon < close.shape[0]:
+        head = out[:-horizon]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(close[horizon:], close[:-horizon], out=head)
+        head -= 1.0
+        head[np.isnan(head)] = 0.0
+    return out
+
+
+if njit is not None:
+    # Explicit signatures compile at import, so the first backtest/hyperopt call
+    # does not pay for JIT compilation. No on-disk cache: freqtrade loads strategy
+    # files without registering them in sys.modules, and numba cannot reload those.
+    # Inputs are typed read-only, which writable arrays convert to: with pandas
+    # copy-on-write, to_numpy() returns read-only views of the columns
+    _F8_RO = types.Array(types.float64, 1, "A", readonly=True)
+    _rsi_wilder = njit(types.float64[:](_F8_RO, types.int64))(_rsi_wilder)
+    _atr_wilder = njit(types.float64[:](_F8_RO, _F8_RO, _F8_RO, types.int64))(_atr_wilder)
+
 
 class MicroSwingATRRSI_v1(IStrategy):
     """
@@ -80,6 +205,9 @@ class MicroSwingATRRSI_v1(IStrategy):
     # -------------------- Indicator helpers --------------------
     @staticmethod
     def _rsi(series: pd.Series, length: int) -> pd.Series:
+        close = series.to_numpy(dtype=np.float64)
+        if njit is not None and not np.isnan(close).any():
+            return pd.Series(_rsi_wilder(close, int(length)), index=series.index)
         delta = series.diff()
         up = delta.clip(lower=0)
         down = -delta.clip(upper=0)
@@ -90,6 +218,11 @@ class MicroSwingATRRSI_v1(IStrategy):
 
     @staticmethod
     def _atr(df: DataFrame, length: int) -> pd.Series:
+        high = df["high"].to_numpy(dtype=np.float64)
+        low = df["low"].to_numpy(dtype=np.float64)
+        close = df["close"].to_numpy(dtype=np.float64)
+        if njit is not None and not (np.isnan(high).any() or np.isnan(low).any() or np.isnan(close).any()):
+            return pd.Series(_atr_wilder(high, low, close, int(length)), index=df.index)
         prev_close = df["close"].shift(1)
         tr1 = (df["high"] - df["low"]).abs()
         tr2 = (df["high"] - prev_close).abs()
@@ -99,18 +232,34 @@ class MicroSwingATRRSI_v1(IStrategy):
 
     # -------------------- Indicators --------------------
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        sf = int(self.sma_fast_len.value)
-        ss = int(self.sma_slow_len.value)
-        rl = int(self.rsi_len.value)
-        al = int(self.atr_len.value)
+        # Hyperopt calls this once per pair and then only the entry/exit
+        # methods per epoch, so every length in each parameter's range is
+        # computed up front (`.range` is just the current value outside
+        # hyperopt) and _select_indicators picks the epoch's columns.
+        close = dataframe["close"]
+        variants: dict[str, pd.Series] = {}
+        for n in sorted({*self.sma_fast_len.range, *self.sma_slow_len.range}):
+            variants[f"sma_{n}"] = _sma(close, int(n))
+        for n in self.rsi_len.range:
+            variants[f"rsi_{n}"] = self._rsi(close, int(n))
+        for n in self.atr_len.range:
+            variants[f"atr_{n}"] = self._atr(dataframe, int(n))
+        # One concat instead of ~100 single-column inserts during hyperopt
+        dataframe = pd.concat(
+            [dataframe.drop(columns=list(variants), errors="ignore"), DataFrame(variants, index=dataframe.index)],
+            axis=1,
+        )
+        return self._select_indicators(dataframe)
 
-        dataframe["sma_fast"] = dataframe["close"].rolling(sf).mean()
-        dataframe["sma_slow"] = dataframe["close"].rolling(ss).mean()
+    def _select_indicators(self, dataframe: DataFrame) -> DataFrame:
+        """Fill the named indicator columns from the current parameter values."""
+        dataframe["sma_fast"] = dataframe[f"sma_{int(self.sma_fast_len.value)}"]
+        dataframe["sma_slow"] = dataframe[f"sma_{int(self.sma_slow_len.value)}"]
 
-        dataframe["atr"] = self._atr(dataframe, al)
-        dataframe["atr_pct"] = (dataframe["atr"] / dataframe["close"]).fillna(0)
+        dataframe["atr"] = dataframe[f"atr_{int(self.atr_len.value)}"]
+        dataframe["atr_pct"] = _pct_of_close(dataframe["atr"], dataframe["close"])
 
-        dataframe["rsi"] = self._rsi(dataframe["close"], rl)
+        dataframe["rsi"] = dataframe[f"rsi_{int(self.rsi_len.value)}"]
 
         # ATR bands around fast SMA (visual + exits)
         dataframe["atr_low_band"] = (
@@ -121,52 +270,41 @@ class MicroSwingATRRSI_v1(IStrategy):
         )
 
         # Gap of fast/slow to ensure trend strength
-        dataframe["sma_gap"] = (
-            dataframe["sma_fast"] - dataframe["sma_slow"]
-        ) / dataframe["sma_slow"]
-
-        dataframe.replace([np.inf, -np.inf], np.nan, inplace=True)
+        # The two ratio columns are the only ones a zero divisor can push to
+        # +/-inf, so only they are cleaned instead of scanning the whole frame
+        dataframe["sma_gap"] = _replace_inf(
+            (dataframe["sma_fast"] - dataframe["sma_slow"]) / dataframe["sma_slow"], np.nan
+        )
         return dataframe
 
     # -------------------- Entries --------------------
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        conditions: List[pd.Series] = []
-
+        gap_min = float(self.sma_gap_min.value)
+        rsi_max = int(self.rsi_buy_max.value)
+        dataframe = self._select_indicators(dataframe)
+        # One boolean ndarray narrowed in place from raw columns: no Series
+        # alignment and no list of intermediate masks.
         # Trend: fast > slow & enough separation
-        conditions += [
-            (dataframe["sma_fast"] > dataframe["sma_slow"]),
-            (dataframe["sma_gap"] > float(self.sma_gap_min.value)),
-        ]
+        mask = dataframe["sma_fast"].to_numpy() > dataframe["sma_slow"].to_numpy()
+        mask &= dataframe["sma_gap"].to_numpy() > gap_min
 
         # Pullback near/below fast SMA with ATR cushion
-        conditions += [
-            (dataframe["close"] <= dataframe["atr_low_band"]),
-            (dataframe["rsi"] <= int(self.rsi_buy_max.value)),
-        ]
+        mask &= dataframe["close"].to_numpy() <= dataframe["atr_low_band"].to_numpy()
+        mask &= dataframe["rsi"].to_numpy() <= rsi_max
 
-        if conditions:
-            dataframe.loc[
-                np.logical_and.reduce(conditions),
-                ["enter_long", "enter_tag"],
-            ] = (1, "pullback_atr_rsi")
+        dataframe.loc[mask, ["enter_long", "enter_tag"]] = (1, "pullback_atr_rsi")
 
         return dataframe
 
     # -------------------- Exits --------------------
     def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        exit_conditions: List[pd.Series] = []
-
+        rsi_exit = int(self.rsi_exit.value)
+        dataframe = self._select_indicators(dataframe)
         # Momentum pop or ATR channel top
-        exit_conditions += [
-            (dataframe["rsi"] >= int(self.rsi_exit.value))
-            | (dataframe["close"] >= dataframe["atr_high_band"])
-        ]
+        mask = dataframe["rsi"].to_numpy() >= rsi_exit
+        mask |= dataframe["close"].to_numpy() >= dataframe["atr_high_band"].to_numpy()
 
-        if exit_conditions:
-            dataframe.loc[
-                np.logical_and.reduce(exit_conditions),
-                ["exit_long", "exit_tag"],
-            ] = (1, "rsi_or_atr_band")
+        dataframe.loc[mask, ["exit_long", "exit_tag"]] = (1, "rsi_or_atr_band")
 
         return dataframe
 
@@ -175,20 +313,26 @@ class MicroSwingATRRSI_v1(IStrategy):
     def feature_engineering_expand_basic(
         self, dataframe: DataFrame, metadata: dict
     ) -> DataFrame:
-        df = dataframe.copy()
+        # Features are added to the frame FreqAI hands in, as in freqtrade's
+        # examples, instead of to a full copy of it
+        df = dataframe
         # Lightweight, model-friendly features
-        df["ret_1"] = df["close"].pct_change().fillna(0)
-        df["ret_3"] = df["close"].pct_change(3).fillna(0)
-        df["rsi_fe"] = self._rsi(df["close"], int(self.rsi_len.value)).fillna(50)
-        df["atr_pct_fe"] = (
-            self._atr(df, int(self.atr_len.value)) / df["close"]
-        ).fillna(0)
-        df["sma_gap_fe"] = (
-            df["close"].rolling(int(self.sma_fast_len.value)).mean()
-            - df["close"].rolling(int(self.sma_slow_len.value)).mean()
-        ) / df["close"].rolling(int(self.sma_slow_len.value)).mean()
-        df["sma_gap_fe"] = df["sma_gap_fe"].fillna(0)
-        df.replace([np.inf, -np.inf], 0, inplace=True)
+        # Ratio features get their +/-inf zeroed individually, not via a frame-wide replace
+        close = df["close"].to_numpy(dtype=np.float64)
+        df["ret_1"] = _pct_change(close, 1)
+        df["ret_3"] = _pct_change(close, 3)
+        # Indicator variants from populate_indicators are reused when present
+        rl = int(self.rsi_len.value)
+        al = int(self.atr_len.value)
+        sf = int(self.sma_fast_len.value)
+        ss = int(self.sma_slow_len.value)
+        rsi = df[f"rsi_{rl}"] if f"rsi_{rl}" in df.columns else self._rsi(df["close"], rl)
+        atr = df[f"atr_{al}"] if f"atr_{al}" in df.columns else self._atr(df, al)
+        sma_fast = df[f"sma_{sf}"] if f"sma_{sf}" in df.columns else _sma(df["close"], sf)
+        sma_slow = df[f"sma_{ss}"] if f"sma_{ss}" in df.columns else _sma(df["close"], ss)
+        df["rsi_fe"] = rsi.fillna(50)
+        df["atr_pct_fe"] = _pct_of_close(atr, df["close"])
+        df["sma_gap_fe"] = _replace_inf(((sma_fast - sma_slow) / sma_slow).fillna(0), 0.0)
         return df
 
     def set_freqai_targets(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -196,9 +340,7 @@ class MicroSwingATRRSI_v1(IStrategy):
         Create a simple future-return target over ~2 hours (24x5m candles).
         Matches your config's label_period_candles=24.
         """
-        df = dataframe.copy()
+        df = dataframe
         horizon = 24
-        df["fai_target_return"] = (
-            df["close"].shift(-horizon) / df["close"] - 1.0
-        ).fillna(0)
+        df["fai_target_return"] = _forward_return(df["close"].to_numpy(dtype=np.float64), horizon)
         return df
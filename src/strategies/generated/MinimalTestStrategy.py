@@ -1,6 +1,7 @@
 """Module: MinimalTestStrategy.py — auto-generated docstring for flake8 friendliness."""
 
 # Minimal working Freqtrade strategy for testing
+import numpy as np
 import pandas as pd
 from freqtrade.strategy import IStrategy
 
@@ -20,11 +21,12 @@ class MinimalTestStrategy(IStrategy):
     def populate_buy_trend(
         self, dataframe: pd.DataFrame, metadata: dict
     ) -> pd.DataFrame:
-        dataframe.loc[(dataframe["rsi"] < 30), "buy"] = 1
+        # Full 0/1 uint8 column straight from the bool mask (NaN rows are 0)
+        dataframe["buy"] = (dataframe["rsi"].to_numpy() < 30).view(np.uint8)
         return dataframe
 
     def populate_sell_trend(
         self, dataframe: pd.DataFrame, metadata: dict
     ) -> pd.DataFrame:
-        dataframe.loc[(dataframe["rsi"] > 70), "sell"] = 1
+        dataframe["sell"] = (dataframe["rsi"].to_numpy() > 70).view(np.uint8)
         return dataframe
@@ -1,5 +1,6 @@
 """Module: NoviceAlwaysBuySell.py — auto-generated docstring for flake8 friendliness."""
 
+import numpy as np
 from freqtrade.strategy.interface import IStrategy
 from pandas import DataFrame
 
@@ -15,11 +16,11 @@ class AlwaysBuyStrategy(IStrategy):
         return dataframe
 
     def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe.loc[:, "buy"] = 1
+        dataframe["buy"] = np.ones(len(dataframe), dtype=np.uint8)
         return dataframe
 
     def populate_sell_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe.loc[:, "sell"] = 1
+        dataframe["sell"] = np.ones(len(dataframe), dtype=np.uint8)
         return dataframe
 
 
@@ -37,9 +38,9 @@ class AlwaysSellStrategy(IStrategy):
         return dataframe
 
     def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe.loc[:, "buy"] = 0
+        dataframe["buy"] = np.zeros(len(dataframe), dtype=np.uint8)
         return dataframe
 
     def populate_sell_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe.loc[:, "sell"] = 1
+        dataframe["sell"] = np.ones(len(dataframe), dtype=np.uint8)
         return dataframe
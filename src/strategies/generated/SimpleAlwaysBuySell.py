@@ -1,3 +1,4 @@
+import numpy as np
 import talib.abstract as ta
 from freqtrade.strategy.interface import IStrategy
 from pandas import DataFrame
@@ -21,10 +22,11 @@ class SimpleAlwaysBuySell(IStrategy):
             & (dataframe["close"] > dataframe["sma_fast"])
             & (dataframe["rsi"].between(50, 70))
         )
-        dataframe["buy"] = cond.astype(int)
+        # bool and uint8 share a layout: reinterpret instead of casting to int64
+        dataframe["buy"] = cond.to_numpy().view(np.uint8)
         return dataframe
 
     def populate_sell_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         cond = (dataframe["rsi"] > 70) | (dataframe["close"] < dataframe["sma_fast"])
-        dataframe["sell"] = cond.astype(int)
+        dataframe["sell"] = cond.to_numpy().view(np.uint8)
         return dataframe
@@ -2,10 +2,52 @@
 
 import numpy as np
 from freqtrade.strategy.interface import IStrategy
-from pandas import DataFrame
+from pandas import DataFrame, Series
+
+try:
+    from numba import njit, types
+except ImportError:  # optional: pip install .[performance]
+    njit = None
+
+
+def _rsi_wilder(close: np.ndarray, period: int) -> np.ndarray:
+    """Wilder RSI in one pass: delta, smoothed up/down moves and RSI per candle.
+
+    Matches ``ewm(alpha=1/period, adjust=False)`` seeded from a zero first
+    move; a NaN delta counts as no move, as ``np.where`` did.
+    """
+    n = close.shape[0]
+    out = np.empty(n)
+    alpha = 1.0 / period
+    roll_up = 0.0
+    roll_down = 0.0
+    for i in range(n):
+        up = 0.0
+        down = 0.0
+        if i > 0:
+            d = close[i] - close[i - 1]
+            if d > 0:
+                up = d
+            elif d < 0:
+                down = -d
+        roll_up = (1.0 - alpha) * roll_up + alpha * up
+        roll_down = (1.0 - alpha) * roll_down + alpha * down
+        out[i] = 100.0 - 100.0 / (1.0 + roll_up / (roll_down + 1e-9))
+    return out
+
+
+if njit is not None:
+    # Explicit signature: compiled at import, not on first call. No cache=True:
+    # freqtrade execs strategy files outside sys.modules, which numba's cache cannot reload.
+    # The input is typed read-only: writable arrays convert to that, and under pandas
+    # copy-on-write to_numpy() returns read-only views
+    _F8_RO = types.Array(types.float64, 1, "A", readonly=True)
+    _rsi_wilder = njit(types.float64[:](_F8_RO, types.int64))(_rsi_wilder)
 
 
 def rsi(series, period=14):
+    if njit is not None:
+        return Series(_rsi_wilder(series.to_numpy(dtype=np.float64), int(period)), index=series.index)
     delta = series.diff()
     up = np.where(delta > 0, delta, 0.0)
     down = np.where(delta < 0, -delta, 0.0)
@@ -1,9 +1,22 @@
 """Module: SmaRsi_v2.py — auto-generated docstring for flake8 friendliness."""
 
+import numpy as np
 import talib.abstract as ta
 from freqtrade.strategy import DecimalParameter, IntParameter
 from freqtrade.strategy.interface import IStrategy
-from pandas import DataFrame
+from pandas import DataFrame, Series
+
+try:
+    from numba import njit, types
+except ImportError:  # optional: pip install .[performance]
+    njit = None
+
+
+# 1h EMA200 frames keyed by (pair, timeframe, rows, last date); reused by repeated
+# populate_indicators calls until the informative candles advance, e.g. each new
+# 5m candle in dry/live runs. Hyperopt computes indicators once per pair, not per epoch.
+_INF_CACHE: dict[tuple, DataFrame] = {}
+_INF_CACHE_SIZE = 64
 
 
 # --- helpers ---
@@ -12,8 +25,38 @@ def rsi_series(close, period=14):
 
 
 def crossed_above(a, b):
-    # True when a crosses from <= b to > b on this bar
-    return (a > b) & (a.shift(1) <= b.shift(1))
+    # True when a crosses from <= b to > b on this bar; compared on raw arrays
+    # offset by one instead of building shifted Series (bar 0 never crosses)
+    av = a.to_numpy()
+    bv = b.to_numpy()
+    out = np.zeros(av.shape[0], dtype=bool)
+    out[1:] = av[1:] > bv[1:]
+    out[1:] &= av[:-1] <= bv[:-1]
+    return Series(out, index=a.index)
+
+
+def _entry_mask(sma_fast, sma_slow, sma_gap, atr_pct, rsi, ema200_slope, gap_min, atr_min, atr_max, rsi_max):
+    """Fused entry condition of populate_entry_trend in a single pass over the columns."""
+    n = sma_fast.shape[0]
+    out = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        slope = ema200_slope[i]
+        if not (np.isnan(slope) or slope > 0):
+            continue
+        trend = sma_fast[i] > sma_slow[i]
+        if not (trend and sma_gap[i] > gap_min and atr_min < atr_pct[i] < atr_max and rsi[i] < rsi_max):
+            continue
+        cross = i > 0 and sma_fast[i - 1] <= sma_slow[i - 1]
+        out[i] = cross or sma_gap[i] > 0
+    return out
+
+
+if njit is not None:
+    # Explicit signature: compiled at import, not on first call. Not cached on disk
+    # since this file is loaded by path rather than imported as a module. Columns are
+    # read-only arrays, which writable ones convert to (pandas copy-on-write hands out both)
+    _F8_RO = types.Array(types.float64, 1, "A", readonly=True)
+    _entry_mask = njit(types.boolean[:](*[_F8_RO] * 6, *[types.float64] * 4))(_entry_mask)
 
 
 class SmaRsi_v2(IStrategy):
@@ -55,9 +98,22 @@ class SmaRsi_v2(IStrategy):
         inf = self.dp.get_pair_dataframe(
             pair=pair, timeframe=self.informative_timeframe
         )
-        inf["ema200"] = ta.EMA(inf["close"], timeperiod=200)
-        inf["ema200_slope"] = inf["ema200"].pct_change()
-        return inf
+        key = (
+            pair,
+            self.informative_timeframe,
+            len(inf),
+            inf["date"].iloc[-1] if len(inf) else None,
+        )
+        cached = _INF_CACHE.get(key)
+        if cached is None:
+            ema200 = Series(ta.EMA(inf["close"], timeperiod=200), index=inf.index)
+            cached = DataFrame(
+                {"date": inf["date"], "ema200": ema200, "ema200_slope": ema200.pct_change()}
+            )
+            if len(_INF_CACHE) >= _INF_CACHE_SIZE:
+                del _INF_CACHE[next(iter(_INF_CACHE))]
+            _INF_CACHE[key] = cached
+        return cached
 
     # ===== Indicators =====
     def populate_indicators(self, df: DataFrame, metadata: dict) -> DataFrame:
@@ -77,25 +133,51 @@ class SmaRsi_v2(IStrategy):
         df["atr"] = ta.ATR(df["high"], df["low"], df["close"], timeperiod=alen)
         df["atr_pct"] = df["atr"] / df["close"]
 
-        # Merge 1h informative
+        # Align 1h informative: each 5m candle takes the last 1h row at or
+        # before its date (same as a left merge on date + ffill, without the join)
         inf = self._informative_df(metadata["pair"])
-        df = df.merge(inf[["date", "ema200", "ema200_slope"]], on="date", how="left")
-        df[["ema200", "ema200_slope"]] = df[["ema200", "ema200_slope"]].ffill()
+        idx = np.searchsorted(inf["date"].values, df["date"].values, side="right") - 1
+        before = idx < 0
+        idx = idx.clip(0)
+        for col in ("ema200", "ema200_slope"):
+            vals = inf[col].to_numpy(dtype=np.float64)
+            out = vals[idx] if len(vals) else np.full(len(df), np.nan)
+            out[before] = np.nan
+            df[col] = out
 
         return df
 
     # ===== Entries =====
     def populate_entry_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
+        gap_min = float(self.sma_gap_min.value)
+        atr_min = float(self.atr_min_pct.value)
+        atr_max = float(self.atr_max_pct.value)
+        rsi_max = int(self.rsi_max.value)
+        if njit is not None:
+            cond = _entry_mask(
+                df["sma_fast"].to_numpy(dtype=np.float64),
+                df["sma_slow"].to_numpy(dtype=np.float64),
+                df["sma_gap"].to_numpy(dtype=np.float64),
+                df["atr_pct"].to_numpy(dtype=np.float64),
+                df["rsi"].to_numpy(dtype=np.float64),
+                df["ema200_slope"].to_numpy(dtype=np.float64),
+                gap_min,
+                atr_min,
+                atr_max,
+                float(rsi_max),
+            )
+            df.loc[cond, "enter_long"] = 1
+            return df
         cond = (
             (
                 (df["ema200_slope"].isna())
                 | ((df["ema200_slope"].isna()) | (df["ema200_slope"] > 0))
             )  # HTF uptrend
             & (df["sma_fast"] > df["sma_slow"])  # local trend
-            & (df["sma_gap"] > float(self.sma_gap_min.value))  # avoid flat crosses
-            & (df["atr_pct"] > float(self.atr_min_pct.value))  # not dead volatility
-            & (df["atr_pct"] < float(self.atr_max_pct.value))  # not crazy vol
-            & (df["rsi"] < int(self.rsi_max.value))  # not overheated
+            & (df["sma_gap"] > gap_min)  # avoid flat crosses
+            & (df["atr_pct"] > atr_min)  # not dead volatility
+            & (df["atr_pct"] < atr_max)  # not crazy vol
+            & (df["rsi"] < rsi_max)  # not overheated
             & (
                 (crossed_above(df["sma_fast"], df["sma_slow"]))
                 | ((df["sma_fast"] > df["sma_slow"]) & (df["sma_gap"] > 0))
@@ -106,5 +188,6 @@ class SmaRsi_v2(IStrategy):
 
     # ===== Exits =====
     def populate_exit_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
-        df.loc[(df["rsi"] > int(self.rsi_exit.value)), "exit_long"] = 1
+        rsi_exit = int(self.rsi_exit.value)
+        df.loc[(df["rsi"] > rsi_exit), "exit_long"] = 1
         return df
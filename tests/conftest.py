@@ -0,0 +1,18 @@
+"""Make the ``agents.<module>`` imports used across src/ resolvable in tests.
+
+The agent modules import each other as ``agents.<name>`` although they live in
+src/agents/utils; the runtime gets there via PYTHONPATH, tests via this shim.
+"""
+
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import agents  # noqa: E402
+
+AGENT_UTILS = os.path.join(SRC, "agents", "utils")
+if AGENT_UTILS not in agents.__path__:
+    agents.__path__.append(AGENT_UTILS)
@@ -0,0 +1,369 @@
+"""Unit tests for the self-healing agent's building blocks."""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from agents import self_heal_mcp_agent as heal
+from agents.patch_utils import dry_run_patch, git_apply_cmd
+
+
+class FakeResponse:
+    """Streamed HTTP response stand-in that records how far it was read."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.read = 0
+        self.closed = False
+
+    def iter_lines(self):
+        for line in self.lines:
+            self.read += 1
+            yield line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+
+def test_module_imports():
+    assert callable(heal.main)
+
+
+def test_read_stream_joins_chunks():
+    resp = FakeResponse([b"a", b"", b"b", b"c"])
+    assert heal.read_stream(resp, lambda line: line.decode()) == "abc"
+    assert resp.closed
+
+
+def test_read_stream_stops_at_marker_split_across_chunks():
+    resp = FakeResponse([b"x *** End", b" Patch", b"never read"])
+    text = heal.read_stream(resp, lambda line: line.decode())
+    assert text == "x *** End Patch"
+    assert resp.read == 2
+    assert resp.closed
+
+
+def test_read_stream_skips_empty_pieces():
+    resp = FakeResponse([b'data: {"choices": [{"delta": {"content": "hi"}}]}', b"data: [DONE]"])
+    assert heal.read_stream(resp, heal._openai_chunk) == "hi"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(heal.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_circuit_breaker_opens_after_threshold(clock):
+    breaker = heal.CircuitBreaker("test", fail_threshold=2, reset_timeout=10)
+    breaker.record(False)
+    assert breaker.allow()
+    breaker.record(False)
+    assert not breaker.allow()
+    clock[0] += 10
+    assert breaker.allow()
+
+
+def test_circuit_breaker_lets_one_probe_through(clock):
+    breaker = heal.CircuitBreaker("test", fail_threshold=1, reset_timeout=10)
+    breaker.record(False)
+    clock[0] += 10
+    assert breaker.peek()
+    assert breaker.allow()
+    assert not breaker.peek()
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_circuit_breaker_failed_probe_backs_off(clock):
+    breaker = heal.CircuitBreaker("test", fail_threshold=1, reset_timeout=10, max_timeout=15)
+    breaker.record(False)
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.timeout == 15
+    clock[0] += 10
+    assert not breaker.allow()
+    clock[0] += 5
+    assert breaker.allow()
+
+
+def test_circuit_breaker_success_closes(clock):
+    breaker = heal.CircuitBreaker("test", fail_threshold=1, reset_timeout=10)
+    breaker.record(False)
+    breaker.record(True)
+    assert breaker.allow()
+    assert breaker.failures == 0
+    assert breaker.timeout == 10
+
+
+def test_scan_cache_hits_until_file_changes(tmp_path):
+    src = tmp_path / "mod.py"
+    src.write_text("x = 1\n")
+    cache = heal.ScanCache(str(tmp_path / "cache.pkl"), ruleset="r1")
+    assert cache.get(str(src)) is None
+    cache.put(str(src), ["E1"])
+    assert cache.get(str(src)) == ["E1"]
+    # Same contents with a new mtime is still a hit
+    st = os.stat(src)
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.get(str(src)) == ["E1"]
+    src.write_text("x = 2\n")
+    assert cache.get(str(src)) is None
+
+
+def test_scan_cache_persists_per_ruleset(tmp_path):
+    src = tmp_path / "mod.py"
+    src.write_text("x = 1\n")
+    path = str(tmp_path / "cache.pkl")
+    cache = heal.ScanCache(path, ruleset="r1")
+    cache.put(str(src), ["E1"])
+    cache.save([str(src)])
+    assert heal.ScanCache(path, ruleset="r1").get(str(src)) == ["E1"]
+    assert heal.ScanCache(path, ruleset="r2").get(str(src)) is None
+
+
+def test_scan_cache_save_drops_deleted_files(tmp_path):
+    kept, gone = tmp_path / "a.py", tmp_path / "b.py"
+    kept.write_text("a = 1\n")
+    gone.write_text("b = 1\n")
+    path = str(tmp_path / "cache.pkl")
+    cache = heal.ScanCache(path)
+    cache.put(str(kept), [])
+    cache.put(str(gone), [])
+    cache.save([str(kept)])
+    assert list(heal.ScanCache(path).entries) == [str(kept)]
+
+
+PATCH = """--- a/mod.py
++++ b/mod.py
+@@ -1,2 +1,2 @@
+ x = 1
+-y = 2
++y = 3
+"""
+
+# Context on both sides, so git may find the hunk at another line
+OFFSET_PATCH = """--- a/mod.py
++++ b/mod.py
+@@ -2,3 +2,3 @@
+ x = 1
+-y = 2
++y = 3
+ z = 3
+"""
+
+
+def test_dry_run_patch_accepts_matching_hunk(tmp_path):
+    (tmp_path / "mod.py").write_text("x = 1\ny = 2\n")
+    assert dry_run_patch(PATCH, cwd=str(tmp_path)) is None
+
+
+def test_dry_run_patch_finds_hunk_at_offset(tmp_path):
+    (tmp_path / "mod.py").write_text("import os\n\nx = 1\ny = 2\nz = 3\n")
+    assert dry_run_patch(OFFSET_PATCH, cwd=str(tmp_path)) is None
+
+
+def test_dry_run_patch_anchors_hunks_like_git(tmp_path):
+    # A hunk for line 1 must match at the top, one without trailing context at EOF
+    (tmp_path / "mod.py").write_text("import os\n\nx = 1\ny = 2\n")
+    assert "does not match" in dry_run_patch(PATCH, cwd=str(tmp_path))
+    (tmp_path / "mod.py").write_text("x = 1\ny = 2\nz = 3\n")
+    assert "does not match" in dry_run_patch(PATCH, cwd=str(tmp_path))
+
+
+def test_dry_run_patch_ignores_trailing_whitespace(tmp_path):
+    (tmp_path / "mod.py").write_text("x = 1  \ny = 2\t\n")
+    assert dry_run_patch(PATCH, cwd=str(tmp_path)) is None
+
+
+def test_dry_run_patch_strips_paths_like_git(tmp_path):
+    (tmp_path / "mod.py").write_text("x = 1\ny = 2\n")
+    plain = PATCH.replace("a/mod.py", "mod.py").replace("b/mod.py", "mod.py")
+    assert dry_run_patch(plain, cwd=str(tmp_path)) is None
+    assert "-p0" in git_apply_cmd(plain)
+    assert "-p1" in git_apply_cmd(PATCH)
+
+
+def test_dry_run_patch_rejects_mismatch(tmp_path):
+    (tmp_path / "mod.py").write_text("x = 1\ny = 5\n")
+    assert "does not match" in dry_run_patch(PATCH, cwd=str(tmp_path))
+
+
+def test_dry_run_patch_rejects_missing_file(tmp_path):
+    assert "does not exist" in dry_run_patch(PATCH, cwd=str(tmp_path))
+
+
+def test_dry_run_patch_rejects_malformed_diff(tmp_path):
+    assert dry_run_patch("not a diff", cwd=str(tmp_path)) == "no ---/+++ file header pair"
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+@pytest.mark.parametrize("patch", [PATCH, OFFSET_PATCH], ids=["anchored", "context"])
+@pytest.mark.parametrize(
+    "contents",
+    [
+        "x = 1\ny = 2\n",
+        "w = 0\nx = 1\ny = 2\nz = 3\n",
+        "import os\n\nx = 1\ny = 2\nz = 3\n",  # one line further down
+        "a = 0\n" * 40 + "x = 1\ny = 2\nz = 3\n",  # far beyond the stated line
+        "x = 1\ny = 2\nz = 3\n",  # one line further up
+        "x = 1  \ny = 2\t\nz = 3\n",
+        "x = 1\ny = 5\nz = 3\n",
+        "y = 2\nx = 1\n",
+    ],
+)
+def test_dry_run_patch_agrees_with_git_apply(tmp_path, patch, contents):
+    (tmp_path / "mod.py").write_text(contents)
+    cmd = git_apply_cmd(patch)
+    git = subprocess.run([*cmd[:-1], "--check", "-"], input=patch, cwd=tmp_path, capture_output=True, text=True)
+    assert (dry_run_patch(patch, cwd=str(tmp_path)) is None) == (git.returncode == 0)
+
+
+def test_apply_llm_patch_skips_git_when_dry_run_fails(tmp_path, monkeypatch):
+    (tmp_path / "mod.py").write_text("x = 1\ny = 5\n")
+    monkeypatch.setattr(heal.subprocess, "run", lambda *a, **k: pytest.fail("git apply ran"))
+    applied, output = heal.apply_llm_patch(PATCH, cwd=str(tmp_path))
+    assert not applied
+    assert output.startswith("Dry run: mod.py")
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+def test_apply_llm_patch_applies_at_offset(tmp_path):
+    (tmp_path / "mod.py").write_text("import os\n\nx = 1\ny = 2\nz = 3\n")
+    assert heal.apply_llm_patch(OFFSET_PATCH, cwd=str(tmp_path))[0]
+    assert (tmp_path / "mod.py").read_text() == "import os\n\nx = 1\ny = 3\nz = 3\n"
+
+
+class FakeMCP:
+    """In-memory MCPMemoryClient; every instance shares ``store``."""
+
+    store: dict = {}
+
+    def put(self, key, value):
+        self.store[key] = value
+
+    def get(self, key, default=None):
+        return self.store.get(key, default)
+
+
+class StopLoop(BaseException):
+    """Raised from the patched time.sleep; main() only catches Exception."""
+
+
+class FakeLog:
+    def __init__(self):
+        self.lines = []
+
+    def info(self, msg):
+        self.lines.append(msg)
+
+
+class NoThread:
+    def __init__(self, target, daemon=None):
+        pass
+
+    def start(self):
+        pass
+
+
+@pytest.fixture
+def heal_env(tmp_path, monkeypatch):
+    """Run main() in ``tmp_path`` with fake MCP/scan/LLM; returns a driver for N loops."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "user_data").mkdir()
+    (tmp_path / "mod.py").write_text("x = 1\ny = 2\n")
+    monkeypatch.setattr(FakeMCP, "store", {})
+    log = FakeLog()
+    responses = []
+    monkeypatch.setattr(heal, "MCPMemoryClient", FakeMCP)
+    monkeypatch.setattr(heal, "heal_log", lambda: log)
+    monkeypatch.setattr(heal.threading, "Thread", NoThread)
+    monkeypatch.setattr(heal, "scan_all_project_problems", lambda: ["[FLAKE8] mod.py: E1"])
+    monkeypatch.setattr(heal, "call_local_llm", lambda prompt: responses.pop(0))
+
+    def run(loops, *llm_responses):
+        responses[:] = llm_responses
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) >= loops:
+                raise StopLoop
+
+        monkeypatch.setattr(heal.time, "sleep", sleep)
+        with pytest.raises(StopLoop):
+            heal.main()
+        return log.lines
+
+    run.store = FakeMCP.store
+    run.responses = responses
+    run.path = tmp_path
+    return run
+
+
+def test_main_applies_patch_and_counts_fix(heal_env):
+    lines = heal_env(1, "```diff\n" + PATCH + "```")
+    assert (heal_env.path / "mod.py").read_text() == "x = 1\ny = 3\n"
+    assert heal_env.store["self_heal:patch:1"]["applied"] is True
+    assert any(line.startswith("[FIX][SUCCESS]") for line in lines)
+    assert "Patch Applied: True" in (heal_env.path / "user_data/self_heal_status.txt").read_text()
+
+
+def test_main_does_not_count_rejected_patch(heal_env):
+    (heal_env.path / "mod.py").write_text("x = 1\ny = 5\n")
+    lines = heal_env(1, PATCH)
+    assert (heal_env.path / "mod.py").read_text() == "x = 1\ny = 5\n"
+    assert heal_env.store["self_heal:patch:1"]["applied"] is False
+    assert not any(line.startswith("[FIX][SUCCESS]") for line in lines)
+    assert any(line.startswith("[FIX][FAILED]") for line in lines)
+
+
+def test_main_noop_response_applies_nothing(heal_env):
+    lines = heal_env(1, "NOOP")
+    assert "self_heal:patch:1" not in heal_env.store
+    assert any(line.startswith("[FIX][NOOP]") for line in lines)
+
+
+def _cache_key():
+    return heal.fix_cache_key(heal.summarize_problems(["[FLAKE8] mod.py: E1"]))
+
+
+def test_main_stores_applied_patch_in_fix_cache(heal_env):
+    heal_env(1, PATCH)
+    assert heal_env.store[heal.FIX_CACHE_KEY] == {_cache_key(): PATCH}
+
+
+def test_main_reuses_cached_fix_without_llm(heal_env):
+    heal_env.store[heal.FIX_CACHE_KEY] = {"older": "x", _cache_key(): PATCH}
+    lines = heal_env(1)  # no LLM responses queued: a call would raise IndexError
+    assert (heal_env.path / "mod.py").read_text() == "x = 1\ny = 3\n"
+    assert any(line.startswith("[PATCH][CACHE]") for line in lines)
+    # A hit moves to the most recently used end
+    assert list(heal_env.store[heal.FIX_CACHE_KEY]) == ["older", _cache_key()]
+
+
+def test_main_evicts_cached_fix_that_no_longer_applies(heal_env):
+    (heal_env.path / "mod.py").write_text("x = 1\ny = 5\n")
+    heal_env.store[heal.FIX_CACHE_KEY] = {_cache_key(): PATCH}
+    lines = heal_env(2, PATCH.replace("-y = 2", "-y = 5"))
+    # Loop 1 tries the stale cached patch and drops it; loop 2 asks the LLM again
+    assert heal_env.store["self_heal:patch:1"]["applied"] is False
+    assert heal_env.store["self_heal:patch:2"]["applied"] is True
+    assert not heal_env.responses
+    assert sum(line.startswith("[PATCH][CACHE]") for line in lines) == 1
+
+
+def test_main_fix_cache_drops_least_recently_used(heal_env, monkeypatch):
+    monkeypatch.setattr(heal, "FIX_CACHE_MAX", 2)
+    heal_env.store[heal.FIX_CACHE_KEY] = {"oldest": "a", "newer": "b"}
+    heal_env(1, PATCH)
+    assert list(heal_env.store[heal.FIX_CACHE_KEY]) == ["newer", _cache_key()]
@@ -0,0 +1,115 @@
+"""Tests for the self-loop agent's backtest plumbing and LLM output parsing."""
+
+import os
+import sys
+
+import pytest
+
+from agents import self_loop_agent as sl
+
+FAKE_FREQTRADE = f"""#!{sys.executable}
+import sys
+strategy = sys.argv[sys.argv.index("--strategy") + 1]
+print("noise")
+print("STRATEGY SUMMARY " + strategy)
+print("└──┘")
+"""
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """A project dir with a fake freqtrade in .venv/bin and fresh candle data."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "user_data").mkdir()
+    ft = tmp_path / ".venv" / "bin" / "freqtrade"
+    ft.parent.mkdir(parents=True)
+    ft.write_text(FAKE_FREQTRADE)
+    ft.chmod(0o755)
+    monkeypatch.setattr(sl, "_STRATEGY_READY", False)
+    monkeypatch.setattr(sl, "_LAST_SUMMARY", None)
+    monkeypatch.setattr(sl, "_data_fresh", lambda *a, **k: True)
+    return tmp_path
+
+
+def test_pool_removes_only_its_own_worker_files(workdir, monkeypatch):
+    proposals = [{"minimal_roi_0": 0.02, "stoploss": -0.1}, {"minimal_roi_0": 0.03, "stoploss": -0.2}]
+    monkeypatch.setattr(sl, "_propose", lambda prompt, loop_id, n=1: proposals[:n])
+    (workdir / "strategies").mkdir()
+    user_copy = workdir / "strategies" / f"{sl.STRATEGY_NAME}_mine.py"
+    user_copy.write_text("# kept\n")
+    other_run = workdir / "user_data" / "backtest_stderr_1.log"
+    other_run.write_text("kept\n")
+    argv = ["--max-loops", "2", "--batch-size", "2", "--jobs", "2", "--disable-memory"]
+    assert sl.main(argv) == 0
+    left = sorted(p.name for p in (workdir / "strategies").iterdir())
+    assert left == ["SimpleAlwaysBuySell.py", "SimpleAlwaysBuySell_mine.py", "__init__.py"]
+    logs = [n for n in os.listdir(workdir / "user_data") if n.startswith("backtest_stderr_")]
+    assert logs == [other_run.name]
+    # The pool never rewrites the shared strategy file
+    assert (workdir / "strategies" / "SimpleAlwaysBuySell.py").read_text() == sl.BASELINE_STRATEGY
+    assert "STRATEGY SUMMARY SimpleAlwaysBuySell_" in sl._LAST_SUMMARY
+
+
+class FakeStream:
+    """Stands in for a streamed requests.Response; records how many lines were read."""
+
+    def __init__(self, *chunks, raw=()):
+        self.lines = [b": keep-alive", *raw]
+        for chunk in chunks:
+            self.lines.append(b"data: " + sl._dumps({"choices": [{"delta": {"content": chunk}}]}))
+        self.lines.append(b"data: [DONE]")
+        self.read = 0
+
+    def iter_lines(self):
+        for line in self.lines:
+            self.read += 1
+            yield line
+
+
+def test_read_streamed_content_stops_when_json_closes():
+    resp = FakeStream('Sure: {"minimal_roi_0": ', '{"x": [1]}', "}", " trailing prose")
+    assert sl._read_streamed_content(resp) == 'Sure: {"minimal_roi_0": {"x": [1]}}'
+    # The trailing chunk and [DONE] are never pulled off the connection
+    assert resp.read == len(resp.lines) - 2
+
+
+def test_read_streamed_content_skips_malformed_events():
+    resp = FakeStream("[1,", " 2]", raw=(b"data: not json", b'data: {"choices": []}', b"event: ping"))
+    assert sl._read_streamed_content(resp) == "[1, 2]"
+
+
+def test_read_streamed_content_ends_at_done_without_json():
+    resp = FakeStream("no json here")
+    assert sl._read_streamed_content(resp) == "no json here"
+    assert resp.read == len(resp.lines)
+
+
+@pytest.mark.parametrize(
+    "text, opener, expected",
+    [
+        ('{"stoploss": -0.1}', "{", {"stoploss": -0.1}),
+        ('Here you go: {"a": {"b": [1, "}"]}} done', "{", {"a": {"b": [1, "}"]}}),
+        ('{not json} then {"a": 1}', "{", {"a": 1}),
+        ('{"proposals": [{"a": 1}, {"a": 2}]}', "[", [{"a": 1}, {"a": 2}]),
+        ("no json at all", "{", None),
+        ('{"a": 1', "{", None),
+    ],
+)
+def test_first_json(text, opener, expected):
+    assert sl._first_json(text, opener) == expected
+
+
+@pytest.mark.parametrize("prefetch, fresh", [(False, True), (True, False)])
+def test_prefetch_lags_feedback_one_loop(workdir, monkeypatch, prefetch, fresh):
+    prompts = {}
+
+    def propose(prompt, loop_id, n=1):
+        prompts[loop_id] = prompt
+        return [{"minimal_roi_0": 0.02, "stoploss": -0.1}]
+
+    monkeypatch.setattr(sl, "_propose", propose)
+    argv = ["--max-loops", "2", "--disable-memory"] + (["--prefetch"] if prefetch else [])
+    assert sl.main(argv) == 0
+    assert sorted(prompts) == [1, 2]
+    # Without prefetch, loop 2's prompt carries loop 1's backtest summary
+    assert ("STRATEGY SUMMARY SimpleAlwaysBuySell" in prompts[2]) is fresh
@@ -0,0 +1,128 @@
+"""Numba strategy kernels against the pandas code they stand in for."""
+
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("numba")
+pytest.importorskip("freqtrade.strategy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STRATEGY_DIR = os.path.join(ROOT, "src", "strategies", "generated")
+
+
+def load_strategy(name):
+    """Exec a strategy file by path without registering it, as freqtrade's resolver does."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(STRATEGY_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def readonly(values):
+    values = np.array(values, dtype=np.float64)
+    values.flags.writeable = False
+    return values
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(7)
+    n = 400
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2024-01-01", periods=n, freq="5min"),
+            "open": close,
+            "high": close + rng.random(n) * 2,
+            "low": close - rng.random(n) * 2,
+            "close": close,
+            "volume": 1.0,
+        }
+    )
+
+
+def test_smarsi_v1_rsi_matches_pandas(candles, monkeypatch):
+    mod = load_strategy("SmaRsi_v1")
+    fast = mod.rsi(candles["close"], 14)
+    monkeypatch.setattr(mod, "njit", None)
+    slow = mod.rsi(candles["close"], 14)
+    np.testing.assert_allclose(fast.to_numpy(), np.asarray(slow).ravel(), rtol=1e-9)
+
+
+def test_meanrev_v1_ma_z_matches_pandas(candles, monkeypatch):
+    mod = load_strategy("MeanRev_v1")
+    strategy = mod.MeanRev_v1.__new__(mod.MeanRev_v1)
+    fast = strategy.populate_indicators(candles.copy(), {})
+    monkeypatch.setattr(mod, "njit", None)
+    slow = strategy.populate_indicators(candles.copy(), {})
+    np.testing.assert_allclose(fast["ma"], slow["ma"], rtol=1e-9)
+    np.testing.assert_allclose(fast["z"], slow["z"], rtol=1e-6, atol=1e-9)
+
+
+@pytest.mark.parametrize("length", [7, 14, 21])
+def test_microswing_rsi_atr_match_pandas(candles, monkeypatch, length):
+    mod = load_strategy("MicroSwingATRRSI_v1")
+    cls = mod.MicroSwingATRRSI_v1
+    rsi = cls._rsi(candles["close"], length)
+    atr = cls._atr(candles, length)
+    monkeypatch.setattr(mod, "njit", None)
+    np.testing.assert_allclose(rsi, cls._rsi(candles["close"], length), rtol=1e-9)
+    np.testing.assert_allclose(atr, cls._atr(candles, length), rtol=1e-9)
+
+
+def test_smarsi_v2_entry_mask_matches_pandas(monkeypatch):
+    pytest.importorskip("talib")
+    mod = load_strategy("SmaRsi_v2")
+    strategy = mod.SmaRsi_v2.__new__(mod.SmaRsi_v2)
+    rng = np.random.default_rng(3)
+    n = 500
+    slow = 100 + rng.normal(0, 1, n).cumsum()
+    fast = slow + rng.normal(0, 0.5, n)
+    slope = rng.normal(0, 1, n)
+    slope[rng.random(n) < 0.2] = np.nan
+    df = pd.DataFrame(
+        {
+            "sma_fast": fast,
+            "sma_slow": slow,
+            "sma_gap": (fast - slow) / slow,
+            "atr_pct": rng.uniform(0, 0.06, n),
+            "rsi": rng.uniform(20, 90, n),
+            "ema200_slope": slope,
+        }
+    )
+    kernel = strategy.populate_entry_trend(df.copy(), {})["enter_long"].fillna(0)
+    monkeypatch.setattr(mod, "njit", None)
+    pandas = strategy.populate_entry_trend(df.copy(), {})["enter_long"].fillna(0)
+    assert kernel.sum() > 0
+    pd.testing.assert_series_equal(kernel, pandas)
+
+
+def test_kernels_accept_readonly_arrays(candles):
+    close = readonly(candles["close"])
+    high = readonly(candles["high"])
+    low = readonly(candles["low"])
+    micro = load_strategy("MicroSwingATRRSI_v1")
+    np.testing.assert_array_equal(micro._rsi_wilder(close, 14), micro._rsi_wilder(close.copy(), 14))
+    np.testing.assert_array_equal(
+        micro._atr_wilder(high, low, close, 14), micro._atr_wilder(high.copy(), low.copy(), close.copy(), 14)
+    )
+    smarsi = load_strategy("SmaRsi_v1")
+    np.testing.assert_array_equal(smarsi._rsi_wilder(close, 14), smarsi._rsi_wilder(close.copy(), 14))
+    meanrev = load_strategy("MeanRev_v1")
+    np.testing.assert_array_equal(meanrev._rolling_ma_z(close, 50)[1], meanrev._rolling_ma_z(close.copy(), 50)[1])
+
+
+def test_strategies_run_under_copy_on_write(candles):
+    # Under copy-on-write Series.to_numpy() hands out read-only views
+    with pd.option_context("mode.copy_on_write", True):
+        assert not candles["close"].to_numpy().flags.writeable
+        mod = load_strategy("MeanRev_v1")
+        df = mod.MeanRev_v1.__new__(mod.MeanRev_v1).populate_indicators(candles.copy(), {})
+        assert df["z"].notna().sum() == len(df) - 49
+        micro = load_strategy("MicroSwingATRRSI_v1").MicroSwingATRRSI_v1
+        assert micro._atr(candles, 14).notna().sum() == len(candles) - 13
+        assert load_strategy("SmaRsi_v1").rsi(candles["close"]).notna().all()
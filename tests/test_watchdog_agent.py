@@ -0,0 +1,63 @@
+"""Tests for WatchdogAgent's filesystem-event handler."""
+
+import logging
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from agents import watchdog_agent as wd
+
+
+def event(event_type, src_path, dest_path="", is_directory=False):
+    return SimpleNamespace(event_type=event_type, src_path=src_path, dest_path=dest_path, is_directory=is_directory)
+
+
+@pytest.fixture
+def handler(tmp_path):
+    return wd._PyChangeHandler(logging.getLogger("test"), threading.Event(), (str(tmp_path),))
+
+
+def test_modified_py_file_is_flagged_once(handler, tmp_path):
+    path = str(tmp_path / "src" / "a.py")
+    handler.dispatch(event("modified", path))
+    handler.dispatch(event("modified", path))
+    assert handler.changed.is_set()
+    assert handler.pending == {path}
+    handler.reset()
+    assert handler.pending == set()
+
+
+def test_moved_onto_py_file_is_flagged(handler, tmp_path):
+    handler.dispatch(event("moved", str(tmp_path / "a.py~"), str(tmp_path / "a.py")))
+    assert handler.pending == {str(tmp_path / "a.py")}
+
+
+@pytest.mark.parametrize(
+    "evt",
+    [
+        event("created", "a.py"),
+        event("deleted", "a.py"),
+        event("modified", "notes.txt"),
+        event("modified", "pkg", is_directory=True),
+        event("modified", os.path.join(".agent_backups", "a.py")),
+        event("modified", os.path.join(".venv", "lib", "a.py")),
+        event("modified", os.path.join("venv", "lib", "a.py")),
+        event("modified", os.path.join("src", ".git", "a.py")),
+    ],
+)
+def test_ignored_events(handler, tmp_path, evt):
+    evt.src_path = str(tmp_path / evt.src_path)
+    handler.dispatch(evt)
+    assert not handler.changed.is_set()
+    assert handler.pending == set()
+
+
+def test_poller_skips_the_same_dirs(tmp_path):
+    for sub in ("src", ".agent_backups", ".venv", "venv"):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / "a.py").write_text("x = 1\n")
+    agent = wd.WatchdogAgent(watch_dirs=[str(tmp_path)])
+    assert not agent.scan_files()
+    assert list(agent.last_mtimes) == [str(tmp_path / "src" / "a.py")]